@@ -0,0 +1,112 @@
+"""
+Chunk insert throughput of the COPY path (`ChunkModel.bulk_insert_chunks`) against the
+ORM path (`ChunkModel.insert_many_chunks`).
+
+It needs the app database with the migrations applied. The rows go to a scratch
+project that is deleted at the end. Run it from `src/` with the app `.env` in place:
+
+    python -m benchmarks.chunk_insert_bench --chunks 100000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text as sql_text
+
+from helpers.config import get_settings
+from helpers.text_splitter import get_text_hash
+from models.ChunkModel import ChunkModel
+from models.AssetModel import AssetModel
+from models.ProjectModel import ProjectModel
+from models.db_schemes import Asset, DataChunk, Project
+from models.enums.AssetTypeEnum import AssetTypeEnum
+
+
+WORDS = ("retrieval augmented generation grounds answers in indexed documents "
+         "chunks are embedded and stored in a vector database for semantic search").split()
+
+
+def make_chunks(chunks_count: int, chunk_size: int, project_id: int, asset_id: int, seed: int = 7):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(chunks_count):
+        chunk_text = " ".join(rng.choices(WORDS, k=chunk_size // 7))[:chunk_size]
+        chunks.append({
+            "chunk_text": chunk_text,
+            "chunk_metadata": {"start_index": i * chunk_size, "end_index": (i + 1) * chunk_size},
+            "chunk_order": i + 1,
+            "chunk_hash": get_text_hash(chunk_text),
+            "chunk_project_id": project_id,
+            "chunk_asset_id": asset_id,
+        })
+    return chunks
+
+
+async def run_orm(chunk_model: ChunkModel, chunks: list, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        # the previous process job built one ORM object per chunk
+        await chunk_model.insert_many_chunks(chunks=[DataChunk(**chunk) for chunk in chunks[i:i + batch_size]])
+    return time.perf_counter() - start
+
+
+async def run_copy(chunk_model: ChunkModel, chunks: list, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        await chunk_model.bulk_insert_chunks(chunks=chunks[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+async def main(args):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+
+    db_engine = create_async_engine(postgres_conn)
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    project_model = await ProjectModel.create_instance(db_client=db_client)
+    asset_model = await AssetModel.create_instance(db_client=db_client)
+    chunk_model = await ChunkModel.create_instance(db_client=db_client)
+
+    project = await project_model.create_project(Project())
+    asset = await asset_model.create_asset(Asset(
+        asset_project_id=project.project_id,
+        asset_type=AssetTypeEnum.FILE.value,
+        asset_name="chunk_insert_bench",
+        asset_size=0
+    ))
+
+    try:
+        chunks = make_chunks(args.chunks, args.chunk_size, project.project_id, asset.asset_id)
+
+        results = {}
+        for mode in args.modes.split(","):
+            run = run_orm if mode == "orm" else run_copy
+            elapsed = await run(chunk_model, chunks, args.batch_size)
+            results[mode] = args.chunks / elapsed
+            print(f"{mode:>5}: {args.chunks} chunks in {elapsed:.2f}s, {results[mode]:,.0f} chunks/s")
+
+            await chunk_model.delete_chunks_by_project_id(project_id=project.project_id)
+
+        if "orm" in results and "copy" in results:
+            print(f"speedup: {results['copy'] / results['orm']:.1f}x")
+
+    finally:
+        async with db_client() as session:
+            async with session.begin():
+                await session.execute(sql_text("DELETE FROM chunks WHERE chunk_project_id = :p"), {"p": project.project_id})
+                await session.execute(sql_text("DELETE FROM assets WHERE asset_project_id = :p"), {"p": project.project_id})
+                await session.execute(sql_text("DELETE FROM projects WHERE project_id = :p"), {"p": project.project_id})
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--modes", default="orm,copy")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Bulk embedding through the `EmbeddingScheduler` against the provider called directly,
+both talking to a local stand-in of the OpenAI embeddings API that enforces:
+
+- a maximum number of texts and of tokens per request (400 above them)
+- a tokens-per-minute budget (429 with `retry-after` once spent)
+- a share of random 5xx answers
+
+Texts are sent in pages by concurrent workers, like the index push. A page that fails
+is counted and skipped, as a failed page would abort the push. Run it from `src/`:
+
+    python -m benchmarks.embedding_scheduler_bench --texts 1500 --tokens-per-minute 100000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.stand_in_llm import StandInConfig, StandInState, serve_stand_in
+from stores.llm.EmbeddingScheduler import EmbeddingScheduler
+from stores.llm.providers import OpenAIProvider
+
+
+EMBEDDING_SIZE = 16
+
+
+async def run_mode(mode: str, args, base_url: str, stats: StandInState):
+    stats.reset()
+    http_client = httpx.AsyncClient()
+
+    if mode == "direct":
+        # the provider as the push used it: SDK retries only, one call per page
+        client = OpenAIProvider(api_key="stand-in", api_url=base_url, http_client=http_client)
+    else:
+        client = EmbeddingScheduler(
+            provider=OpenAIProvider(api_key="stand-in", api_url=base_url, http_client=http_client,
+                                    embedding_max_retries=0),
+            tokens_per_minute=args.tokens_per_minute,
+            max_batch_items=args.max_items,
+            max_batch_tokens=args.max_request_tokens,
+            max_retries=args.max_retries,
+        )
+    client.set_embedding_model(model_id="stand-in-embedding", embedding_size=EMBEDDING_SIZE)
+
+    rng = random.Random(args.seed)
+    texts = ["x" * rng.randint(args.text_chars // 2, args.text_chars * 3 // 2) for _ in range(args.texts)]
+    pages = asyncio.Queue()
+    for i in range(0, len(texts), args.page_size):
+        pages.put_nowait(texts[i:i + args.page_size])
+
+    embedded, failed_pages = 0, 0
+
+    async def worker():
+        nonlocal embedded, failed_pages
+        while not pages.empty():
+            page = pages.get_nowait()
+            try:
+                vectors = await client.embed_text(text=page, document_type="document")
+            except Exception:
+                vectors = None
+            if vectors and len(vectors) == len(page):
+                embedded += len(page)
+            else:
+                failed_pages += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    await http_client.aclose()
+
+    print(f"{mode:>9}: {embedded}/{len(texts)} texts in {elapsed:.1f}s, {failed_pages} failed pages, "
+          f"{stats.calls} calls ({stats.throttled} throttled, {stats.server_errors} 5xx, {stats.rejected} rejected)")
+
+
+async def main(args):
+    stats = StandInState(StandInConfig(
+        embedding_size=EMBEDDING_SIZE,
+        latency_ms=args.latency_ms,
+        max_items=args.max_items,
+        max_request_tokens=args.max_request_tokens,
+        tokens_per_minute=args.tokens_per_minute,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    ))
+
+    async with serve_stand_in(stats) as base_url:
+        for mode in args.modes.split(","):
+            await run_mode(mode, args, base_url, stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=1500)
+    parser.add_argument("--text-chars", type=int, default=400)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--max-items", type=int, default=64)
+    parser.add_argument("--max-request-tokens", type=int, default=8000)
+    parser.add_argument("--tokens-per-minute", type=int, default=100000)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--max-retries", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--modes", default="direct,scheduler")
+    asyncio.run(main(parser.parse_args()))
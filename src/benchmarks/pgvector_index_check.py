@@ -0,0 +1,140 @@
+"""
+Checks with EXPLAIN that `PGVectorProvider.search_by_vector` is answered by the vector
+index, for each distance method and index type, and times it against the previous
+`ORDER BY score DESC` query, which always scans the whole table.
+
+It creates a throwaway collection in the database of the local `.env`, fills it with
+random vectors and drops it at the end. Run it from `src/`; it exits with 1 when a
+search does not use the index:
+
+    python -m benchmarks.pgvector_index_check --rows 20000 --dimension 384
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text as sql_text
+
+from helpers.config import get_settings
+from stores.vectordb.VectorDBEnums import DistanceMethodEnums, PgVectorIndexTypeEnums, PgVectorTableSchemaEnums
+from stores.vectordb.providers import PGVectorProvider
+
+
+COLLECTION_NAME = "pgvector_index_check"
+
+
+def find_index_scans(plan: dict) -> list:
+    scans = [plan["Index Name"]] if "Index Name" in plan else []
+    for sub_plan in plan.get("Plans", []):
+        scans.extend(find_index_scans(sub_plan))
+    return scans
+
+
+def get_legacy_search_sql(provider: PGVectorProvider, collection):
+    # the query before the index aware path, kept for comparison
+    return sql_text(
+        f'SELECT {PgVectorTableSchemaEnums.TEXT.value} as text, '
+        f'1 - ({PgVectorTableSchemaEnums.VECTOR.value} {provider.get_distance_operator(collection)} :vector) as score '
+        f'FROM {COLLECTION_NAME} '
+        'ORDER BY score DESC '
+        'LIMIT :limit'
+    )
+
+
+async def explain(provider: PGVectorProvider, search_sql, params: dict) -> list:
+    async with provider.db_client() as session:
+        async with session.begin():
+            await provider.set_search_params(session, limit=params["limit"],
+                                             collection=await provider.get_collection(COLLECTION_NAME))
+            result = await session.execute(sql_text(f"EXPLAIN (FORMAT JSON) {search_sql.text}"), params)
+            plan = result.scalar_one()
+
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return find_index_scans(plan[0]["Plan"])
+
+
+async def time_queries(provider: PGVectorProvider, search_sql, vectors: list, limit: int) -> float:
+    start = time.perf_counter()
+    for vector in vectors:
+        async with provider.db_client() as session:
+            async with session.begin():
+                await provider.set_search_params(session, limit=limit,
+                                                 collection=await provider.get_collection(COLLECTION_NAME))
+                await session.execute(search_sql, {"vector": vector, "limit": limit})
+    return (time.perf_counter() - start) * 1000 / len(vectors)
+
+
+async def check(db_client, args, distance_method: str, index_type: str, vectors: np.ndarray) -> bool:
+    provider = PGVectorProvider(db_client=db_client, default_vector_size=args.dimension,
+                                distance_method=distance_method, index_threshold=0)
+
+    await provider.create_collection(collection_name=COLLECTION_NAME, embedding_size=args.dimension, do_reset=True)
+    await provider.insert_many(
+        collection_name=COLLECTION_NAME,
+        texts=[f"text {i}" for i in range(len(vectors))],
+        vectors=vectors.tolist(),
+        record_ids=[None] * len(vectors)
+    )
+    await provider.create_vector_index(collection_name=COLLECTION_NAME, index_type=index_type)
+    await provider.disconnect()
+    async with provider.db_client() as session:
+        async with session.begin():
+            await session.execute(sql_text(f"ANALYZE {COLLECTION_NAME}"))
+
+    rng = np.random.default_rng(args.seed + 1)
+    queries = ["[" + ",".join(str(v) for v in q) + "]" for q in rng.standard_normal((args.queries, args.dimension))]
+    params = {"vector": queries[0], "limit": args.limit}
+    index_name = provider.default_index_name(collection_name=COLLECTION_NAME)
+
+    collection = await provider.get_collection(collection_name=COLLECTION_NAME)
+    index_scans = await explain(provider, provider.get_search_sql(collection), params)
+    legacy_index_scans = await explain(provider, get_legacy_search_sql(provider, collection), params)
+
+    search_ms = await time_queries(provider, provider.get_search_sql(collection), queries, args.limit)
+    legacy_ms = await time_queries(provider, get_legacy_search_sql(provider, collection), queries, args.limit)
+
+    uses_index = index_name in index_scans
+    print(f"{distance_method:>6} {index_type:>7} {collection.collection_index_params}: "
+          f"search {'uses' if uses_index else 'DOES NOT use'} {index_name} "
+          f"({search_ms:.2f} ms/query), previous query {'uses' if legacy_index_scans else 'scans the table'} "
+          f"({legacy_ms:.2f} ms/query)")
+
+    return uses_index
+
+
+async def main(args):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+    db_engine = create_async_engine(postgres_conn)
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    vectors = np.random.default_rng(args.seed).standard_normal((args.rows, args.dimension)).astype(np.float32)
+
+    passed = True
+    try:
+        for distance_method in (DistanceMethodEnums.COSINE.value, DistanceMethodEnums.DOT.value):
+            for index_type in (PgVectorIndexTypeEnums.HNSW.value, PgVectorIndexTypeEnums.IVFFLAT.value):
+                passed &= await check(db_client, args, distance_method, index_type, vectors)
+    finally:
+        async with db_engine.begin() as connection:
+            await connection.execute(sql_text(f"DROP TABLE IF EXISTS {COLLECTION_NAME}"))
+            await connection.execute(sql_text("DELETE FROM vector_collections WHERE collection_name = :name"),
+                                     {"name": COLLECTION_NAME})
+        await db_engine.dispose()
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,104 @@
+"""
+Bulk load of a pgvector collection through `PGVectorProvider.insert_many`, with the
+vectors sent as text literals in INSERTs against binary COPY.
+
+Each mode loads the same rows into a fresh collection (no vector index, so only the
+load is measured) and reports rows/sec with the CPU time of this process and, when
+Postgres runs on the same machine, of the server backend. Run it from `src/`:
+
+    python -m benchmarks.pgvector_insert_bench --rows 20000 --dimension 1536
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text as sql_text
+
+from helpers.config import get_settings
+from stores.vectordb.VectorDBEnums import PgVectorInsertModeEnums
+from stores.vectordb.providers import PGVectorProvider
+
+
+COLLECTION_NAME = "pgvector_insert_bench"
+
+
+def get_backend_cpu_seconds(backend_pid: int) -> float:
+    # utime + stime of the backend, only readable when the server is local
+    try:
+        with open(f"/proc/{backend_pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def run_mode(db_client, args, mode: str, texts: list, vectors: list, metadata: list):
+    provider = PGVectorProvider(db_client=db_client, default_vector_size=args.dimension,
+                                index_threshold=len(texts) + 1, insert_mode=mode,
+                                insert_batch_size=args.batch_size)
+    await provider.create_collection(collection_name=COLLECTION_NAME, embedding_size=args.dimension, do_reset=True)
+
+    # a single pooled connection, so one backend does all the work
+    async with db_client() as session:
+        result = await session.execute(sql_text("SELECT pg_backend_pid()"))
+        backend_pid = result.scalar_one()
+
+    backend_cpu_start = get_backend_cpu_seconds(backend_pid)
+    cpu_start, start = time.process_time(), time.perf_counter()
+
+    for i in range(0, len(texts), args.page_size):
+        await provider.insert_many(
+            collection_name=COLLECTION_NAME,
+            texts=texts[i:i + args.page_size],
+            vectors=vectors[i:i + args.page_size],
+            metadata=metadata[i:i + args.page_size],
+            record_ids=[None] * len(texts[i:i + args.page_size])
+        )
+
+    elapsed = time.perf_counter() - start
+    cpu_seconds = time.process_time() - cpu_start
+    backend_cpu_end = get_backend_cpu_seconds(backend_pid)
+    backend_cpu = f"{backend_cpu_end - backend_cpu_start:.2f}s" if backend_cpu_start is not None else "n/a"
+
+    info = await provider.get_collection_info(collection_name=COLLECTION_NAME)
+    await provider.disconnect()
+    print(f"{mode:>6}: {info['record_count']} rows in {elapsed:.2f}s, {len(texts) / elapsed:,.0f} rows/sec, "
+          f"client cpu {cpu_seconds:.2f}s, server cpu {backend_cpu}")
+
+
+async def main(args):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+    db_engine = create_async_engine(postgres_conn, pool_size=1, max_overflow=0)
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    rng = np.random.default_rng(args.seed)
+    # float lists, as the embedding providers return them
+    vectors = rng.standard_normal((args.rows, args.dimension)).astype(np.float32).tolist()
+    texts = [f"chunk text {i} " * 40 for i in range(args.rows)]
+    metadata = [{"page": i % 50, "source": f"file_{i % 20}.pdf"} for i in range(args.rows)]
+
+    try:
+        for mode in args.modes.split(","):
+            await run_mode(db_client, args, mode, texts, vectors, metadata)
+    finally:
+        async with db_engine.begin() as connection:
+            await connection.execute(sql_text(f"DROP TABLE IF EXISTS {COLLECTION_NAME}"))
+            await connection.execute(sql_text("DELETE FROM vector_collections WHERE collection_name = :name"),
+                                     {"name": COLLECTION_NAME})
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--page-size", type=int, default=1000, help="rows per insert_many call")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per transaction")
+    parser.add_argument("--modes", default=",".join(m.value for m in PgVectorInsertModeEnums))
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,159 @@
+"""
+Recall and latency of `PGVectorProvider.search_by_vector` for each storage mode of a
+collection: `vector`, `halfvec` and `bit` with exact re-ranking, at several `ef_search`
+and re-rank factors, with the table and index sizes.
+
+Recall is against the exact top `limit` computed with numpy. The vectors are clustered
+like text embeddings, or loaded from a `.npy` file of real ones with `--vectors`. It
+creates throwaway collections in the database of the local `.env` and drops them at the
+end. Run it from `src/`:
+
+    python -m benchmarks.pgvector_quantization_bench --rows 20000 --dimension 768
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text as sql_text
+
+from helpers.config import get_settings
+from stores.vectordb.VectorDBEnums import DistanceMethodEnums, PgVectorStorageModeEnums
+from stores.vectordb.providers import PGVectorProvider
+
+
+COLLECTION_PREFIX = "pgvector_quantization_bench"
+
+
+def get_vectors(args) -> np.ndarray:
+    rng = np.random.default_rng(args.seed)
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        # points around topic centers, with a shared offset like real embedding models have
+        centers = rng.standard_normal((args.clusters, args.dimension))
+        offset = rng.standard_normal(args.dimension) * 0.5
+        vectors = (centers[rng.integers(0, args.clusters, args.rows + args.queries)]
+                   + rng.standard_normal((args.rows + args.queries, args.dimension)) * args.noise + offset)
+
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def get_exact_neighbors(vectors: np.ndarray, queries: np.ndarray, limit: int) -> list:
+    # normalized vectors: cosine and inner product give the same order
+    scores = queries @ vectors.T
+    return [set(row) for row in np.argsort(-scores, axis=1)[:, :limit]]
+
+
+async def get_sizes_mb(db_client, collection_name: str) -> tuple:
+    async with db_client() as session:
+        result = await session.execute(sql_text(
+            "SELECT pg_table_size(:name), pg_indexes_size(:name)"
+        ), {"name": collection_name})
+        table_bytes, index_bytes = result.fetchone()
+    return table_bytes / 2 ** 20, index_bytes / 2 ** 20
+
+
+async def run_searches(provider: PGVectorProvider, collection_name: str, queries: np.ndarray,
+                       neighbors: list, limit: int, **search_params) -> tuple:
+    latencies, recalls = [], []
+    for query, expected in zip(queries.tolist(), neighbors):
+        start = time.perf_counter()
+        results = await provider.search_by_vector(collection_name=collection_name, vector=query,
+                                                  limit=limit, **search_params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(result.text) for result in results or []}
+        recalls.append(len(found & expected) / limit)
+
+    return float(np.mean(recalls)), float(np.mean(latencies)), float(np.percentile(latencies, 95))
+
+
+async def run_mode(db_client, args, storage_mode: str, vectors: np.ndarray, queries: np.ndarray, neighbors: list):
+    collection_name = f"{COLLECTION_PREFIX}_{storage_mode}"
+    provider = PGVectorProvider(db_client=db_client, default_vector_size=vectors.shape[1],
+                                distance_method=args.distance, index_threshold=0, storage_mode=storage_mode)
+
+    await provider.create_collection(collection_name=collection_name, embedding_size=vectors.shape[1],
+                                     do_reset=True)
+    collection = await provider.get_collection(collection_name=collection_name)
+    if collection.collection_storage != storage_mode:
+        print(f"{storage_mode:>7}: not supported by pgvector {'.'.join(map(str, provider.pgvector_version))}, skipped")
+        await provider.delete_collection(collection_name=collection_name)
+        return
+
+    start = time.perf_counter()
+    await provider.insert_many(collection_name=collection_name, texts=[str(i) for i in range(len(vectors))],
+                               vectors=vectors, record_ids=[None] * len(vectors))
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    is_indexed = await provider.create_vector_index(collection_name=collection_name, index_type=args.index_type)
+    index_seconds = time.perf_counter() - start
+    await provider.disconnect()
+
+    async with db_client() as session:
+        async with session.begin():
+            await session.execute(sql_text(f"ANALYZE {collection_name}"))
+
+    table_mb, index_mb = await get_sizes_mb(db_client, collection_name)
+    print(f"{storage_mode:>7}: loaded in {load_seconds:.1f}s, "
+          f"{args.index_type + ' index' if is_indexed else 'no index'} built in {index_seconds:.1f}s, "
+          f"table {table_mb:.1f} MB, index {index_mb:.1f} MB")
+
+    if storage_mode == PgVectorStorageModeEnums.BIT.value:
+        settings = [{"rerank_factor": factor} for factor in args.rerank_factors]
+    else:
+        settings = [{"ef_search": ef_search} for ef_search in args.ef_search]
+
+    for search_params in settings:
+        recall, mean_ms, p95_ms = await run_searches(provider, collection_name, queries, neighbors,
+                                                     args.limit, **search_params)
+        setting = ", ".join(f"{k}={v}" for k, v in search_params.items())
+        print(f"{'':>9}{setting:<18} recall@{args.limit} {recall:.3f}  mean {mean_ms:.2f} ms  p95 {p95_ms:.2f} ms")
+
+    await provider.delete_collection(collection_name=collection_name)
+
+
+async def main(args):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+    db_engine = create_async_engine(postgres_conn)
+    db_client = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    vectors = get_vectors(args)
+    # queries are held out of the collection
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+    neighbors = get_exact_neighbors(vectors, queries, args.limit)
+    print(f"{len(vectors)} vectors of {vectors.shape[1]} dimensions, {len(queries)} queries, "
+          f"{args.distance} distance")
+
+    try:
+        for storage_mode in args.modes.split(","):
+            await run_mode(db_client, args, storage_mode, vectors, queries, neighbors)
+    finally:
+        async with db_engine.begin() as connection:
+            for storage_mode in args.modes.split(","):
+                await connection.execute(sql_text(f"DROP TABLE IF EXISTS {COLLECTION_PREFIX}_{storage_mode}"))
+                await connection.execute(sql_text("DELETE FROM vector_collections WHERE collection_name = :name"),
+                                         {"name": f"{COLLECTION_PREFIX}_{storage_mode}"})
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--vectors", default=None, help=".npy file of embeddings, queries are its last rows")
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.6)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--distance", default=DistanceMethodEnums.COSINE.value)
+    parser.add_argument("--index-type", default="hnsw")
+    parser.add_argument("--modes", default="vector,halfvec,bit")
+    parser.add_argument("--ef-search", type=lambda v: [int(x) for x in v.split(",")], default=[40, 100, 200])
+    parser.add_argument("--rerank-factors", type=lambda v: [int(x) for x in v.split(",")], default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,357 @@
+"""
+End-to-end load test of the RAG API: upload, process, push, search and answer.
+
+The app is started as a subprocess (`uvicorn main:app`) with the database and vector
+database of the local `.env` (Postgres/pgvector, or Qdrant in local mode with
+`--vectordb QDRANT`). Generation and embedding go to the local OpenAI stand-in from
+`benchmarks.stand_in_llm` with the configured latency, or with `--llm local` to the
+in-process LOCAL backend, so no outside service is called.
+
+The corpus is uploaded to a fresh project, processed and pushed, then a mix of search
+and answer requests is replayed at the target concurrency. Latency percentiles and
+throughput per endpoint are printed and saved as JSON so runs can be compared. Run it
+from `src/` with the migrations applied:
+
+    python -m benchmarks.rag_load_test --docs 20 --queries 500 --concurrency 16
+
+The project rows, files and pgvector collection are deleted at the end unless
+`--keep-data` is given; a Qdrant local collection is left in the database path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text as sql_text
+
+from benchmarks.stand_in_llm import StandInConfig, StandInState, serve_stand_in
+from controllers.ProjectController import ProjectController
+from helpers.config import get_settings
+
+
+SYLLABLES = "ka lo mi ne ru sa te vo zu pa di ge".split()
+CONTENT_TYPES = {".txt": "text/plain", ".pdf": "application/pdf"}
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.phases = {}
+
+    def record(self, endpoint: str, started_at: float, ok: bool = True):
+        if ok:
+            self.latencies[endpoint].append(time.perf_counter() - started_at)
+        else:
+            self.errors[endpoint] += 1
+
+    def summary(self) -> dict:
+        summary = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            latencies = np.array(self.latencies[endpoint]) * 1000
+            phase_seconds = self.phases.get(endpoint)
+            summary[endpoint] = {
+                "requests": len(latencies) + self.errors[endpoint],
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(latencies) / phase_seconds, 2) if phase_seconds else None,
+                "latency_ms": {
+                    "p50": round(float(np.percentile(latencies, 50)), 2),
+                    "p95": round(float(np.percentile(latencies, 95)), 2),
+                    "p99": round(float(np.percentile(latencies, 99)), 2),
+                    "mean": round(float(latencies.mean()), 2),
+                    "max": round(float(latencies.max()), 2),
+                } if len(latencies) else None,
+            }
+        return summary
+
+
+def make_corpus(args) -> list:
+    """
+    :return: `[(file_name, content, content_type)]`
+    """
+    if args.corpus:
+        corpus = []
+        for file_name in sorted(os.listdir(args.corpus)):
+            content_type = CONTENT_TYPES.get(os.path.splitext(file_name)[1].lower())
+            if content_type:
+                with open(os.path.join(args.corpus, file_name), "rb") as f:
+                    corpus.append((file_name, f.read(), content_type))
+        return corpus
+
+    # made-up words, so searches match on shared words like in a real corpus
+    rng = random.Random(args.seed)
+    vocabulary = ["".join(rng.choices(SYLLABLES, k=rng.randint(1, 3))) for _ in range(2000)]
+
+    corpus = []
+    for i in range(args.docs):
+        paragraphs, size = [], 0
+        while size < args.doc_kb * 1024:
+            sentences = [" ".join(rng.choices(vocabulary, k=rng.randint(6, 18))).capitalize() + "."
+                         for _ in range(rng.randint(2, 6))]
+            paragraphs.append(" ".join(sentences))
+            size += len(paragraphs[-1]) + 2
+        corpus.append((f"load_test_{i}.txt", "\n\n".join(paragraphs).encode("utf-8"), "text/plain"))
+    return corpus
+
+
+def make_queries(args, corpus: list) -> list:
+    """
+    Word windows taken from the text files of the corpus, tagged `search` or `answer`.
+    """
+    rng = random.Random(args.seed)
+    words = [w for _, content, content_type in corpus if content_type == "text/plain"
+             for w in content.decode("utf-8", errors="ignore").split()]
+    if not words:
+        words = SYLLABLES
+
+    queries = []
+    for _ in range(args.queries):
+        start = rng.randrange(max(1, len(words) - 8))
+        endpoint = "answer" if rng.random() < args.answer_ratio else "search"
+        queries.append((endpoint, " ".join(words[start:start + rng.randint(3, 8)])))
+    return queries
+
+
+def start_app(args, llm_base_url: str, log_file) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "VECTOR_DB_BACKEND": args.vectordb,
+        "EMBEDDING_MODEL_SIZE": str(args.embedding_size),
+        "EMBEDDING_CACHE_ENABLED": str(args.embedding_cache),
+        "LOCAL_GENERATION_LATENCY_MS": str(args.llm_latency_ms),
+        "LOCAL_GENERATION_TOKEN_LATENCY_MS": str(args.llm_token_latency_ms),
+        "PYTHONUNBUFFERED": "1",
+    })
+
+    if args.llm == "local":
+        env.update({"GENERATION_BACKEND": "LOCAL", "EMBEDDING_BACKEND": "LOCAL",
+                    "GENERATION_MODEL_ID": "local-echo", "EMBEDDING_MODEL_ID": "local-hash"})
+    else:
+        env.update({"GENERATION_BACKEND": "OPENAI", "EMBEDDING_BACKEND": "OPENAI",
+                    "OPENAI_API_KEY": "stand-in", "OPENAI_API_URL": llm_base_url,
+                    "GENERATION_MODEL_ID": "stand-in-chat", "EMBEDDING_MODEL_ID": "stand-in-embedding"})
+
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.app_port)],
+        env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_for_app(client: httpx.AsyncClient, app_process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if app_process.poll() is not None:
+            raise RuntimeError("the app exited during startup")
+        try:
+            response = await client.get("/api/v1/")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+
+    raise RuntimeError("the app did not start in time")
+
+
+async def run_concurrently(items: list, concurrency: int, run_one):
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            await run_one(queue.get_nowait())
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: int, poll_seconds: float = 0.2) -> str:
+    while True:
+        response = await client.get(f"/api/v1/jobs/{job_id}")
+        job_status = response.json()["job"]["job_status"]
+        if job_status not in ("pending", "running"):
+            return job_status
+        await asyncio.sleep(poll_seconds)
+
+
+async def run_job(client: httpx.AsyncClient, recorder: LatencyRecorder, endpoint: str, url: str, body: dict):
+    started_at = time.perf_counter()
+    response = await client.post(url, json=body)
+    recorder.record(endpoint, started_at, ok=response.status_code == 202)
+    if response.status_code != 202:
+        raise RuntimeError(f"{endpoint} was not accepted: {response.text}")
+
+    job_status = await wait_for_job(client, response.json()["job_id"])
+    recorder.record(f"{endpoint}_job", started_at, ok=job_status == "completed")
+    recorder.phases[f"{endpoint}_job"] = time.perf_counter() - started_at
+    if job_status != "completed":
+        raise RuntimeError(f"{endpoint} job {job_status}")
+
+
+async def run_load(args, client: httpx.AsyncClient, recorder: LatencyRecorder):
+    corpus = make_corpus(args)
+    queries = make_queries(args, corpus)
+    project_id = args.project_id
+
+    # upload
+    async def upload(document):
+        file_name, content, content_type = document
+        started_at = time.perf_counter()
+        response = await client.post(f"/api/v1/data/upload/{project_id}",
+                                     files={"file": (file_name, content, content_type)})
+        recorder.record("upload", started_at, ok=response.status_code == 200)
+
+    started_at = time.perf_counter()
+    await run_concurrently(corpus, args.concurrency, upload)
+    recorder.phases["upload"] = time.perf_counter() - started_at
+
+    # process and push run as jobs, their duration is measured until the job completes
+    await run_job(client, recorder, "process", f"/api/v1/data/process/{project_id}", {
+        "chunk_size": args.chunk_size, "overlap_size": args.overlap_size, "do_reset": 1
+    })
+    await run_job(client, recorder, "push", f"/api/v1/nlp/index/push/{project_id}", {"do_reset": 1})
+
+    # search and answer mix
+    async def query(item):
+        endpoint, text = item
+        url = f"/api/v1/nlp/index/{endpoint}/{project_id}"
+        body = {"text": text, "limit": args.limit}
+        started_at = time.perf_counter()
+
+        if endpoint == "answer" and args.stream:
+            body["stream"] = True
+            ok = False
+            async with client.stream("POST", url, json=body) as response:
+                async for line in response.aiter_lines():
+                    event = json.loads(line)
+                    if event["type"] == "token" and not ok:
+                        recorder.record("answer_first_token", started_at)
+                        ok = True
+                    elif event["type"] == "error":
+                        ok = False
+                        break
+            recorder.record(endpoint, started_at, ok=ok)
+            return
+
+        response = await client.post(url, json=body)
+        recorder.record(endpoint, started_at, ok=response.status_code == 200)
+
+    started_at = time.perf_counter()
+    await run_concurrently(queries, args.concurrency, query)
+    for endpoint in ("search", "answer", "answer_first_token"):
+        recorder.phases[endpoint] = time.perf_counter() - started_at
+
+
+async def delete_project_data(args):
+    settings = get_settings()
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+    db_engine = create_async_engine(postgres_conn)
+
+    async with db_engine.begin() as connection:
+        if args.vectordb == "PGVECTOR":
+            collection_name = f"collection_{args.embedding_size}_{args.project_id}"
+            await connection.execute(sql_text(f"DROP TABLE IF EXISTS {collection_name}"))
+            await connection.execute(sql_text("DELETE FROM vector_collections WHERE collection_name = :name"),
+                                     {"name": collection_name})
+        for table, column in (("jobs", "job_project_id"), ("chunks", "chunk_project_id"),
+                              ("assets", "asset_project_id"), ("projects", "project_id")):
+            await connection.execute(sql_text(f"DELETE FROM {table} WHERE {column} = :p"), {"p": args.project_id})
+    await db_engine.dispose()
+
+    shutil.rmtree(ProjectController().get_project_path(args.project_id), ignore_errors=True)
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary: dict):
+    print(f"{'endpoint':<20}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in summary.items():
+        latency = stats["latency_ms"] or {}
+        print(f"{endpoint:<20}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps'] or '':>9}"
+              f"{latency.get('p50', ''):>10}{latency.get('p95', ''):>10}{latency.get('p99', ''):>10}")
+
+
+async def main(args):
+    recorder = LatencyRecorder()
+    stand_in = StandInState(StandInConfig(
+        embedding_size=args.embedding_size,
+        latency_ms=args.llm_latency_ms,
+        token_latency_ms=args.llm_token_latency_ms,
+    ))
+
+    log_file = tempfile.NamedTemporaryFile(prefix="rag_load_test_app_", suffix=".log", delete=False)
+    started_at = datetime.now(timezone.utc)
+
+    async with serve_stand_in(stand_in) as llm_base_url:
+        app_process = start_app(args, llm_base_url, log_file)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.app_port}", timeout=300,
+                                         limits=httpx.Limits(max_connections=args.concurrency)) as client:
+                await wait_for_app(client, app_process)
+                await run_load(args, client, recorder)
+        except Exception:
+            print(f"load test failed, app log: {log_file.name}")
+            raise
+        finally:
+            app_process.terminate()
+            app_process.wait(timeout=30)
+            if not args.keep_data:
+                await delete_project_data(args)
+
+    summary = recorder.summary()
+    print_summary(summary)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": get_git_commit(),
+        "config": vars(args),
+        "endpoints": summary,
+    }
+    output = args.output or os.path.join("benchmarks", "results",
+                                         f"rag_load_test_{started_at.strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None, help="directory of .txt/.pdf files, synthetic documents if not set")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--doc-kb", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap-size", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--answer-ratio", type=float, default=0.2)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="stream the answers and measure the first token")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm", choices=["stand-in", "local"], default="stand-in")
+    parser.add_argument("--llm-latency-ms", type=float, default=30)
+    parser.add_argument("--llm-token-latency-ms", type=float, default=2)
+    parser.add_argument("--embedding-size", type=int, default=384)
+    parser.add_argument("--embedding-cache", action="store_true", help="keep the app embedding cache on")
+    parser.add_argument("--vectordb", choices=["PGVECTOR", "QDRANT"], default="PGVECTOR")
+    parser.add_argument("--project-id", type=int, default=int(time.time()) % 1000000000)
+    parser.add_argument("--app-port", type=int, default=8071)
+    parser.add_argument("--keep-data", action="store_true")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""
+Throughput of `TextSplitter` against the previous `process_simpler_splitter`.
+
+Run it from `src/`:
+
+    python -m benchmarks.splitter_bench --sizes-mb 1,4,16 --chunk-size 1000
+"""
+import argparse
+import random
+import time
+
+from helpers.text_splitter import TextSplitter
+
+
+WORDS = ("retrieval augmented generation grounds answers in indexed documents "
+         "chunks are embedded and stored in a vector database for semantic search").split()
+
+
+def make_text(size_mb: int, seed: int = 7) -> str:
+    # paragraphs of lines of sentences, with a few very long lines like extracted PDF pages
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + "."
+                     for _ in range(rng.randint(1, 40))]
+        line = " ".join(sentences)
+        parts.append(line)
+        parts.append("\n\n" if rng.random() < 0.2 else "\n")
+        size += len(line) + 1
+    return "".join(parts)
+
+
+def legacy_simpler_splitter(texts, chunk_size, splitter_tag="\n"):
+    # the splitter this engine replaces, kept here as the baseline
+    full_text = " ".join(texts)
+    lines = [doc.strip() for doc in full_text.split(splitter_tag) if len(doc.strip()) > 1]
+
+    chunks = []
+    current_chunk = ""
+    for line in lines:
+        current_chunk += line + splitter_tag
+        if len(current_chunk) > chunk_size:
+            chunks.append(current_chunk.strip())
+            current_chunk = ""
+
+    if len(current_chunk) >= 0:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+
+def run_text_splitter(text, chunk_size, overlap_size, page_size=4096):
+    # fed in page-sized pieces, like the process job does
+    text_splitter = TextSplitter(chunk_size=chunk_size, overlap_size=overlap_size)
+    chunks = []
+    for start in range(0, len(text), page_size):
+        chunks.extend(text_splitter.feed(text[start:start + page_size], page=start // page_size, offset=start))
+    chunks.extend(text_splitter.flush())
+    return chunks
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="1,4,16")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap-size", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'splitter':<16} {'size_mb':>8} {'chunks':>9} {'max_len':>8} {'seconds':>8} {'mb_per_s':>9}")
+    for size_mb in [int(s) for s in args.sizes_mb.split(",")]:
+        text = make_text(size_mb)
+
+        legacy_chunks, legacy_seconds = timed(legacy_simpler_splitter, [text], args.chunk_size)
+        new_chunks, new_seconds = timed(run_text_splitter, text, args.chunk_size, args.overlap_size)
+
+        rows = [
+            ("simpler_splitter", len(legacy_chunks), max(map(len, legacy_chunks)), legacy_seconds),
+            ("text_splitter", len(new_chunks), max(len(c) for c, _ in new_chunks), new_seconds),
+        ]
+        for name, chunks_count, max_len, seconds in rows:
+            print(f"{name:<16} {size_mb:>8} {chunks_count:>9} {max_len:>8} {seconds:>8.2f} {size_mb / seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
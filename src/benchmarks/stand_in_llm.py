@@ -0,0 +1,192 @@
+"""
+Local stand-in of the OpenAI embeddings and chat completions APIs for the benchmarks.
+
+Latency, request limits, a tokens-per-minute budget and random 5xx answers are
+configurable. Embeddings are the hashed n-grams of `LocalProvider`, so search results
+still follow word overlap, and chat completions echo the last user message, streamed
+or not. Tokens are counted as about four characters each.
+"""
+import asyncio
+import base64
+import json
+import random
+import socket
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from stores.llm.providers import LocalProvider
+
+
+@dataclass
+class StandInConfig:
+    embedding_size: int = 384
+    latency_ms: float = 30
+    token_latency_ms: float = 0
+    max_items: int = 2048
+    max_request_tokens: int = 300000
+    # 0 disables the budget
+    tokens_per_minute: int = 0
+    error_rate: float = 0
+    seed: int = 7
+
+
+class StandInState:
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.reset()
+
+    def reset(self):
+        # every run starts with a full budget
+        self.tokens = float(self.config.tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self.calls = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.rejected = 0
+
+    def spend(self, tokens: int) -> float:
+        """
+        Take `tokens` from the budget, or return the seconds to wait for them.
+        """
+        if not self.config.tokens_per_minute:
+            return 0
+
+        rate = self.config.tokens_per_minute / 60
+        now = time.monotonic()
+        self.tokens = min(self.config.tokens_per_minute, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+        if tokens > self.tokens:
+            return (tokens - self.tokens) / rate
+
+        self.tokens -= tokens
+        return 0
+
+
+def count_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def create_stand_in_app(state: StandInState) -> FastAPI:
+    config = state.config
+    app = FastAPI()
+    rng = random.Random(config.seed)
+
+    embedder = LocalProvider()
+    embedder.set_embedding_model(model_id="stand-in-embedding", embedding_size=config.embedding_size)
+
+    def error(status_code: int, message: str, headers: dict = None):
+        return JSONResponse(status_code=status_code, headers=headers,
+                            content={"error": {"message": message, "type": "requests", "code": None}})
+
+    async def check_limits(items: int, tokens: int):
+        state.calls += 1
+        await asyncio.sleep(config.latency_ms / 1000)
+
+        if items > config.max_items or tokens > config.max_request_tokens:
+            state.rejected += 1
+            return error(400, f"{items} inputs, {tokens} tokens over the request limits")
+
+        if rng.random() < config.error_rate:
+            state.server_errors += 1
+            return error(503, "stand-in server error")
+
+        retry_after = state.spend(tokens)
+        if retry_after:
+            state.throttled += 1
+            return error(429, "rate limit reached for tokens per minute",
+                         headers={"retry-after-ms": str(int(retry_after * 1000))})
+
+        return None
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = [body["input"]] if isinstance(body["input"], str) else body["input"]
+        tokens = sum(count_tokens(t) for t in texts)
+
+        failed = await check_limits(items=len(texts), tokens=tokens)
+        if failed:
+            return failed
+
+        data = []
+        for i, vector in enumerate(embedder.hash_embeddings(texts)):
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(vector.astype("<f4").tobytes()).decode()
+            else:
+                vector = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+
+        return {"object": "list", "model": body["model"], "data": data,
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+
+        failed = await check_limits(items=1, tokens=count_tokens(prompt))
+        if failed:
+            return failed
+
+        words = embedder.get_echo_words(prompt=prompt, max_output_tokens=body.get("max_tokens") or 200)
+
+        def chunk(delta: dict, finish_reason: str = None) -> str:
+            return "data: " + json.dumps({
+                "id": "stand-in", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n"
+
+        if body.get("stream"):
+            async def stream():
+                for word in words:
+                    await asyncio.sleep(config.token_latency_ms / 1000)
+                    yield chunk({"content": word})
+                yield chunk({}, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(config.token_latency_ms * len(words) / 1000)
+        return {
+            "id": "stand-in", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "".join(words)}}],
+            "usage": {"prompt_tokens": count_tokens(prompt), "completion_tokens": len(words),
+                      "total_tokens": count_tokens(prompt) + len(words)}
+        }
+
+    return app
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def serve_stand_in(state: StandInState):
+    """
+    Run the stand-in on a free local port in the current event loop.
+
+    :return: The base url to give the OpenAI client, e.g. `http://127.0.0.1:port/v1`.
+    """
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(create_stand_in_app(state), host="127.0.0.1",
+                                           port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        await server_task
@@ -0,0 +1,119 @@
+"""
+Peak memory of the page-by-page process pipeline against the old whole-document one.
+
+Each run happens in a fresh interpreter so `ru_maxrss` only covers that run.
+Run it from `src/` with the app `.env` in place:
+
+    python -m benchmarks.streaming_memory_bench --sizes-mb 50,100,500
+    python -m benchmarks.streaming_memory_bench --sizes-mb 50,100 --legacy
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+LINE = "Retrieval augmented generation keeps the answer grounded in the indexed documents.\n"
+
+
+def make_text_file(path: str, size_mb: int):
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024:
+        return
+
+    block = LINE * (1024 * 1024 // len(LINE) + 1)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def run_streaming(file_path: str, chunk_size: int, slice_size: int) -> int:
+    from controllers.ProcessController import ProcessController
+
+    process_controller = ProcessController(project_id=None, project_path=os.path.dirname(file_path))
+    file_id = os.path.basename(file_path)
+
+    chunks_count = 0
+    cursor = None
+    while True:
+        chunks, cursor = process_controller.process_file_slice(
+            file_id=file_id,
+            chunk_size=chunk_size,
+            cursor=cursor,
+            slice_size=slice_size
+        )
+        # the process job inserts each batch and drops it
+        chunks_count += len(chunks)
+        if cursor is None:
+            return chunks_count
+
+
+def run_legacy(file_path: str, chunk_size: int) -> int:
+    # the previous pipeline: whole document, joined into one string, then split
+    with open(file_path, encoding="utf-8") as f:
+        texts = [f.read()]
+
+    full_text = " ".join(texts)
+    lines = [doc.strip() for doc in full_text.split("\n") if len(doc.strip()) > 1]
+
+    chunks = []
+    current_chunk = ""
+    for line in lines:
+        current_chunk += line + "\n"
+        if len(current_chunk) > chunk_size:
+            chunks.append(current_chunk.strip())
+            current_chunk = ""
+    chunks.append(current_chunk.strip())
+
+    return len(chunks)
+
+
+def child(args):
+    start = time.perf_counter()
+    if args.run == "legacy":
+        chunks_count = run_legacy(args.file, args.chunk_size)
+    else:
+        chunks_count = run_streaming(args.file, args.chunk_size, args.slice_size)
+    elapsed = time.perf_counter() - start
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{chunks_count} {elapsed:.2f} {peak_rss_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="500")
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--slice-size", type=int, default=1048576)
+    parser.add_argument("--legacy", action="store_true", help="also run the whole-document pipeline")
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    parser.add_argument("--run", choices=["streaming", "legacy"], help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return child(args)
+
+    modes = ["streaming", "legacy"] if args.legacy else ["streaming"]
+
+    print(f"{'mode':<10} {'size_mb':>8} {'chunks':>10} {'seconds':>8} {'peak_rss_mb':>12}")
+    for size_mb in [int(s) for s in args.sizes_mb.split(",")]:
+        file_path = os.path.join(args.workdir, f"minirag_bench_{size_mb}mb.txt")
+        make_text_file(file_path, size_mb)
+
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.streaming_memory_bench",
+                 "--run", mode, "--file", file_path,
+                 "--chunk-size", str(args.chunk_size), "--slice-size", str(args.slice_size)],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+
+            chunks_count, elapsed, peak_rss_mb = output[-3:]
+            print(f"{mode:<10} {size_mb:>8} {chunks_count:>10} {elapsed:>8} {peak_rss_mb:>12}")
+
+
+if __name__ == "__main__":
+    main()
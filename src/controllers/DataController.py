@@ -4,6 +4,9 @@ from models import ResponseSignal
 from .ProjectController import ProjectController
 import re
 import os
+import hashlib
+import aiofiles
+from typing import Tuple
 
 class DataController(BaseController):
 
@@ -52,6 +55,49 @@ class DataController(BaseController):
         cleaned_filename = cleaned_filename.replace(' ', '_')
 
         return cleaned_filename
+
+    async def write_uploaded_file(self, file: UploadFile, file_path: str) -> Tuple[int, str]:
+        """
+        Stream the uploaded file to disk and hash it on the way.
+
+        :return: `(file_size, file_hash)`, the hash is the SHA-256 hex digest of the content.
+        """
+        file_hash = hashlib.sha256()
+        file_size = 0
+
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(chunk)
+                file_size += len(chunk)
+                await f.write(chunk)
+
+        return file_size, file_hash.hexdigest()
+
+    def reuse_stored_file(self, source_path: str, file_path: str) -> bool:
+        """
+        Replace `file_path` by a hard link to `source_path`, a file with the same content,
+        so the bytes are stored once. The uploaded copy is kept if linking is not possible.
+        """
+        if not os.path.exists(source_path):
+            return False
+
+        # already linked by an earlier attempt to register the upload
+        if os.path.exists(file_path) and os.path.samefile(source_path, file_path):
+            return True
+
+        # a name of its own, concurrent attempts do not share the temporary link
+        temp_path = f"{file_path}.{self.generate_random_string(8)}.link"
+        try:
+            os.link(source_path, temp_path)
+            os.replace(temp_path, file_path)
+        except OSError:
+            return False
+        finally:
+            # rename does nothing when both names are already links to the same file
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+
+        return True
     
 
 
@@ -0,0 +1,596 @@
+from .BaseController import BaseController
+from .NLPController import NLPController
+from .ProcessController import ProcessController
+from models import ResponseSignal
+from models.JobModel import JobModel
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.db_schemes import Job
+from models.enums.JobEnums import JobTypeEnum, JobStatusEnum
+from models.enums.AssetTypeEnum import AssetTypeEnum
+from helpers.text_splitter import get_text_hash
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class JobFailedError(Exception):
+    def __init__(self, signal: ResponseSignal):
+        super().__init__(signal.value)
+        self.signal = signal
+
+
+@dataclass
+class StageStats:
+    pages: int = 0
+    chunks: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "chunks_per_busy_second": round(self.chunks / max(self.busy_seconds, 1e-6), 3),
+        }
+
+
+@dataclass
+class JobProgress:
+    files_total: int = 0
+    files_processed: int = 0
+    chunks_total: int = 0
+    chunks_inserted: int = 0
+    chunks_kept: int = 0
+    chunks_deleted: int = 0
+    vectors_inserted: int = 0
+    stages: dict = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
+    reported_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "files_total": self.files_total,
+            "files_processed": self.files_processed,
+            "chunks_total": self.chunks_total,
+            "chunks_inserted": self.chunks_inserted,
+            "chunks_kept": self.chunks_kept,
+            "chunks_deleted": self.chunks_deleted,
+            "vectors_inserted": self.vectors_inserted,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(self.files_processed / elapsed, 3),
+            "chunks_per_second": round(self.chunks_inserted / elapsed, 3),
+            "vectors_per_second": round(self.vectors_inserted / elapsed, 3),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+        }
+
+
+class JobController(BaseController):
+    """
+    Runs the ingestion jobs (`/data/process` and `/nlp/index/push`) on a bounded pool of
+    asyncio workers. The queue itself is the `jobs` table, so jobs survive a restart and
+    several uvicorn workers can share it.
+    """
+
+    def __init__(self, db_client, process_executor, vectordb_client, generation_client,
+                 embedding_client, template_parser):
+        super().__init__()
+        self.db_client = db_client
+        self.process_executor = process_executor
+        self.vectordb_client = vectordb_client
+        self.generation_client = generation_client
+        self.embedding_client = embedding_client
+        self.template_parser = template_parser
+
+        self.workers_count = self.app_settings.JOB_WORKERS_COUNT
+        self.poll_interval = self.app_settings.JOB_POLL_INTERVAL_SECONDS
+        self.progress_interval = self.app_settings.JOB_PROGRESS_INTERVAL_SECONDS
+        self.stale_after = self.app_settings.JOB_STALE_AFTER_SECONDS
+
+        self.workers = []
+        self.running_jobs = {}
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+
+    async def start(self):
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+
+        requeued = await job_model.requeue_stale_jobs(stale_after_seconds=self.stale_after)
+        if requeued:
+            logger.info(f"Requeued {requeued} stale jobs")
+
+        self.stopping = False
+        self.workers = [
+            asyncio.create_task(self.worker_loop(worker_no=i))
+            for i in range(self.workers_count)
+        ]
+
+    async def stop(self):
+        self.stopping = True
+
+        # cancelled jobs put themselves back in the queue while `stopping` is set
+        running_jobs = list(self.running_jobs.values())
+        for task in running_jobs:
+            task.cancel()
+        await asyncio.gather(*running_jobs, return_exceptions=True)
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def submit(self, project_id: int, job_type: JobTypeEnum, job_config: dict) -> Job:
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+
+        job = await job_model.create_job(Job(
+            job_type=job_type.value,
+            job_status=JobStatusEnum.PENDING.value,
+            job_config=job_config,
+            job_progress=JobProgress().to_dict(),
+            job_project_id=project_id,
+        ))
+
+        self.wakeup.set()
+        return job
+
+    async def cancel(self, job_id: int) -> Job:
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+        job = await job_model.cancel_job(job_id=job_id)
+
+        # a job running in another process notices the cancellation on its next progress report
+        task = self.running_jobs.get(job_id)
+        if job is not None and task is not None:
+            task.cancel()
+
+        return job
+
+    async def worker_loop(self, worker_no: int):
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+
+        while not self.stopping:
+            try:
+                job = await job_model.claim_next_job()
+            except Exception as e:
+                logger.error(f"Job worker {worker_no} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+
+            logger.info(f"Job worker {worker_no} started job {job.job_id} ({job.job_type})")
+
+            task = asyncio.create_task(self.execute(job))
+            self.running_jobs[job.job_id] = task
+            try:
+                # asyncio.wait does not propagate the job task cancellation into the worker
+                await asyncio.wait({task})
+            finally:
+                self.running_jobs.pop(job.job_id, None)
+
+    async def execute(self, job: Job):
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+        progress = JobProgress()
+
+        try:
+            if job.job_type == JobTypeEnum.PROCESS.value:
+                result = await self.run_process_job(job=job, progress=progress)
+            elif job.job_type == JobTypeEnum.PUSH.value:
+                result = await self.run_push_job(job=job, progress=progress)
+            else:
+                raise ValueError(f"Unknown job type: {job.job_type}")
+
+        except (asyncio.CancelledError, JobCancelledError):
+            if self.stopping:
+                await job_model.requeue_jobs(job_ids=[job.job_id])
+                return
+            logger.info(f"Job {job.job_id} cancelled")
+            await job_model.finish_job(job_id=job.job_id,
+                                       job_status=JobStatusEnum.CANCELLED.value,
+                                       progress=progress.to_dict())
+            return
+
+        except JobFailedError as e:
+            logger.error(f"Job {job.job_id} failed: {e.signal.value}")
+            await job_model.finish_job(job_id=job.job_id,
+                                       job_status=JobStatusEnum.FAILED.value,
+                                       progress=progress.to_dict(),
+                                       error=e.signal.value)
+            return
+
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} failed: {e}")
+            await job_model.finish_job(job_id=job.job_id,
+                                       job_status=JobStatusEnum.FAILED.value,
+                                       progress=progress.to_dict(),
+                                       error=str(e))
+            return
+
+        final_progress = progress.to_dict()
+        final_progress["result"] = result
+        is_completed = await job_model.finish_job(job_id=job.job_id,
+                                                  job_status=JobStatusEnum.COMPLETED.value,
+                                                  progress=final_progress)
+        if not is_completed:
+            logger.info(f"Job {job.job_id} cancelled before it completed")
+            return
+        logger.info(f"Job {job.job_id} completed")
+
+    async def report_progress(self, job: Job, progress: JobProgress, force: bool = False):
+        """
+        Persist the progress at most every `JOB_PROGRESS_INTERVAL_SECONDS`.
+        Raises JobCancelledError when the job was cancelled from any worker.
+        """
+        now = time.monotonic()
+        if not force and now - progress.reported_at < self.progress_interval:
+            return
+
+        progress.reported_at = now
+
+        job_model = await JobModel.create_instance(db_client=self.db_client)
+        job_status = await job_model.update_job_progress(job_id=job.job_id, progress=progress.to_dict())
+
+        if job_status == JobStatusEnum.CANCELLED.value:
+            raise JobCancelledError()
+
+    def get_nlp_controller(self) -> NLPController:
+        return NLPController(
+            vectordb_client=self.vectordb_client,
+            generation_client=self.generation_client,
+            embedding_client=self.embedding_client,
+            template_parser=self.template_parser
+        )
+
+    def get_asset_fingerprint(self, asset, chunking_config: dict) -> str:
+        """
+        Fingerprint of an asset content and the parameters its chunks were made with.
+        Assets uploaded before content hashing fall back to their size.
+        """
+        fingerprint = {
+            "asset_hash": asset.asset_hash,
+            "asset_size": asset.asset_size,
+            **chunking_config,
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def run_process_job(self, job: Job, progress: JobProgress) -> dict:
+
+        job_config = job.job_config or {}
+        chunk_size = job_config.get("chunk_size")
+        overlap_size = job_config.get("overlap_size")
+        do_reset = job_config.get("do_reset")
+        file_id = job_config.get("file_id")
+        separators = job_config.get("separators")
+
+        # chunks are measured in tokens with the embedding tokenizer, keep them under the model input limit
+        if self.app_settings.EMBEDDING_TOKENIZER_PATH and self.app_settings.INPUT_DEFAULT_MAX_TOKENS:
+            chunk_size = min(chunk_size, self.app_settings.INPUT_DEFAULT_MAX_TOKENS)
+
+        project_model = await ProjectModel.create_instance(db_client=self.db_client)
+        project = await project_model.get_project_or_create_one(project_id=job.job_project_id)
+
+        asset_model = await AssetModel.create_instance(db_client=self.db_client)
+
+        if file_id:
+            asset_record = await asset_model.get_asset_record(
+                asset_project_id=project.project_id,
+                asset_name=file_id
+            )
+
+            if asset_record is None:
+                raise JobFailedError(ResponseSignal.FILE_ID_ERROR)
+
+            project_files = [asset_record]
+
+        else:
+            project_files = await asset_model.get_all_project_assets(
+                asset_project_id=project.project_id,
+                asset_type=AssetTypeEnum.FILE.value,
+            )
+
+        if len(project_files) == 0:
+            raise JobFailedError(ResponseSignal.NO_FILES_ERROR)
+
+        process_controller = ProcessController(project_id=project.project_id)
+        nlp_controller = self.get_nlp_controller()
+
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+
+        chunking_config = {
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            "separators": separators,
+            "tokenizer": self.app_settings.EMBEDDING_TOKENIZER_PATH or None,
+        }
+        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
+
+        if do_reset == 1:
+            # delete the associated vectors collection
+            _ = await self.vectordb_client.delete_collection(collection_name=collection_name)
+
+            # delete the associated chunks
+            _ = await chunk_model.delete_chunks_by_project_id(
+                project_id=project.project_id
+            )
+
+            project_files_ids = {
+                record.asset_id: record.asset_name
+                for record in project_files
+            }
+
+        else:
+            # only files whose content or chunking parameters changed are chunked again
+            existing_chunks_count = await chunk_model.get_assets_chunks_count(project_id=project.project_id)
+
+            project_files_ids = {
+                record.asset_id: record.asset_name
+                for record in project_files
+                if not (
+                    (existing_chunks_count.get(record.asset_id) or (record.asset_config or {}).get("no_text"))
+                    and (record.asset_config or {}).get("fingerprint")
+                        == self.get_asset_fingerprint(asset=record, chunking_config=chunking_config)
+                )
+            }
+
+        assets_fingerprints = {
+            record.asset_id: self.get_asset_fingerprint(asset=record, chunking_config=chunking_config)
+            for record in project_files
+        }
+
+        progress.files_total = len(project_files_ids)
+        await self.report_progress(job=job, progress=progress, force=True)
+
+        files_chunks = process_controller.iter_files_chunks(
+            files_ids=project_files_ids,
+            executor=self.process_executor,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            timeout=self.app_settings.PROCESS_FILE_TIMEOUT_SECONDS,
+            max_in_flight=self.app_settings.PROCESS_POOL_WORKERS * 2,
+            slice_size=self.app_settings.PROCESS_SLICE_SIZE,
+            separators=separators
+        )
+
+        # chunks written so far for each asset, batches of a file arrive in order
+        assets_chunks_count = {}
+
+        # stored chunks of each asset being chunked again, by text hash; the ones left
+        # once the file is done are no longer in it
+        assets_stored_chunks = {}
+
+        # chunks inserted for each asset being chunked, removed again if a later batch of its file fails
+        assets_inserted_chunks = {}
+
+        async for asset_id, file_id, file_chunks, is_last in files_chunks:
+
+            if file_chunks is None:
+                logger.error(f"Error while processing file: {file_id}")
+
+                # the asset keeps its previous chunks and fingerprint, the next run chunks it again
+                failed_chunks_ids = assets_inserted_chunks.pop(asset_id, [])
+                if len(failed_chunks_ids):
+                    progress.chunks_inserted -= await chunk_model.delete_chunks_by_ids(chunk_ids=failed_chunks_ids)
+                assets_stored_chunks.pop(asset_id, None)
+                assets_chunks_count.pop(asset_id, None)
+                continue
+
+            if asset_id not in assets_stored_chunks:
+                assets_stored_chunks[asset_id] = await chunk_model.get_asset_chunks_hashes(asset_id=asset_id)
+            stored_chunks = assets_stored_chunks[asset_id]
+
+            chunks_count = assets_chunks_count.get(asset_id, 0)
+
+            file_chunks_records = []
+            kept_chunks = []
+
+            for i, chunk in enumerate(file_chunks):
+                chunk_hash = get_text_hash(chunk.page_content)
+
+                # an unchanged chunk keeps its chunk_id, and so its vector
+                if stored_chunks.get(chunk_hash):
+                    kept_chunks.append({
+                        "chunk_id": stored_chunks[chunk_hash].pop(0),
+                        "chunk_order": chunks_count+i+1,
+                        "chunk_metadata": chunk.metadata,
+                    })
+                    continue
+
+                file_chunks_records.append({
+                    "chunk_text": chunk.page_content,
+                    "chunk_metadata": chunk.metadata,
+                    "chunk_order": chunks_count+i+1,
+                    "chunk_hash": chunk_hash,
+                    "chunk_project_id": project.project_id,
+                    "chunk_asset_id": asset_id,
+                })
+
+            if len(file_chunks_records):
+                inserted_chunks_ids = await chunk_model.bulk_insert_chunks(chunks=file_chunks_records)
+                assets_inserted_chunks.setdefault(asset_id, []).extend(inserted_chunks_ids)
+                progress.chunks_inserted += len(inserted_chunks_ids)
+            if len(kept_chunks):
+                progress.chunks_kept += await chunk_model.update_chunks_positions(chunks=kept_chunks)
+            assets_chunks_count[asset_id] = chunks_count + len(file_chunks)
+
+            if is_last:
+                assets_inserted_chunks.pop(asset_id, None)
+                removed_chunks_ids = [
+                    chunk_id
+                    for chunks_ids in assets_stored_chunks.pop(asset_id).values()
+                    for chunk_id in chunks_ids
+                ]
+
+                if len(removed_chunks_ids):
+                    _ = await self.vectordb_client.delete_by_record_ids(
+                        collection_name=collection_name,
+                        record_ids=removed_chunks_ids
+                    )
+                    progress.chunks_deleted += await chunk_model.delete_chunks_by_ids(
+                        chunk_ids=removed_chunks_ids
+                    )
+
+                # a file without text is fingerprinted too, it is not parsed again until it changes
+                await asset_model.update_asset_config(
+                    asset_id=asset_id,
+                    asset_config={"fingerprint": assets_fingerprints[asset_id],
+                                  "no_text": assets_chunks_count[asset_id] == 0}
+                )
+
+                if assets_chunks_count[asset_id] == 0:
+                    logger.warning(f"No text found in file: {file_id}")
+                else:
+                    progress.files_processed += 1
+
+            await self.report_progress(job=job, progress=progress)
+
+        return {
+            "signal": ResponseSignal.PROCESSING_SUCCESS.value,
+            "inserted_chunks": progress.chunks_inserted,
+            "kept_chunks": progress.chunks_kept,
+            "deleted_chunks": progress.chunks_deleted,
+            "processed_files": progress.files_processed
+        }
+
+    async def run_push_job(self, job: Job, progress: JobProgress) -> dict:
+
+        job_config = job.job_config or {}
+
+        project_model = await ProjectModel.create_instance(db_client=self.db_client)
+        project = await project_model.get_project_or_create_one(project_id=job.job_project_id)
+
+        chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        nlp_controller = self.get_nlp_controller()
+
+        # create collection if not exists
+        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
+
+        _ = await self.vectordb_client.create_collection(
+            collection_name=collection_name,
+            embedding_size=self.embedding_client.embedding_size,
+            do_reset=job_config.get("do_reset"),
+        )
+
+        # a new collection needs every chunk again
+        if job_config.get("do_reset"):
+            _ = await chunk_model.set_chunks_indexed(project_id=project.project_id, indexed=False)
+
+        # only chunks not pushed yet are embedded
+        progress.chunks_total = await chunk_model.get_total_chunks_count(project_id=project.project_id,
+                                                                         unindexed_only=True)
+        await self.report_progress(job=job, progress=progress, force=True)
+
+        # read -> embed -> insert run as separate stages over bounded queues, so the database,
+        # the embedding provider and the vector db work at the same time
+        embed_concurrency = max(self.app_settings.INDEX_PUSH_EMBED_CONCURRENCY, 1)
+        pages_queue = asyncio.Queue(maxsize=embed_concurrency)
+        vectors_queue = asyncio.Queue(maxsize=embed_concurrency)
+
+        progress.stages = {"read": StageStats(), "embed": StageStats(), "insert": StageStats()}
+
+        async def read_stage():
+            stats = progress.stages["read"]
+            page_chunks_iter = chunk_model.iter_project_chunks(
+                project_id=project.project_id,
+                page_size=self.app_settings.INDEX_PUSH_PAGE_SIZE,
+                unindexed_only=True
+            )
+
+            started_at = time.monotonic()
+            async for page_chunks in page_chunks_iter:
+                stats.busy_seconds += time.monotonic() - started_at
+                stats.pages += 1
+                stats.chunks += len(page_chunks)
+
+                await pages_queue.put(page_chunks)
+                started_at = time.monotonic()
+
+            for _ in range(embed_concurrency):
+                await pages_queue.put(None)
+
+        async def embed_stage():
+            stats = progress.stages["embed"]
+            while (page_chunks := await pages_queue.get()) is not None:
+                started_at = time.monotonic()
+                vectors = await nlp_controller.embed_chunks(chunks=page_chunks)
+                stats.busy_seconds += time.monotonic() - started_at
+
+                if vectors is None:
+                    raise JobFailedError(ResponseSignal.INSERT_INTO_VECTORDB_ERROR)
+
+                stats.pages += 1
+                stats.chunks += len(page_chunks)
+                await vectors_queue.put((page_chunks, vectors))
+
+            await vectors_queue.put(None)
+
+        async def insert_stage():
+            stats = progress.stages["insert"]
+            running_embedders = embed_concurrency
+
+            while running_embedders:
+                item = await vectors_queue.get()
+                if item is None:
+                    running_embedders -= 1
+                    continue
+
+                page_chunks, vectors = item
+                chunks_ids = [c.chunk_id for c in page_chunks]
+
+                started_at = time.monotonic()
+                is_inserted = await nlp_controller.insert_chunks_vectors(
+                    project=project,
+                    chunks=page_chunks,
+                    chunks_ids=chunks_ids,
+                    vectors=vectors
+                )
+                if not is_inserted:
+                    raise JobFailedError(ResponseSignal.INSERT_INTO_VECTORDB_ERROR)
+
+                _ = await chunk_model.set_chunks_indexed(chunk_ids=chunks_ids)
+                stats.busy_seconds += time.monotonic() - started_at
+
+                stats.pages += 1
+                stats.chunks += len(page_chunks)
+                progress.vectors_inserted += len(page_chunks)
+
+                await self.report_progress(job=job, progress=progress)
+
+        stages = [
+            asyncio.create_task(read_stage()),
+            *[asyncio.create_task(embed_stage()) for _ in range(embed_concurrency)],
+            asyncio.create_task(insert_stage()),
+        ]
+
+        try:
+            # the first failing stage stops the others
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+        await self.report_progress(job=job, progress=progress, force=True)
+
+        return {
+            "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCES.value,
+            "inserted_items_counts": progress.vectors_inserted,
+            "stages": {name: stage.to_dict() for name, stage in progress.stages.items()}
+        }
@@ -1,8 +1,11 @@
 from .BaseController import BaseController
 from models.db_schemes import Project,DataChunk
 from stores.llm.LLMEnums import DocumentTypeEnum
-from typing import List
+from models import ResponseSignal
+from utils.metrics import RAG_ANSWER_TIME_TO_FIRST_TOKEN
+from typing import AsyncIterator, List
 import json
+import time
 
 class NLPController(BaseController):
 
@@ -22,7 +25,7 @@ class NLPController(BaseController):
     async def reset_collection_db_collection(self, project:Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
 
-        if self.vectordb_client.is_collection_existed(collection_name=collection_name):
+        if await self.vectordb_client.is_collection_existed(collection_name=collection_name):
             return await self.vectordb_client.delete_collection(collection_name=collection_name)
         
         return None
@@ -44,12 +47,10 @@ class NLPController(BaseController):
         # step1: get collection name
         collection_name = self.create_collection_name(project_id=project.project_id)
 
-        # step2: mange items
-        texts = [c.chunk_text for c in chunks]
-        metadata = [c.chunk_metadata for c in chunks]
-
-        vectors =  self.embedding_client.embed_text(text=texts, 
-                                                    document_type=DocumentTypeEnum.DOCUMENT.value)
+        # step2: embed items
+        vectors = await self.embed_chunks(chunks=chunks)
+        if vectors is None:
+            return False
 
         # step3: create collection
         _ = await self.vectordb_client.create_collection(collection_name=collection_name,
@@ -57,28 +58,84 @@ class NLPController(BaseController):
                                                    )
 
         # step4: insert into vector db
+        return await self.insert_chunks_vectors(project=project, chunks=chunks,
+                                                chunks_ids=chunks_ids, vectors=vectors)
+
+
+    async def embed_chunks(self, chunks: List[DataChunk]) -> List[list]:
+        """
+        Embedding vectors of the chunks, in order, or None if the provider failed.
+        """
+        # chunks copied from a duplicate upload reuse the vectors of their source chunks
+        reused_vectors = await self.get_copied_chunks_vectors(chunks=chunks)
+
+        missing_chunks = [c for c in chunks if c.chunk_id not in reused_vectors]
+        missing_texts = [c.chunk_text for c in missing_chunks]
+        missing_vectors = []
+
+        if missing_texts:
+            # the splitter stored the token count of each chunk, the scheduler does not count them again
+            missing_vectors = await self.embedding_client.embed_text(
+                text=missing_texts,
+                document_type=DocumentTypeEnum.DOCUMENT.value,
+                token_counts=[(c.chunk_metadata or {}).get("token_count") for c in missing_chunks]
+            )
+            if not missing_vectors or len(missing_vectors) != len(missing_texts):
+                return None
+
+        missing_vectors = iter(missing_vectors)
+
+        return [
+            reused_vectors[c.chunk_id] if c.chunk_id in reused_vectors else next(missing_vectors)
+            for c in chunks
+        ]
 
-        _ = await self.vectordb_client.insert_many(
+
+    async def insert_chunks_vectors(self, project: Project, chunks: List[DataChunk],
+                                    chunks_ids: List[int], vectors: List[list]) -> bool:
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        return await self.vectordb_client.insert_many(
             record_ids = chunks_ids,
             collection_name=collection_name,
-            texts=texts,
-            metadata=metadata,
+            texts=[c.chunk_text for c in chunks],
+            metadata=[c.chunk_metadata for c in chunks],
             vectors=vectors
         )
+    
 
-        
+    async def get_copied_chunks_vectors(self, chunks: List[DataChunk]) -> dict:
+        """
+        Vectors stored for the source chunks of copied chunks, as `{chunk_id: vector}`.
+        """
+        sources = {}
+        for c in chunks:
+            copied_from = (c.chunk_metadata or {}).get("copied_from")
+            if copied_from:
+                sources.setdefault(copied_from["project_id"], {})[copied_from["chunk_id"]] = c.chunk_id
+
+        vectors = {}
+        for source_project_id, source_chunks in sources.items():
+            source_vectors = await self.vectordb_client.get_vectors(
+                collection_name=self.create_collection_name(project_id=source_project_id),
+                record_ids=list(source_chunks.keys())
+            )
+            for source_chunk_id, vector in source_vectors.items():
+                vectors[source_chunks[source_chunk_id]] = vector
 
-        return True
+        return vectors
     
 
-    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 5):
+    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 5,
+                                          search_params: dict = None):
 
         # step1: get collection name
         query_vector = None
         collection_name = self.create_collection_name(project_id=project.project_id)
 
         # step2: get text embedding vector 
-        vectors = self.embedding_client.embed_text(
+        vectors = await self.embedding_client.embed_text(
             text= text,
             document_type = DocumentTypeEnum.QUERY.value
         )
@@ -96,7 +153,8 @@ class NLPController(BaseController):
         results = await self.vectordb_client.search_by_vector(
             collection_name= collection_name,
             vector= query_vector,
-            limit = limit
+            limit = limit,
+            **(search_params or {})
         )
 
         if not results:
@@ -105,7 +163,8 @@ class NLPController(BaseController):
         return results
     
 
-    async def answer_rag_question(self, project: Project, query: str, limit: int=5):
+    async def answer_rag_question(self, project: Project, query: str, limit: int=5,
+                                  search_params: dict = None):
 
         answer, full_prompt, chat_history = None, None, None
 
@@ -113,13 +172,72 @@ class NLPController(BaseController):
         retrieved_documents= await self.search_vector_db_collection(
             project= project,
             text= query,
-            limit= limit
+            limit= limit,
+            search_params= search_params
         )
 
         if not retrieved_documents or len(retrieved_documents) == 0:
             return answer, full_prompt, chat_history
         
         # step2: construct llm prompt
+        full_prompt, chat_history = self.construct_rag_prompt(
+            query= query,
+            retrieved_documents= retrieved_documents
+        )
+
+        answer = await self.generation_client.generate_text(
+            prompt= full_prompt, 
+            chat_history = chat_history
+        )
+
+        return answer, full_prompt, chat_history
+
+
+    async def stream_rag_answer(self, project: Project, query: str, limit: int=5,
+                                search_params: dict = None) -> AsyncIterator[dict]:
+        """
+        Answer like `answer_rag_question`, as events: the retrieved documents first, then
+        the answer text as the provider generates it, then the end of the answer.
+        """
+        started_at = time.perf_counter()
+
+        retrieved_documents= await self.search_vector_db_collection(
+            project= project,
+            text= query,
+            limit= limit,
+            search_params= search_params
+        )
+
+        if not retrieved_documents or len(retrieved_documents) == 0:
+            yield {"type": "error", "signal": ResponseSignal.RAG_ANSWER_ERROR.value}
+            return
+
+        yield {
+            "type": "documents",
+            "documents": [document.model_dump() for document in retrieved_documents]
+        }
+
+        full_prompt, chat_history = self.construct_rag_prompt(
+            query= query,
+            retrieved_documents= retrieved_documents
+        )
+
+        is_first_token = True
+        async for text in self.generation_client.stream_text(prompt= full_prompt, chat_history= chat_history):
+            if is_first_token:
+                RAG_ANSWER_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started_at)
+                is_first_token = False
+            yield {"type": "token", "text": text}
+
+        if is_first_token:
+            yield {"type": "error", "signal": ResponseSignal.RAG_ANSWER_ERROR.value}
+            return
+
+        yield {"type": "end", "signal": ResponseSignal.RAG_ANSWER_SUCCESS.value}
+
+
+    def construct_rag_prompt(self, query: str, retrieved_documents: list):
+
         system_prompt = self.template_parser.get(
             group="rag",
             key= "system_prompt"
@@ -166,10 +284,4 @@ class NLPController(BaseController):
 
         full_prompt = "\n\n".join([document_prompts, footer_prompt])
 
-        answer = self.generation_client.generate_text(
-            prompt= full_prompt, 
-            chat_history = chat_history
-        )
-
-        return answer, full_prompt, chat_history
-
+        return full_prompt, chat_history
@@ -1,108 +1,236 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 import os
-from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import asyncio
+import logging
+import time
+import pymupdf
+from concurrent.futures import Executor
+from helpers.text_splitter import TextSplitter
+from helpers.tokenizer import get_token_counter
 from models import ProcessingEnum
-from typing import List
+from typing import List, AsyncIterator, Iterator, Tuple, Optional
 from dataclasses import dataclass
 
+
+logger = logging.getLogger("uvicorn.error")
+
+
 @dataclass
 class Document:
     page_content: str
     metadata: dict
 
+
+def parse_file_slice(file_path: str, chunk_size: int, overlap_size: int,
+                     cursor: dict = None, slice_size: int = 1048576, separators: List[str] = None):
+    """
+    Split the next slice of one file. It runs inside the process pool, so it only takes
+    and returns picklable values.
+
+    :return: `(chunks, next_cursor)`, `next_cursor` is None once the file is done,
+             or None if the file can not be loaded.
+    """
+    process_controller = ProcessController(project_id=None, project_path=os.path.dirname(file_path))
+
+    return process_controller.process_file_slice(
+        file_id=os.path.basename(file_path),
+        chunk_size=chunk_size,
+        overlap_size=overlap_size,
+        cursor=cursor,
+        slice_size=slice_size,
+        separators=separators
+    )
+
+
 class ProcessController(BaseController):
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, project_path: str = None):
         super().__init__()
         self.project_id = project_id
-        self.project_path= ProjectController().get_project_path(project_id)
+        self.project_path= project_path or ProjectController().get_project_path(project_id)
 
     def get_file_extension(self, file_id: str):
 
        return os.path.splitext(file_id)[-1]
 
 
-    def get_file_loader(self, file_id: str):
-
+    def iter_file_pages(self, file_id: str, start: int = 0, offset: int = 0,
+                        block_size: int = 1048576) -> Optional[Iterator[Tuple[Document, int]]]:
+        """
+        Lazily yield `(page, next_start)` from `start`. PDF pages are read one at a time,
+        text files in blocks of about `block_size` bytes cut on a line break.
+        `offset` is the character offset of `start` in a text file.
+        """
         file_ext = self.get_file_extension(file_id)
         file_path = os.path.join(self.project_path, file_id)
-        
+
         if not os.path.exists(file_path):
             return None
-        
+
         if file_ext == ProcessingEnum.TXT.value:
-            return TextLoader(file_path, encoding='utf-8')
-        
+            return self.iter_text_pages(file_path, start=start, offset=offset, block_size=block_size)
+
         if file_ext == ProcessingEnum.PDF.value:
-            return PyMuPDFLoader(file_path)
-        
+            return self.iter_pdf_pages(file_path, start=start)
 
         return None
-    
 
-    def get_file_content(self, file_id: str):
-        
-        loader = self.get_file_loader(file_id)
-        return loader.load() if loader else None
 
+    def iter_pdf_pages(self, file_path: str, start: int = 0):
+        with pymupdf.open(file_path) as pdf:
+            for page_no in range(start, pdf.page_count):
+                page = Document(
+                    page_content=pdf[page_no].get_text(),
+                    metadata={"page": page_no, "offset": 0}
+                )
+                yield page, page_no + 1
+
+
+    def iter_text_pages(self, file_path: str, start: int = 0, offset: int = 0, block_size: int = 1048576):
+        with open(file_path, "rb") as f:
+            position = start
+            f.seek(position)
+
+            while block := f.read(block_size):
+
+                cut = len(block)
+                if len(block) == block_size:
+                    # end the block on a line break, or at least not inside a utf-8 sequence
+                    cut = block.rfind(b"\n") + 1
+                    if cut == 0:
+                        cut = len(block)
+                        while cut > 0 and (block[cut - 1] & 0xC0) == 0x80:
+                            cut -= 1
+                        if cut > 0 and block[cut - 1] >= 0xC0:
+                            cut -= 1
+                        cut = cut or len(block)
+
+                page = Document(
+                    page_content=block[:cut].decode("utf-8", errors="replace"),
+                    metadata={"page": None, "offset": offset}
+                )
+                position += cut
+                offset += len(page.page_content)
+                f.seek(position)
+
+                yield page, position
+
+
+    def process_file_slice(self, file_id: str, chunk_size: int=100, overlap_size: int=20,
+                           cursor: dict = None, slice_size: int = 1048576, separators: List[str] = None):
+        """
+        Split pages from `cursor` until about `slice_size` characters were read, so
+        memory stays bounded whatever the file size.
+        The cursor keeps the read position and the splitter window between slices.
+        """
+        cursor = cursor or {"position": 0, "offset": 0, "carry": None}
+
+        pages = self.iter_file_pages(file_id, start=cursor["position"], offset=cursor["offset"],
+                                     block_size=slice_size)
+        if pages is None:
+            return None
 
-    def process_file_content(self, file_content: list, file_id: str,
-                            chunk_size: int=100, overlap_size: int=20):
-
-        # text_splitter = RecursiveCharacterTextSplitter(
-        #     chunk_size=chunk_size,
-        #     chunk_overlap=overlap_size,
-        #     length_function=len,
-        # )
-
-        file_content_texts = [
-            rec.page_content
-            for rec in file_content
-        ]
+        # sizes are in tokens of the embedding model when its tokenizer is configured
+        text_splitter = TextSplitter(
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            separators=separators,
+            token_counter=get_token_counter(self.app_settings.EMBEDDING_TOKENIZER_PATH)
+        )
+        text_splitter.set_state(cursor["carry"])
 
-        file_content_metadata = [
-            rec.metadata
-            for rec in file_content
+        chunks = []
+        read_size = 0
+
+        for page, next_position in pages:
+            chunks.extend(
+                Document(page_content=chunk_text, metadata=chunk_metadata)
+                for chunk_text, chunk_metadata in text_splitter.feed(
+                    page.page_content,
+                    page=page.metadata["page"],
+                    offset=page.metadata["offset"]
+                )
+            )
+            read_size += len(page.page_content)
+
+            if read_size >= slice_size:
+                pages.close()
+                return chunks, {
+                    "position": next_position,
+                    "offset": page.metadata["offset"] + len(page.page_content),
+                    "carry": text_splitter.get_state()
+                }
+
+        chunks.extend(
+            Document(page_content=chunk_text, metadata=chunk_metadata)
+            for chunk_text, chunk_metadata in text_splitter.flush()
+        )
+
+        return chunks, None
+
+
+    async def iter_files_chunks(self, files_ids: dict, executor: Executor,
+                                chunk_size: int=100, overlap_size: int=20,
+                                timeout: float=None, max_in_flight: int=1,
+                                slice_size: int=1048576, separators: List[str]=None
+                                ) -> AsyncIterator[Tuple[int, str, Optional[List[Document]], bool]]:
+        """
+        Parse several files of the project at once on `executor` and yield
+        `(asset_id, file_id, chunks, is_last)` batches as each slice finishes, so the
+        caller can insert chunks while the next slices are still being parsed.
+        `chunks` is None when the file could not be loaded or timed out.
+        """
+        loop = asyncio.get_running_loop()
+
+        # at most `max_in_flight` files are parsed, and as many batches wait to be consumed
+        batches = asyncio.Queue(maxsize=max_in_flight)
+        parse_slots = asyncio.Semaphore(max_in_flight)
+
+        async def parse(asset_id: int, file_id: str):
+            file_path = os.path.join(self.project_path, file_id)
+
+            async with parse_slots:
+                deadline = time.monotonic() + timeout if timeout else None
+                cursor = None
+
+                while True:
+                    try:
+                        result = await asyncio.wait_for(
+                            loop.run_in_executor(executor, parse_file_slice, file_path,
+                                                 chunk_size, overlap_size, cursor, slice_size,
+                                                 separators),
+                            timeout=max(deadline - time.monotonic(), 0) if deadline else None
+                        )
+                    except asyncio.TimeoutError:
+                        # the pool worker can not be interrupted, it finishes the slice and drops the result
+                        logger.error(f"Timeout while parsing file: {file_id}")
+                        result = None
+                    except Exception as e:
+                        logger.error(f"Error while parsing file {file_id}: {e}")
+                        result = None
+
+                    if result is None:
+                        await batches.put((asset_id, file_id, None, True))
+                        return
+
+                    chunks, cursor = result
+                    await batches.put((asset_id, file_id, chunks, cursor is None))
+
+                    if cursor is None:
+                        return
+
+        tasks = [
+            asyncio.create_task(parse(asset_id, file_id))
+            for asset_id, file_id in files_ids.items()
         ]
 
-        # chunks = text_splitter.create_documents(
-        #     file_content_texts,
-        #     metadatas=file_content_metadata
-        # )
-        chunks = self.process_simpler_splitter(texts= file_content_texts,
-                                               metadtas=file_content_metadata,
-                                               chunk_size=chunk_size)
-
-        return chunks
-
-
-    def process_simpler_splitter(self, texts: List[str], metadtas: List[dict], chunk_size: int, splitter_tag: str="\n"):
-        full_text = " ".join(texts)
-
-        #split by \n
-        lines = [doc.strip() for doc in full_text.split(splitter_tag) if len(doc.strip()) > 1]
-
-        chunks = []
-        current_chunk = ""
-
-        for line in lines:
-            current_chunk += line + splitter_tag
-
-            if len(current_chunk) > chunk_size:
-                chunks.append(Document(
-                    page_content= current_chunk.strip(),
-                    metadata= {}
-                ))
-            
-                current_chunk = ""
-
-        if len(current_chunk) >= 0:
-                chunks.append(Document(
-                    page_content= current_chunk.strip(),
-                    metadata= {}
-                ))
-
-        return chunks
-            
-                
\ No newline at end of file
+        remaining_files = len(tasks)
+        try:
+            while remaining_files:
+                batch = await batches.get()
+                if batch[3]:
+                    remaining_files -= 1
+                yield batch
+        finally:
+            for task in tasks:
+                task.cancel()
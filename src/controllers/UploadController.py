@@ -0,0 +1,223 @@
+from .BaseController import BaseController
+from .DataController import DataController
+from .ProjectController import ProjectController
+from models import ResponseSignal
+from typing import AsyncIterator, Tuple
+import aiofiles
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import time
+
+
+class UploadController(BaseController):
+    """
+    Resumable uploads sent as raw request bodies.
+
+    The body is written straight to `<asset path>.part` in the project directory and
+    renamed to the asset path once the declared size is reached, so every byte is
+    written to disk once. The session itself is a small json file next to it, so an
+    upload can be resumed after a restart or on another worker.
+
+    A complete upload keeps its session until its asset is registered: a request of the
+    session can register it again if hashing or the database failed the first time.
+    """
+
+    def __init__(self, project_id: str):
+        super().__init__()
+        self.project_id = project_id
+        self.project_path = ProjectController().get_project_path(project_id)
+        self.sessions_path = os.path.join(self.project_path, ".uploads")
+
+        if not os.path.exists(self.sessions_path):
+            os.makedirs(self.sessions_path)
+
+    def get_session_path(self, upload_id: str) -> str:
+        return os.path.join(self.sessions_path, f"{upload_id}.json")
+
+    def get_part_path(self, session: dict) -> str:
+        return os.path.join(self.project_path, f"{session['file_id']}.part")
+
+    def validate_session(self, file_size: int, content_type: str) -> Tuple[bool, ResponseSignal]:
+
+        if content_type not in self.app_settings.FILE_ALLOWED_TYPES:
+            return False, ResponseSignal.FILE_TYPE_NOT_ALLOWED
+        if file_size <= 0 or file_size > self.app_settings.FILE_MAX_SIZE:
+            return False, ResponseSignal.FILE_SIZE_EXCEEDS_LIMIT
+
+        return True, ResponseSignal.FILE_VALIDATED_SUCCESS
+
+    def create_session(self, file_name: str, file_size: int, content_type: str) -> dict:
+        """
+        Reserve the asset path and create an empty part file for a new upload.
+        """
+        self.delete_expired_sessions()
+
+        _, file_id = DataController().generate_unique_filepath(file_name, self.project_id)
+
+        session = {
+            "upload_id": self.generate_random_string(24),
+            "file_id": file_id,
+            "file_name": file_name,
+            "file_size": file_size,
+            "content_type": content_type,
+            "created_at": time.time(),
+        }
+
+        open(self.get_part_path(session), "wb").close()
+        with open(self.get_session_path(session["upload_id"]), "w") as f:
+            json.dump(session, f)
+
+        return session
+
+    def get_session(self, upload_id: str) -> dict:
+        """
+        Get an upload session with its current `offset`, the size received so far, and
+        whether it is `completed`, its file moved to the asset path but not registered yet.
+        """
+        # upload ids are generated here, anything else can not name a session file
+        if not upload_id.isalnum():
+            return None
+
+        session_path = self.get_session_path(upload_id)
+        if not os.path.exists(session_path):
+            return None
+
+        with open(session_path) as f:
+            session = json.load(f)
+
+        part_path = self.get_part_path(session)
+        file_path = self.get_file_path(session)
+        if os.path.exists(part_path):
+            session["offset"] = os.path.getsize(part_path)
+            session["completed"] = False
+        elif os.path.exists(file_path):
+            session["offset"] = os.path.getsize(file_path)
+            session["completed"] = True
+        else:
+            return None
+
+        return session
+
+    def delete_session(self, session: dict, keep_file: bool = False):
+        # a completed session that is deleted without being registered leaves no file behind
+        for file_path in [self.get_part_path(session), self.get_file_path(session)]:
+            if not keep_file and os.path.exists(file_path):
+                os.remove(file_path)
+
+        session_path = self.get_session_path(session["upload_id"])
+        if os.path.exists(session_path):
+            os.remove(session_path)
+
+    def delete_expired_sessions(self):
+        expire_before = time.time() - self.app_settings.UPLOAD_SESSION_EXPIRE_SECONDS
+
+        for session_file in os.listdir(self.sessions_path):
+            session_path = os.path.join(self.sessions_path, session_file)
+            if os.path.getmtime(session_path) >= expire_before:
+                continue
+
+            try:
+                with open(session_path) as f:
+                    session = json.load(f)
+                self.delete_session(session)
+            except (OSError, ValueError):
+                os.remove(session_path)
+
+    async def write_chunk(self, session: dict, stream: AsyncIterator[bytes],
+                          offset: int) -> Tuple[ResponseSignal, int]:
+        """
+        Append the request body to the part file at `offset`, which must be the size
+        received so far. The size limit is enforced while the body streams in; on
+        error the part file is cut back to `offset` so the client can retry the chunk.
+
+        A chunk holds an exclusive lock on the part file from the offset check to the
+        move of the complete file, so concurrent requests of the same upload, on any
+        worker, can not interleave their writes or complete it twice. A request to a
+        session completed in the meantime is answered as complete, to be registered.
+
+        :return: `(signal, offset)` with the size received after this chunk.
+        """
+        part_path = self.get_part_path(session)
+
+        try:
+            f = await aiofiles.open(part_path, "r+b")
+        except FileNotFoundError:
+            # completed or deleted since the session was read
+            if os.path.exists(self.get_file_path(session)):
+                return ResponseSignal.UPLOAD_CHUNK_RECEIVED, session["file_size"]
+            return ResponseSignal.UPLOAD_SESSION_NOT_FOUND, offset
+
+        # the lock goes with the file, closing it releases the lock
+        try:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return ResponseSignal.UPLOAD_IN_PROGRESS, session["offset"]
+
+            if not os.path.exists(self.get_session_path(session["upload_id"])):
+                return ResponseSignal.UPLOAD_SESSION_NOT_FOUND, offset
+
+            # the size on disk, the session read before the lock may be stale
+            received = os.fstat(f.fileno()).st_size
+            if offset != received:
+                return ResponseSignal.UPLOAD_OFFSET_MISMATCH, received
+
+            max_size = min(session["file_size"], self.app_settings.FILE_MAX_SIZE)
+            written = offset
+
+            await f.seek(offset)
+            try:
+                async for chunk in stream:
+                    if written + len(chunk) > max_size:
+                        await f.truncate(offset)
+                        return ResponseSignal.FILE_SIZE_EXCEEDS_LIMIT, offset
+
+                    await f.write(chunk)
+                    written += len(chunk)
+
+            except Exception:
+                # the client went away, keep the part received so far for the next attempt
+                await f.flush()
+                await f.truncate(written)
+                raise
+
+            await f.flush()
+
+            if written >= session["file_size"]:
+                # still under the lock: later requests find the complete file instead of the part
+                os.replace(part_path, self.get_file_path(session))
+
+            # refresh the session so it does not expire while the upload makes progress
+            os.utime(self.get_session_path(session["upload_id"]))
+
+        finally:
+            await f.close()
+
+        return ResponseSignal.UPLOAD_CHUNK_RECEIVED, written
+
+    def get_file_path(self, session: dict) -> str:
+        return os.path.join(self.project_path, session["file_id"])
+
+    async def complete_session(self, session: dict) -> Tuple[str, str, int, str]:
+        """
+        Hash the complete file, moved to the asset path by its last chunk. The session
+        is deleted once the asset is registered, with `delete_session(keep_file=True)`.
+
+        :return: `(file_path, file_id, file_size, file_hash)`
+        """
+        file_path = self.get_file_path(session)
+        file_hash = await asyncio.to_thread(self.hash_file, file_path)
+
+        return file_path, session["file_id"], os.path.getsize(file_path), file_hash
+
+    def hash_file(self, file_path: str) -> str:
+        file_hash = hashlib.sha256()
+
+        with open(file_path, "rb") as f:
+            while chunk := f.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
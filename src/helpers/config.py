@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES: list[str]
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNK_SIZE: int 
+    UPLOAD_SESSION_EXPIRE_SECONDS: int = 86400
 
     # MONGODB_URI: str
     # MONGODB_DATABASE: str
@@ -32,15 +33,83 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_ID: str = None
     EMBEDDING_MODEL_SIZE: int = None
 
+    EMBEDDING_TOKENIZER_PATH: str = None
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_BYTES: int = 67108864
+    EMBEDDING_CACHE_PERSIST: bool = True
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_TOKENS_PER_MINUTE: int = 0
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_BACKOFF_BASE_SECONDS: float = 0.5
+    EMBEDDING_BACKOFF_MAX_SECONDS: float = 30.0
+
     INPUT_DEFAULT_MAX_CHARACTERS: int = None
+    INPUT_DEFAULT_MAX_TOKENS: int = None
     GENERATION_DEFAULT_MAX_TOKENS: int= None
     GENERATION_DEFAULT_TEMPERATURE: float= None
 
+    LOCAL_EMBEDDING_NGRAM_SIZE: int = 2
+    LOCAL_GENERATION_LATENCY_MS: float = 200.0
+    LOCAL_GENERATION_TOKEN_LATENCY_MS: float = 10.0
+
+    LLM_HTTP2: bool = True
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_GENERATION_TIMEOUT_SECONDS: float = 120.0
+    LLM_EMBEDDING_TIMEOUT_SECONDS: float = 30.0
+
     VECTOR_DB_BACKEND_LITTERAL: List[str] = None
     VECTOR_DB_BACKEND : str
     VECTOR_DB_PATH : str
     VECTOR_DB_DISTANT_METHOD : str = None
+    VECTOR_DB_COLLECTION_CACHE_TTL_SECONDS: float = 60
     VECTOR_DB_PGVEC_INDEX_THRESHOLD: int = 100
+    VECTOR_DB_PGVEC_HNSW_EF_SEARCH: int = 100
+    VECTOR_DB_PGVEC_IVFFLAT_PROBES: int = 0
+    VECTOR_DB_PGVEC_INSERT_MODE: str = "copy"
+    VECTOR_DB_PGVEC_INSERT_BATCH_SIZE: int = 1000
+    VECTOR_DB_PGVEC_INDEX_TYPE: str = "hnsw"
+    VECTOR_DB_PGVEC_INDEX_BUILD_DELAY_SECONDS: float = 5
+    VECTOR_DB_PGVEC_INDEX_REBUILD_RATIO: float = 1.0
+    VECTOR_DB_PGVEC_INDEX_MAINTENANCE_WORK_MEM_MB: int = 1024
+    VECTOR_DB_PGVEC_INDEX_BUILD_WORKERS: int = 2
+    VECTOR_DB_PGVEC_STORAGE_MODE: str = "vector"
+    VECTOR_DB_PGVEC_RERANK_FACTOR: int = 8
+    VECTOR_DB_QDRANT_URL: Optional[str] = None
+    VECTOR_DB_QDRANT_API_KEY: Optional[str] = None
+    VECTOR_DB_QDRANT_PREFER_GRPC: bool = True
+    VECTOR_DB_QDRANT_GRPC_PORT: int = 6334
+    VECTOR_DB_QDRANT_UPLOAD_BATCH_SIZE: int = 256
+    VECTOR_DB_QDRANT_UPLOAD_PARALLEL: int = 2
+    VECTOR_DB_QDRANT_QUANTIZATION: str = "none"
+    VECTOR_DB_QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    VECTOR_DB_QDRANT_QUANTIZATION_RESCORE: bool = True
+    VECTOR_DB_QDRANT_QUANTIZATION_OVERSAMPLING: float = 2.0
+    VECTOR_DB_QDRANT_PRODUCT_COMPRESSION: str = "x16"
+    VECTOR_DB_QDRANT_ON_DISK_VECTORS: bool = False
+    VECTOR_DB_QDRANT_ON_DISK_PAYLOAD: bool = False
+    VECTOR_DB_QDRANT_HNSW_M: int = 16
+    VECTOR_DB_QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    VECTOR_DB_QDRANT_INDEXING_THRESHOLD_KB: int = 0
+    VECTOR_DB_QDRANT_MEMMAP_THRESHOLD_KB: int = 0
+    VECTOR_DB_QDRANT_HNSW_EF: int = 0
+    VECTOR_DB_QDRANT_EXACT: bool = False
+
+    INDEX_PUSH_PAGE_SIZE: int = 50
+    INDEX_PUSH_EMBED_CONCURRENCY: int = 2
+
+    JOB_WORKERS_COUNT: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    JOB_STALE_AFTER_SECONDS: int = 600
+
+    PROCESS_POOL_WORKERS: int = 2
+    PROCESS_FILE_TIMEOUT_SECONDS: int = 300
+    PROCESS_SLICE_SIZE: int = 1048576
 
     PRIMARY_LANG:str = "en"
     DEFAULT_LANG: str= "en"
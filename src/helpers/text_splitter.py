@@ -0,0 +1,168 @@
+from collections import deque
+from typing import Iterator, List, Tuple
+from .tokenizer import TokenCounter
+import re
+import hashlib
+import unicodedata
+
+
+SEPARATORS = {
+    "paragraph": r"\n\s*\n",
+    "line": r"\n",
+    "sentence": r"(?<=[.!?؟])\s+",
+    "word": r"\s+",
+}
+
+DEFAULT_SEPARATORS = ["paragraph", "line", "sentence", "word"]
+
+
+def get_text_hash(text: str) -> str:
+    """
+    SHA-256 of the normalized text (unicode NFC, whitespace runs collapsed), so chunks
+    that only differ in layout get the same hash.
+    """
+    normalized_text = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+
+class TextSplitter:
+    """
+    Overlap-aware splitter that runs in linear time over a stream of pages.
+
+    Each page is cut into segments: pieces of the coarsest separator level that fit
+    in `chunk_size`, oversized pieces are cut again with the next level, and pieces
+    with no separator left are cut every `chunk_size` characters (or tokens).
+    Segments are then packed into chunks with a sliding window, so every segment is
+    appended and dropped once and each chunk is joined once from its list of parts.
+
+    The window carries over from one page to the next, call `flush` after the last page.
+
+    With a `token_counter`, sizes are measured in tokens of the embedding model and
+    every chunk records its exact `token_count` in the metadata.
+    """
+
+    def __init__(self, chunk_size: int, overlap_size: int = 0,
+                 separators: List[str] = None,
+                 token_counter: TokenCounter = None):
+
+        self.chunk_size = max(chunk_size, 1)
+        self.overlap_size = min(max(overlap_size or 0, 0), self.chunk_size - 1)
+        self.token_counter = token_counter
+
+        self.separators = [
+            re.compile(SEPARATORS.get(separator, separator))
+            for separator in (separators or DEFAULT_SEPARATORS)
+        ]
+
+        # window items: (text, length, page, start_index)
+        self.window = deque()
+        self.window_length = 0
+        self.has_new_segments = False
+
+    def get_state(self) -> dict:
+        return {
+            "window": [list(segment) for segment in self.window],
+            "has_new_segments": self.has_new_segments,
+        }
+
+    def set_state(self, state: dict = None):
+        self.window = deque(tuple(segment) for segment in (state or {}).get("window", []))
+        self.window_length = sum(segment[1] for segment in self.window)
+        self.has_new_segments = (state or {}).get("has_new_segments", False)
+
+    def split_spans(self, text: str, start: int, end: int, level: int = 0) -> Iterator[Tuple[int, int]]:
+        if end <= start:
+            return
+
+        if self.measure(text, start, end) <= self.chunk_size:
+            yield start, end
+            return
+
+        if level >= len(self.separators):
+            if self.token_counter:
+                cuts = [start + cut for cut in self.token_counter.split_offsets(text[start:end], self.chunk_size)]
+            else:
+                cuts = list(range(start + self.chunk_size, end, self.chunk_size))
+
+            for cut_start, cut_end in zip([start] + cuts, cuts + [end]):
+                yield cut_start, cut_end
+            return
+
+        # separators stay at the end of the piece before them, so spans are contiguous
+        piece_start = start
+        for match in self.separators[level].finditer(text, start, end):
+            if match.end() <= piece_start:
+                continue
+            yield from self.split_spans(text, piece_start, match.end(), level + 1)
+            piece_start = match.end()
+
+        yield from self.split_spans(text, piece_start, end, level + 1)
+
+    def feed(self, text: str, page: int = None, offset: int = 0) -> Iterator[Tuple[str, dict]]:
+        """
+        Split one page and yield the `(chunk_text, chunk_metadata)` completed so far.
+
+        :param page: Source page number stored in the chunk metadata.
+        :param offset: Character offset of the page start inside the source file.
+        """
+        for start, end in self.split_spans(text, 0, len(text)):
+            segment_text = text[start:end]
+            segment_length = self.measure(text, start, end)
+
+            if self.window_length + segment_length > self.chunk_size and self.has_new_segments:
+                chunk = self.emit()
+                if chunk:
+                    yield chunk
+
+                while self.window and self.window_length > self.overlap_size:
+                    self.drop_segment()
+
+            while self.window and self.window_length + segment_length > self.chunk_size:
+                self.drop_segment()
+
+            self.window.append((segment_text, segment_length, page, offset + start))
+            self.window_length += segment_length
+            self.has_new_segments = True
+
+    def flush(self) -> Iterator[Tuple[str, dict]]:
+        if self.has_new_segments:
+            chunk = self.emit()
+            if chunk:
+                yield chunk
+
+        self.window.clear()
+        self.window_length = 0
+        self.has_new_segments = False
+
+    def measure(self, text: str, start: int, end: int) -> int:
+        if self.token_counter:
+            return self.token_counter.count(text[start:end])
+        return end - start
+
+    def drop_segment(self):
+        segment = self.window.popleft()
+        self.window_length -= segment[1]
+
+    def emit(self) -> Tuple[str, dict]:
+        self.has_new_segments = False
+
+        chunk_text = "".join([segment[0] for segment in self.window])
+        stripped_text = chunk_text.strip()
+        if not stripped_text:
+            return None
+
+        first_segment, last_segment = self.window[0], self.window[-1]
+        leading_spaces = len(chunk_text) - len(chunk_text.lstrip())
+        trailing_spaces = len(chunk_text) - len(chunk_text.rstrip())
+
+        chunk_metadata = {
+            "start_index": first_segment[3] + leading_spaces,
+            "end_index": last_segment[3] + len(last_segment[0]) - trailing_spaces,
+        }
+        if first_segment[2] is not None:
+            chunk_metadata["page"] = first_segment[2]
+            chunk_metadata["end_page"] = last_segment[2]
+        if self.token_counter:
+            chunk_metadata["token_count"] = self.token_counter.count(stripped_text)
+
+        return stripped_text, chunk_metadata
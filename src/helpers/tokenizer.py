@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import List
+from tokenizers import Tokenizer
+
+
+class TokenCounter:
+    """
+    Counts and truncates text in tokens of the embedding model, using the model
+    tokenizer file (`tokenizer.json`) from local disk.
+    """
+
+    def __init__(self, vocabulary_path: str, cache_size: int = 8192, max_cached_length: int = 8192):
+        self.vocabulary_path = vocabulary_path
+        self.tokenizer = Tokenizer.from_file(vocabulary_path)
+
+        # the same chunks are measured again by the splitter and the providers,
+        # whole pages are not worth keeping in the cache
+        self.max_cached_length = max_cached_length
+        self.cached_count = lru_cache(maxsize=cache_size)(self.encode_count)
+
+    def encode_count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def count(self, text: str) -> int:
+        if len(text) > self.max_cached_length:
+            return self.encode_count(text)
+        return self.cached_count(text)
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(encoding.ids) <= max_tokens:
+            return text
+
+        return text[:encoding.offsets[max_tokens - 1][1]]
+
+    def split_offsets(self, text: str, max_tokens: int) -> List[int]:
+        """
+        Character offsets that cut `text` into pieces of at most `max_tokens` tokens.
+        """
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        return [offsets[i][0] for i in range(max_tokens, len(offsets), max_tokens)]
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(vocabulary_path: str = None) -> TokenCounter:
+    """
+    One counter per process and vocabulary, None when no tokenizer file is configured.
+    """
+    if not vocabulary_path:
+        return None
+
+    return TokenCounter(vocabulary_path=vocabulary_path)
@@ -1,11 +1,20 @@
 from fastapi import FastAPI
-from routes import base,data,nlp
+from routes import base,data,nlp,jobs
 from helpers.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.llm.LLMHttpClient import create_llm_http_client
+from stores.llm.EmbeddingCache import CachedEmbeddingProvider, EmbeddingMemoryCache
+from stores.llm.EmbeddingBatcher import EmbeddingBatcher
+from stores.llm.EmbeddingScheduler import EmbeddingScheduler
+from helpers.tokenizer import get_token_counter
+from models.EmbeddingCacheModel import EmbeddingCacheModel
 from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
 from stores.llm.templates.template_parser import TemplateParser
+from controllers import JobController
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
 #Import metrics setup
 from utils import setup_metrics
@@ -26,7 +35,10 @@ async def startup_span():
 
     )
 
-    llm_provider_factory = LLMProviderFactory(settings)
+    # connection pool shared by the generation and embedding clients
+    app.llm_http_client = create_llm_http_client(settings)
+
+    llm_provider_factory = LLMProviderFactory(settings, http_client=app.llm_http_client)
     vectordb_provider_factory= VectorDBProviderFactory(config=settings,
                                                        db_client=app.db_client)
 
@@ -38,6 +50,34 @@ async def startup_span():
     app.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
     app.embedding_client.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID,
                                              embedding_size= settings.EMBEDDING_MODEL_SIZE)
+
+    app.embedding_client = EmbeddingScheduler(
+        provider=app.embedding_client,
+        token_counter=get_token_counter(settings.EMBEDDING_TOKENIZER_PATH),
+        tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE,
+        max_retries=settings.EMBEDDING_MAX_RETRIES,
+        backoff_base_seconds=settings.EMBEDDING_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=settings.EMBEDDING_BACKOFF_MAX_SECONDS
+    )
+
+    # the batcher sits under the cache, so only cache misses wait for a batch
+    if settings.EMBEDDING_BATCH_MAX_WAIT_MS > 0:
+        app.embedding_client = EmbeddingBatcher(
+            provider=app.embedding_client,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE
+        )
+
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embedding_cache_model = None
+        if settings.EMBEDDING_CACHE_PERSIST:
+            embedding_cache_model = await EmbeddingCacheModel.create_instance(db_client=app.db_client)
+
+        app.embedding_client = CachedEmbeddingProvider(
+            provider=app.embedding_client,
+            memory_cache=EmbeddingMemoryCache(max_bytes=settings.EMBEDDING_CACHE_MEMORY_BYTES),
+            cache_model=embedding_cache_model
+        )
     
     # vectordb client
     app.vectordb_client = vectordb_provider_factory.create(
@@ -51,6 +91,23 @@ async def startup_span():
         default_language=settings.DEFAULT_LANG
     )
 
+    # document parsing runs outside the event loop
+    app.process_executor = ProcessPoolExecutor(
+        max_workers=settings.PROCESS_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+    # background ingestion jobs
+    app.job_controller = JobController(
+        db_client=app.db_client,
+        process_executor=app.process_executor,
+        vectordb_client=app.vectordb_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser
+    )
+    await app.job_controller.start()
+
     
 
 
@@ -58,8 +115,11 @@ async def startup_span():
 
 @app.on_event("shutdown")
 async def shutdown_span():
+    await app.job_controller.stop()
+    app.process_executor.shutdown(wait=False, cancel_futures=True)
     app.db_engine.dispose()
     await app.vectordb_client.disconnect()
+    await app.llm_http_client.aclose()
 
     
 
@@ -71,5 +131,6 @@ async def shutdown_span():
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
 
 
@@ -3,6 +3,9 @@ from .db_schemes import Asset
 from .enums.DataBaseEnum import DataBaseEnum
 from bson import ObjectId
 from sqlalchemy.future import select
+from sqlalchemy import update, func, cast, case
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from typing import Tuple
 
 
 class AssetModel(BaseDataModel):
@@ -43,6 +46,37 @@ class AssetModel(BaseDataModel):
             await session.refresh(asset)
         return asset 
 
+    async def create_asset_unless_uploaded(self, asset: Asset) -> Tuple[Asset, bool]:
+        """
+        Create the asset unless its project already has one with the same `asset_hash`.
+
+        :param asset: Asset object to be created.
+        :return: The created asset and True, or the asset already in the project and False.
+        """
+        values = {
+            column.key: getattr(asset, column.key)
+            for column in Asset.__table__.columns
+            if getattr(asset, column.key) is not None
+        }
+
+        async with self.db_client() as session:
+            async with session.begin():
+                # concurrent uploads of the same content both get here, one insert wins
+                result = await session.execute(
+                    insert(Asset).values(**values)
+                    .on_conflict_do_nothing(index_elements=[Asset.asset_project_id, Asset.asset_hash])
+                    .returning(Asset)
+                )
+                record = result.scalar_one_or_none()
+                if record is not None:
+                    return record, True
+
+                result = await session.execute(select(Asset).where(
+                    Asset.asset_project_id == asset.asset_project_id,
+                    Asset.asset_hash == asset.asset_hash
+                ))
+                return result.scalar_one(), False
+
     async def get_all_project_assets(self, asset_project_id: int, asset_type: str):
         """
         Get all assets for a specific project.
@@ -71,3 +105,43 @@ class AssetModel(BaseDataModel):
             result = await session.execute(stmt)
             records = result.scalar_one_or_none()
         return records
+
+
+    async def get_asset_by_hash(self, asset_hash: str, asset_project_id: int = None):
+        """
+        Get an asset with the same content hash, in the given project or in any project.
+        The oldest one is returned, it is the one the others were copied from.
+
+        :param asset_hash: SHA-256 hex digest of the file content.
+        :param asset_project_id: Restrict the lookup to this project.
+        :return: The matching Asset object or None.
+        """
+        async with self.db_client() as session:
+            stmt = select(Asset).where(Asset.asset_hash == asset_hash)
+            if asset_project_id is not None:
+                stmt = stmt.where(Asset.asset_project_id == asset_project_id)
+
+            stmt = stmt.order_by(Asset.asset_id).limit(1)
+            result = await session.execute(stmt)
+            record = result.scalar_one_or_none()
+        return record
+
+    async def update_asset_config(self, asset_id: int, asset_config: dict):
+        """
+        Merge `asset_config` into the stored asset config.
+
+        :param asset_id: The ID of the asset to update.
+        :param asset_config: Keys to set in the asset config.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Asset)
+                    .where(Asset.asset_id == asset_id)
+                    .values(asset_config=case(
+                        # a None config is stored as a json null, not as NULL
+                        (func.jsonb_typeof(Asset.asset_config) == "object", Asset.asset_config),
+                        else_=cast({}, JSONB)
+                    ).op("||")(cast(asset_config, JSONB)))
+                )
+                await session.execute(stmt)
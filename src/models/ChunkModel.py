@@ -4,7 +4,10 @@ from .enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
 from pymongo import InsertOne
 from sqlalchemy.future import select
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, insert, literal, update, text as sql_text
+import json
+from typing import AsyncIterator, List
+from sqlalchemy.engine import Row
 
 class ChunkModel(BaseDataModel):
     def __init__(self, db_client: object):
@@ -63,6 +66,52 @@ class ChunkModel(BaseDataModel):
             await session.commit()
         return len(chunks)
         
+    async def bulk_insert_chunks(self, chunks: list[dict]) -> list[int]:
+        """
+        Insert chunks with a single COPY, without building ORM objects.
+        The ids are taken from the chunks sequence first, so they are returned in input
+        order; `chunk_uuid`, `chunk_indexed` and `created_at` are left to the database defaults.
+
+        :param chunks: Dicts with `chunk_text`, `chunk_metadata`, `chunk_order`, `chunk_hash`,
+                       `chunk_project_id` and `chunk_asset_id`.
+        :return: The `chunk_id` of every chunk.
+        """
+        if not chunks:
+            return []
+
+        async with self.db_client() as session:
+            async with session.begin():
+                ids_sql = sql_text(
+                    "SELECT nextval(pg_get_serial_sequence('chunks', 'chunk_id')) "
+                    "FROM generate_series(1, :chunks_count)"
+                )
+                result = await session.execute(ids_sql, {"chunks_count": len(chunks)})
+                chunks_ids = result.scalars().all()
+
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+
+                await raw_connection.driver_connection.copy_records_to_table(
+                    DataChunk.__tablename__,
+                    columns=["chunk_id", "chunk_text", "chunk_metadata", "chunk_order",
+                             "chunk_hash", "chunk_project_id", "chunk_asset_id"],
+                    records=[
+                        (
+                            chunk_id,
+                            chunk["chunk_text"],
+                            json.dumps(chunk["chunk_metadata"], ensure_ascii=False)
+                                if chunk.get("chunk_metadata") is not None else None,
+                            chunk["chunk_order"],
+                            chunk.get("chunk_hash"),
+                            chunk["chunk_project_id"],
+                            chunk["chunk_asset_id"],
+                        )
+                        for chunk_id, chunk in zip(chunks_ids, chunks)
+                    ]
+                )
+
+        return chunks_ids
+
     async def delete_chunks_by_project_id(self, project_id: int):
         async with self.db_client() as session:
             stmt = delete(DataChunk).where(DataChunk.chunk_project_id == project_id)
@@ -71,20 +120,167 @@ class ChunkModel(BaseDataModel):
         return result.rowcount
 
 
-    async def get_project_chunks(self, project_id: ObjectId, page_no: int=1, page_size: int=50):
+    async def get_project_chunks(self, project_id: ObjectId, page_no: int=1, page_size: int=50,
+                                 unindexed_only: bool=False):
         async with self.db_client() as session: 
-            stmt = select(DataChunk).where(DataChunk.chunk_project_id == project_id).offset((page_no-1)*page_size).limit(page_size)
+            stmt = select(DataChunk).where(DataChunk.chunk_project_id == project_id)
+            if unindexed_only:
+                stmt = stmt.where(DataChunk.chunk_indexed.is_(False))
+            stmt = stmt.order_by(DataChunk.chunk_id).offset((page_no-1)*page_size).limit(page_size)
             result = await session.execute(stmt)
             records = result.scalars().all()
 
         return records
 
 
-    async def get_total_chunks_count(self, project_id: ObjectId):
+    async def iter_project_chunks(self, project_id: int, page_size: int=50,
+                                  unindexed_only: bool=False) -> AsyncIterator[List[Row]]:
+        """
+        Stream the chunks of a project in pages ordered by `chunk_id`, as light rows with
+        only `chunk_id`, `chunk_text` and `chunk_metadata`.
+        Each page starts after the last id of the previous one, so reading stays linear
+        and chunks flagged while the stream runs are neither skipped nor repeated.
+        """
+        last_chunk_id = 0
+
+        while True:
+            async with self.db_client() as session:
+                stmt = (
+                    select(DataChunk.chunk_id, DataChunk.chunk_text, DataChunk.chunk_metadata)
+                    .where(DataChunk.chunk_project_id == project_id, DataChunk.chunk_id > last_chunk_id)
+                )
+                if unindexed_only:
+                    stmt = stmt.where(DataChunk.chunk_indexed.is_(False))
+                stmt = stmt.order_by(DataChunk.chunk_id).limit(page_size)
+
+                result = await session.execute(stmt)
+                records = result.all()
+
+            if len(records) == 0:
+                return
+
+            yield records
+
+            if len(records) < page_size:
+                return
+            last_chunk_id = records[-1].chunk_id
+
+
+    async def get_total_chunks_count(self, project_id: ObjectId, unindexed_only: bool=False):
         total_count = 0
         async with self.db_client() as session:
             count_sql = select(func.count(DataChunk.chunk_id)).where(DataChunk.chunk_project_id == project_id)
+            if unindexed_only:
+                count_sql = count_sql.where(DataChunk.chunk_indexed.is_(False))
             record_count = await session.execute(count_sql)
             total_count = record_count.scalar()
 
-        return total_count
\ No newline at end of file
+        return total_count
+
+
+    async def get_assets_chunks_count(self, project_id: int) -> dict:
+        """
+        Count the chunks of every asset of a project.
+
+        :return: `{asset_id: chunks_count}` for the assets that have chunks.
+        """
+        async with self.db_client() as session:
+            stmt = (
+                select(DataChunk.chunk_asset_id, func.count(DataChunk.chunk_id))
+                .where(DataChunk.chunk_project_id == project_id)
+                .group_by(DataChunk.chunk_asset_id)
+            )
+            result = await session.execute(stmt)
+            records = {asset_id: chunks_count for asset_id, chunks_count in result.all()}
+        return records
+
+    async def copy_asset_chunks(self, source_asset_id: int, asset_id: int, project_id: int) -> int:
+        """
+        Copy the chunks of an asset to another asset, inside the database.
+        Each copy keeps a `copied_from` reference in its metadata, so its vector can be
+        reused instead of embedding the same text again.
+
+        :return: Number of copied chunks.
+        """
+        copied_from = func.jsonb_build_object(
+            "project_id", DataChunk.chunk_project_id,
+            "chunk_id", DataChunk.chunk_id
+        )
+
+        async with self.db_client() as session:
+            async with session.begin():
+                source_chunks = select(
+                    func.gen_random_uuid(),
+                    DataChunk.chunk_text,
+                    DataChunk.chunk_hash,
+                    func.coalesce(DataChunk.chunk_metadata, func.jsonb_build_object())
+                        .op("||")(func.jsonb_build_object("copied_from", copied_from)),
+                    DataChunk.chunk_order,
+                    literal(project_id),
+                    literal(asset_id),
+                ).where(DataChunk.chunk_asset_id == source_asset_id).order_by(DataChunk.chunk_order)
+
+                stmt = insert(DataChunk).from_select(
+                    ["chunk_uuid", "chunk_text", "chunk_hash", "chunk_metadata", "chunk_order",
+                     "chunk_project_id", "chunk_asset_id"],
+                    source_chunks
+                )
+                result = await session.execute(stmt)
+        return result.rowcount
+
+    async def get_asset_chunks_hashes(self, asset_id: int) -> dict:
+        """
+        Get the stored chunks of an asset by text hash.
+
+        :return: `{chunk_hash: [chunk_id, ...]}`, a text can appear more than once in a file.
+        """
+        records = {}
+        async with self.db_client() as session:
+            stmt = (
+                select(DataChunk.chunk_id, DataChunk.chunk_hash)
+                .where(DataChunk.chunk_asset_id == asset_id)
+                .order_by(DataChunk.chunk_order)
+            )
+            result = await session.execute(stmt)
+            for chunk_id, chunk_hash in result.all():
+                records.setdefault(chunk_hash, []).append(chunk_id)
+        return records
+
+    async def update_chunks_positions(self, chunks: list[dict]):
+        """
+        Update `chunk_order` and `chunk_metadata` of kept chunks, which may have moved in the file.
+
+        :param chunks: Dicts with `chunk_id`, `chunk_order` and `chunk_metadata`.
+        """
+        if not chunks:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(update(DataChunk), chunks)
+        return len(chunks)
+
+    async def delete_chunks_by_ids(self, chunk_ids: list[int]):
+        if not chunk_ids:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = delete(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids))
+                result = await session.execute(stmt)
+        return result.rowcount
+
+    async def set_chunks_indexed(self, chunk_ids: list[int] = None, project_id: int = None,
+                                 indexed: bool = True):
+        """
+        Flag chunks as pushed to the vector db, by ids or for a whole project.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = update(DataChunk).values(chunk_indexed=indexed)
+                if chunk_ids is not None:
+                    stmt = stmt.where(DataChunk.chunk_id.in_(chunk_ids))
+                if project_id is not None:
+                    stmt = stmt.where(DataChunk.chunk_project_id == project_id)
+                result = await session.execute(stmt)
+        return result.rowcount
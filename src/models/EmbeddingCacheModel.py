@@ -0,0 +1,74 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import EmbeddingCache
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+
+
+class EmbeddingCacheModel(BaseDataModel):
+    """
+    EmbeddingCacheModel class for the embeddings stored by text hash.
+    Inherits from BaseDataModel.
+    """
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of EmbeddingCacheModel.
+
+        :param db_client: Database client object.
+        :return: Instance of EmbeddingCacheModel.
+        """
+        instance = cls(db_client)
+        return instance
+
+    async def get_embeddings(self, embedding_model_id: str, document_type: str,
+                             text_hashes: list[str]) -> dict:
+        """
+        Get the stored embeddings of the given text hashes.
+
+        :return: `{text_hash: embedding_vector}` for the hashes found, the vectors as packed float32 bytes.
+        """
+        if not text_hashes:
+            return {}
+
+        async with self.db_client() as session:
+            stmt = select(EmbeddingCache.embedding_text_hash, EmbeddingCache.embedding_vector).where(
+                EmbeddingCache.embedding_model_id == embedding_model_id,
+                EmbeddingCache.embedding_document_type == document_type,
+                EmbeddingCache.embedding_text_hash.in_(text_hashes)
+            )
+            result = await session.execute(stmt)
+            embeddings = {row.embedding_text_hash: row.embedding_vector for row in result}
+        return embeddings
+
+    async def insert_embeddings(self, embedding_model_id: str, document_type: str,
+                                embeddings: dict) -> int:
+        """
+        Store embeddings, keeping the existing row when another worker stored the same text first.
+
+        :param embeddings: `{text_hash: embedding_vector}` with the vectors as packed float32 bytes.
+        :return: The number of rows inserted.
+        """
+        if not embeddings:
+            return 0
+
+        rows = [
+            {
+                "embedding_model_id": embedding_model_id,
+                "embedding_document_type": document_type,
+                "embedding_text_hash": text_hash,
+                "embedding_vector": vector,
+                "embedding_size": len(vector) // 4,
+            }
+            for text_hash, vector in embeddings.items()
+        ]
+
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = insert(EmbeddingCache).values(rows).on_conflict_do_nothing()
+                result = await session.execute(stmt)
+        return result.rowcount
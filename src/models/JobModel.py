@@ -0,0 +1,195 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import Job
+from .enums.JobEnums import JobStatusEnum
+from sqlalchemy.future import select
+from sqlalchemy import update, func, or_, and_
+from datetime import timedelta
+
+
+class JobModel(BaseDataModel):
+    """
+    JobModel class for managing background job data.
+    Inherits from BaseDataModel.
+    This class provides methods to queue, claim and track jobs in the database.
+    """
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of JobModel.
+
+        :param db_client: Database client object.
+        :return: Instance of JobModel.
+        """
+        instance = cls(db_client)
+        return instance
+
+    async def create_job(self, job: Job) -> Job:
+        """
+        Create a new job in the database.
+
+        :param job: Job object to be created.
+        :return: The created job object.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                session.add(job)
+            await session.commit()
+            await session.refresh(job)
+        return job
+
+    async def get_job(self, job_id: int) -> Job:
+        async with self.db_client() as session:
+            stmt = select(Job).where(Job.job_id == job_id)
+            result = await session.execute(stmt)
+            job = result.scalar_one_or_none()
+        return job
+
+    async def claim_next_job(self) -> Job:
+        """
+        Atomically move the oldest pending job to running.
+        `SKIP LOCKED` lets several workers (and uvicorn processes) poll the same table.
+
+        :return: The claimed job, or None if the queue is empty.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    select(Job)
+                    .where(Job.job_status == JobStatusEnum.PENDING.value)
+                    .order_by(Job.job_id)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                result = await session.execute(stmt)
+                job = result.scalar_one_or_none()
+                if job is None:
+                    return None
+
+                job.job_status = JobStatusEnum.RUNNING.value
+                job.job_error = None
+                job.started_at = func.now()
+
+            await session.refresh(job)
+        return job
+
+    async def update_job_progress(self, job_id: int, progress: dict) -> str:
+        """
+        Store the job progress; this also refreshes `updated_at`, which acts as the job heartbeat.
+
+        :return: The current job status, so a running job can notice it was cancelled.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Job)
+                    .where(Job.job_id == job_id)
+                    .values(job_progress=progress)
+                    .returning(Job.job_status)
+                )
+                result = await session.execute(stmt)
+                job_status = result.scalar_one_or_none()
+        return job_status
+
+    async def finish_job(self, job_id: int, job_status: str, progress: dict = None, error: str = None) -> bool:
+        """
+        Record the end of a running job. A job cancelled while it ran stays cancelled,
+        only its progress is stored.
+
+        :return: True if the job took `job_status`.
+        """
+        values = {
+            "job_status": job_status,
+            "job_error": error,
+            "finished_at": func.now(),
+        }
+        if progress is not None:
+            values["job_progress"] = progress
+
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Job)
+                    .where(
+                        Job.job_id == job_id,
+                        Job.job_status.in_([JobStatusEnum.RUNNING.value, job_status])
+                    )
+                    .values(**values)
+                )
+                result = await session.execute(stmt)
+
+                if not result.rowcount and progress is not None:
+                    await session.execute(
+                        update(Job)
+                        .where(Job.job_id == job_id, Job.job_status == JobStatusEnum.CANCELLED.value)
+                        .values(job_progress=progress)
+                    )
+        return bool(result.rowcount)
+
+    async def cancel_job(self, job_id: int) -> Job:
+        """
+        Mark a pending or running job as cancelled.
+
+        :return: The cancelled job, or None if the job is missing or already finished.
+        """
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Job)
+                    .where(
+                        Job.job_id == job_id,
+                        Job.job_status.in_([JobStatusEnum.PENDING.value, JobStatusEnum.RUNNING.value])
+                    )
+                    .values(job_status=JobStatusEnum.CANCELLED.value, finished_at=func.now())
+                    .returning(Job)
+                )
+                result = await session.execute(stmt)
+                job = result.scalar_one_or_none()
+        return job
+
+    async def requeue_jobs(self, job_ids: list[int]) -> int:
+        """
+        Put running jobs back in the queue, used when the worker pool shuts down.
+        """
+        if not job_ids:
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Job)
+                    .where(
+                        Job.job_id.in_(job_ids),
+                        Job.job_status == JobStatusEnum.RUNNING.value
+                    )
+                    .values(job_status=JobStatusEnum.PENDING.value)
+                )
+                result = await session.execute(stmt)
+        return result.rowcount
+
+    async def requeue_stale_jobs(self, stale_after_seconds: int) -> int:
+        """
+        Put back in the queue the running jobs whose heartbeat is older than `stale_after_seconds`,
+        i.e. jobs left behind by a worker that was killed or restarted.
+        """
+        stale_before = func.now() - timedelta(seconds=stale_after_seconds)
+
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    update(Job)
+                    .where(
+                        Job.job_status == JobStatusEnum.RUNNING.value,
+                        or_(
+                            Job.updated_at < stale_before,
+                            and_(Job.updated_at.is_(None), Job.started_at < stale_before)
+                        )
+                    )
+                    .values(job_status=JobStatusEnum.PENDING.value)
+                )
+                result = await session.execute(stmt)
+        return result.rowcount
@@ -3,6 +3,7 @@ from .db_schemes import Project
 from .enums.DataBaseEnum import DataBaseEnum
 from sqlalchemy.future import select
 from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 
 class ProjectModel(BaseDataModel):
     """
@@ -53,13 +54,13 @@ class ProjectModel(BaseDataModel):
                 result = await session.execute(query)
                 project = result.scalar_one_or_none()
                 if project is None:
-                    project_rec = Project(
-                        project_id=project_id,
+                    # concurrent first requests to a new project both get here, one insert wins
+                    await session.execute(
+                        insert(Project).values(project_id=project_id).on_conflict_do_nothing()
                     )
-                    project = await self.create_project(project=project_rec)
-                    return project
-                else:
-                    return project
+                    result = await session.execute(query)
+                    project = result.scalar_one()
+                return project
             
 
         
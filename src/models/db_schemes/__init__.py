@@ -4,4 +4,7 @@
 
 from models.db_schemes.minirag.schemes import Project
 from models.db_schemes.minirag.schemes import Asset
-from models.db_schemes.minirag.schemes import DataChunk, RetrievedDocument
\ No newline at end of file
+from models.db_schemes.minirag.schemes import DataChunk, RetrievedDocument
+from models.db_schemes.minirag.schemes import Job
+from models.db_schemes.minirag.schemes import EmbeddingCache
+from models.db_schemes.minirag.schemes import VectorCollection
@@ -0,0 +1,42 @@
+"""Unique asset hash per project
+
+Revision ID: 4d8b2f6e9a31
+Revises: 9e2d4b7a1c58
+Create Date: 2026-10-18 02:38:10.534951
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f6e9a31'
+down_revision: Union[str, Sequence[str], None] = '9e2d4b7a1c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # duplicates left by concurrent uploads keep their chunks, only the oldest asset keeps the hash
+    op.execute("""
+        UPDATE assets SET asset_hash = NULL
+        WHERE asset_id IN (
+            SELECT asset_id FROM (
+                SELECT asset_id, ROW_NUMBER() OVER (
+                    PARTITION BY asset_project_id, asset_hash ORDER BY asset_id
+                ) AS position
+                FROM assets
+                WHERE asset_hash IS NOT NULL
+            ) AS ranked
+            WHERE position > 1
+        )
+    """)
+    op.create_index('ix_asset_project_hash', 'assets', ['asset_project_id', 'asset_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_asset_project_hash', table_name='assets')
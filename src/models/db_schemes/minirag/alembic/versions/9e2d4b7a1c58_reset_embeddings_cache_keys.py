@@ -0,0 +1,30 @@
+"""Reset embeddings cache keys
+
+Revision ID: 9e2d4b7a1c58
+Revises: 2c9f6e1b4a87
+Create Date: 2026-10-18 09:12:44.618203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2d4b7a1c58'
+down_revision: Union[str, Sequence[str], None] = '2c9f6e1b4a87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # cached embeddings were keyed by the normalized text hash, now by the hash of the exact
+    # text; the old keys could serve the vector of another text, the cache fills again
+    op.execute("DELETE FROM embeddings_cache")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM embeddings_cache")
@@ -1,4 +1,7 @@
 from .minirag_base import SQLAlchemyBase
 from .asset import Asset
 from .data_chunk import DataChunk, RetrievedDocument
-from .project import Project
\ No newline at end of file
+from .project import Project
+from .job import Job
+from .embedding_cache import EmbeddingCache
+from .vector_collection import VectorCollection
@@ -16,6 +16,7 @@ class Asset(SQLAlchemyBase):
     asset_name = Column(String, nullable=False)
     asset_size = Column(Integer, nullable= False)
     asset_config = Column(JSONB, nullable= True)
+    asset_hash = Column(String(64), nullable= True)
 
     asset_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable= False)
 
@@ -31,5 +32,8 @@ class Asset(SQLAlchemyBase):
 
     __table_args__ = (
         Index("ix_asset_project_id",asset_project_id),
-        Index("ix_asset_type",asset_type)
+        Index("ix_asset_type",asset_type),
+        Index("ix_asset_hash",asset_hash),
+        # one asset per content in a project, concurrent uploads of the same file insert once
+        Index("ix_asset_project_hash", asset_project_id, asset_hash, unique=True)
     )
\ No newline at end of file
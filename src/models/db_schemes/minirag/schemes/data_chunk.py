@@ -1,5 +1,5 @@
 from .minirag_base import SQLAlchemyBase
-from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey, Boolean, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy import Index
@@ -11,11 +11,14 @@ class DataChunk(SQLAlchemyBase):
     __tablename__ = "chunks"
 
     chunk_id = Column(Integer, primary_key=True, autoincrement=True)
-    chunk_uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False)
+    chunk_uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, server_default=func.gen_random_uuid(),
+                        unique=True, nullable=False)
 
     chunk_text = Column(String, nullable=False)
     chunk_metadata = Column(JSONB, nullable=True)
     chunk_order = Column(Integer, nullable=False)
+    chunk_hash = Column(String(64), nullable=True)
+    chunk_indexed = Column(Boolean, nullable=False, default=False, server_default=text("false"))
 
     chunk_project_id = Column(Integer, ForeignKey("projects.project_id"), nullable=False)
     chunk_asset_id = Column(Integer, ForeignKey("assets.asset_id"), nullable=False)
@@ -29,6 +32,7 @@ class DataChunk(SQLAlchemyBase):
     __table_args__ = (
         Index('ix_chunk_project_id', chunk_project_id),
         Index('ix_chunk_asset_id', chunk_asset_id),
+        Index('ix_chunk_project_id_indexed', chunk_project_id, chunk_indexed, chunk_id),
     )
 
 class RetrievedDocument(BaseModel):
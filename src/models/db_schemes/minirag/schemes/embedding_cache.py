@@ -0,0 +1,18 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column, Integer, DateTime, func, String, LargeBinary
+
+
+class EmbeddingCache(SQLAlchemyBase):
+
+    __tablename__ = "embeddings_cache"
+
+    # the embedding of a text depends on the model and, for some providers, on the document type
+    embedding_model_id = Column(String, primary_key=True)
+    embedding_document_type = Column(String, primary_key=True)
+    embedding_text_hash = Column(String(64), primary_key=True)
+
+    # float32 values packed little-endian
+    embedding_vector = Column(LargeBinary, nullable=False)
+    embedding_size = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -18,3 +18,4 @@ class Project(SQLAlchemyBase):
 
     assets = relationship("Asset", back_populates="project")
     chunks = relationship("DataChunk", back_populates="project")  
+    jobs = relationship("Job", back_populates="project")
@@ -0,0 +1,24 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column, Integer, DateTime, func, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class VectorCollection(SQLAlchemyBase):
+
+    __tablename__ = "vector_collections"
+
+    # catalog of the pgvector collection tables, written with the table itself
+    collection_name = Column(String, primary_key=True)
+    collection_dimension = Column(Integer, nullable=False)
+    collection_distance = Column(String, nullable=False)
+    collection_index_type = Column(String, nullable=True)
+    # vector, halfvec or bit, fixed when the table is created
+    collection_storage = Column(String, nullable=False, server_default="vector")
+    collection_state = Column(String, nullable=False)
+
+    # rows and parameters of the last index build, a rebuild is due once the table grows enough
+    collection_index_rows = Column(Integer, nullable=True)
+    collection_index_params = Column(JSONB, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class JobTypeEnum(Enum):
+    """
+    Enum for background job types.
+    """
+    PROCESS = "process"
+    PUSH = "push"
+
+
+class JobStatusEnum(Enum):
+    """
+    Enum for background job states.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @classmethod
+    def finished(cls):
+        return [cls.COMPLETED.value, cls.FAILED.value, cls.CANCELLED.value]
@@ -19,4 +19,19 @@ class ResponseSignal(Enum):
     VECTORDB_SEARCH_ERROR = "vectordb_search_error"
     VECTORDB_SEARCH_SUCCESS= "vectordb_search_success"
     RAG_ANSWER_SUCCESS= "rag_answer_succes"
-    RAG_ANSWER_ERROR = "rag_answer_errpr"
\ No newline at end of file
+    RAG_ANSWER_ERROR = "rag_answer_errpr"
+    FILE_UPLOAD_FAILED = "file upload failed"
+    FILE_ALREADY_UPLOADED = "file already uploaded"
+    UPLOAD_SESSION_CREATED = "upload_session_created"
+    UPLOAD_SESSION_RETRIEVED = "upload_session_retrieved"
+    UPLOAD_SESSION_NOT_FOUND = "upload_session_not_found"
+    UPLOAD_OFFSET_MISMATCH = "upload_offset_mismatch"
+    UPLOAD_CHUNK_RECEIVED = "upload_chunk_received"
+    UPLOAD_IN_PROGRESS = "upload_in_progress"
+    FILE_ID_ERROR = "no file found with this id"
+    NO_FILES_ERROR = "no files found for the project"
+    JOB_SUBMITTED = "job_submitted"
+    JOB_RETRIEVED = "job_retrieved"
+    JOB_NOT_FOUND = "job_not_found"
+    JOB_CANCELLED = "job_cancelled"
+    JOB_CANCEL_FAILED = "job_cancel_failed"
@@ -3,18 +3,16 @@ from fastapi.responses import JSONResponse
 import os
 from helpers.config import get_settings, Settings
 #from controllers.DataController import DataController
-from controllers import DataController, ProjectController, ProcessController # i have imported the datacontroller in the __init_.py file in the controllers folder so i can import it like this
-import aiofiles
+from controllers import DataController, ProjectController, UploadController # i have imported the datacontroller in the __init_.py file in the controllers folder so i can import it like this
 from models import ResponseSignal
 import logging 
-from .schemes.data import ProcessRequest
+from .schemes.data import ProcessRequest, UploadSessionRequest
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
-from models.db_schemes import DataChunk, Asset
+from models.db_schemes import Asset
 from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
 from models.enums.AssetTypeEnum import AssetTypeEnum
-from bson import ObjectId
-from controllers import NLPController
+from models.enums.JobEnums import JobTypeEnum
 
 
 logger = logging.getLogger("uvicorn.error")
@@ -56,9 +54,7 @@ async def upload_data(request:Request, project_id: int, file: UploadFile,
     file_path, file_id = data_controller.generate_unique_filepath(file.filename, project_id)
 
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                await f.write(chunk)
+        file_size, file_hash = await data_controller.write_uploaded_file(file, file_path)
 
     except Exception as e:
         logger.error(f"Error uploading file: {e}")
@@ -69,17 +65,90 @@ async def upload_data(request:Request, project_id: int, file: UploadFile,
             }
         )
     
-    # create an asset record in the database
+    return await register_uploaded_file(
+        request=request,
+        project=project,
+        file_path=file_path,
+        file_id=file_id,
+        file_size=file_size,
+        file_hash=file_hash
+    )
+
+
+def already_uploaded_response(file_path: str, file_id: str, asset_record) -> JSONResponse:
+    # a retried upload registration finds its own asset, whose file it must keep
+    if asset_record.asset_name != file_id:
+        os.remove(file_path)
+    logger.info(f"File {file_id} already uploaded as {asset_record.asset_name}")
+
+    return JSONResponse(
+        content={
+            "message": ResponseSignal.FILE_ALREADY_UPLOADED.value,
+            "file_id": str(asset_record.asset_id),
+            "asset_name": asset_record.asset_name
+        }
+    )
+
+
+async def register_uploaded_file(request: Request, project, file_path: str, file_id: str,
+                                 file_size: int, file_hash: str) -> JSONResponse:
+    """
+    Create the asset of a file written to the project directory, unless the same
+    content was already uploaded to the project.
+    """
     asset_model = await AssetModel.create_instance(request.app.db_client)
+
+    # the same content was already uploaded to this project
+    asset_record = await asset_model.get_asset_by_hash(
+        asset_hash=file_hash,
+        asset_project_id=project.project_id
+    )
+
+    if asset_record is not None:
+        return already_uploaded_response(file_path=file_path, file_id=file_id, asset_record=asset_record)
+
+    # the same content was uploaded to another project, reuse its blob and chunks
+    source_asset = await asset_model.get_asset_by_hash(asset_hash=file_hash)
+    asset_config = None
+
+    if source_asset is not None:
+        source_path = os.path.join(
+            ProjectController().get_project_path(source_asset.asset_project_id),
+            source_asset.asset_name
+        )
+        DataController().reuse_stored_file(source_path=source_path, file_path=file_path)
+
+        asset_config = {
+            **(source_asset.asset_config or {}),
+            "copied_from": source_asset.asset_id
+        }
+
+    # create an asset record in the database
     asset_resource = Asset(
         asset_project_id= project.project_id,
         asset_type= AssetTypeEnum.FILE.value,
         asset_name= file_id,
-        asset_size= os.path.getsize(file_path)
+        asset_size= file_size,
+        asset_hash= file_hash,
+        asset_config= asset_config
     )
 
-    asset_record = await asset_model.create_asset(asset_resource)
-    logger.info(f"File {file.filename} uploaded successfully to {file_path}")
+    asset_record, is_created = await asset_model.create_asset_unless_uploaded(asset_resource)
+
+    if not is_created:
+        # a concurrent upload of the same content registered it first
+        return already_uploaded_response(file_path=file_path, file_id=file_id, asset_record=asset_record)
+
+    if source_asset is not None:
+        chunk_model = await ChunkModel.create_instance(request.app.db_client)
+        copied_chunks = await chunk_model.copy_asset_chunks(
+            source_asset_id=source_asset.asset_id,
+            asset_id=asset_record.asset_id,
+            project_id=project.project_id
+        )
+        logger.info(f"Reused {copied_chunks} chunks of asset {source_asset.asset_id} for {file_id}")
+
+    logger.info(f"File {file_id} uploaded successfully to {file_path}")
 
     return JSONResponse(
         content={
@@ -88,6 +157,175 @@ async def upload_data(request:Request, project_id: int, file: UploadFile,
         }
     )
 
+
+@data_router.post("/upload/{project_id}/sessions")
+async def create_upload_session(request: Request, project_id: int, upload_request: UploadSessionRequest):
+
+    project_model = await ProjectModel.create_instance(request.app.db_client)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    upload_controller = UploadController(project_id=project.project_id)
+
+    is_valid, result_signal = upload_controller.validate_session(
+        file_size=upload_request.file_size,
+        content_type=upload_request.content_type
+    )
+
+    if not is_valid:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": result_signal.value,
+            }
+        )
+
+    session = upload_controller.create_session(
+        file_name=upload_request.file_name,
+        file_size=upload_request.file_size,
+        content_type=upload_request.content_type
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_CREATED.value,
+            "upload_id": session["upload_id"],
+            "file_size": session["file_size"],
+            "offset": 0
+        }
+    )
+
+
+@data_router.get("/upload/{project_id}/sessions/{upload_id}")
+async def get_upload_session(request: Request, project_id: int, upload_id: str):
+
+    upload_controller = UploadController(project_id=project_id)
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value,
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_RETRIEVED.value,
+            "upload_id": session["upload_id"],
+            "file_size": session["file_size"],
+            "offset": session["offset"]
+        }
+    )
+
+
+# the request body is the raw file content starting at `offset`, a whole file or one part of it
+@data_router.put("/upload/{project_id}/sessions/{upload_id}")
+async def upload_session_chunk(request: Request, project_id: int, upload_id: str, offset: int = 0):
+
+    project_model = await ProjectModel.create_instance(request.app.db_client)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    upload_controller = UploadController(project_id=project.project_id)
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value,
+            }
+        )
+
+    if session["completed"]:
+        # the file is complete but was not registered, the request only registers it
+        return await register_uploaded_session(request=request, project=project,
+                                               upload_controller=upload_controller, session=session)
+
+    try:
+        result_signal, received = await upload_controller.write_chunk(
+            session=session,
+            stream=request.stream(),
+            offset=offset
+        )
+
+    except Exception as e:
+        logger.error(f"Error uploading file: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.FILE_UPLOAD_FAILED.value,
+            }
+        )
+
+    if result_signal == ResponseSignal.UPLOAD_SESSION_NOT_FOUND:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": result_signal.value,
+            }
+        )
+
+    if result_signal != ResponseSignal.UPLOAD_CHUNK_RECEIVED:
+        return JSONResponse(
+            status_code=(
+                status.HTTP_409_CONFLICT
+                if result_signal in (ResponseSignal.UPLOAD_OFFSET_MISMATCH, ResponseSignal.UPLOAD_IN_PROGRESS)
+                else status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            ),
+            content={
+                "signal": result_signal.value,
+                "offset": received
+            }
+        )
+
+    if received < session["file_size"]:
+        return JSONResponse(
+            content={
+                "signal": result_signal.value,
+                "upload_id": session["upload_id"],
+                "file_size": session["file_size"],
+                "offset": received
+            }
+        )
+
+    return await register_uploaded_session(request=request, project=project,
+                                           upload_controller=upload_controller, session=session)
+
+
+async def register_uploaded_session(request: Request, project, upload_controller: UploadController,
+                                    session: dict) -> JSONResponse:
+    """
+    Register the asset of a complete upload, then delete its session. On failure the
+    session is kept, so the client can send the request again to retry.
+    """
+    try:
+        file_path, file_id, file_size, file_hash = await upload_controller.complete_session(session=session)
+
+        response = await register_uploaded_file(
+            request=request,
+            project=project,
+            file_path=file_path,
+            file_id=file_id,
+            file_size=file_size,
+            file_hash=file_hash
+        )
+
+    except Exception as e:
+        logger.error(f"Error registering upload {session['upload_id']}: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "signal": ResponseSignal.FILE_UPLOAD_FAILED.value,
+                "upload_id": session["upload_id"],
+            }
+        )
+
+    upload_controller.delete_session(session, keep_file=True)
+    return response
+
+
 # this is the endpoint to process the file and save the chunks to the database
 # it will be called after the file is uploaded successfully
 @data_router.post("/process/{project_id}")
@@ -105,13 +343,6 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
         project_id=project_id
     )
 
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_client= request.app.generation_client,
-        embedding_client= request.app.embedding_client,
-        template_parser=request.app.template_parser
-    )
-
     asset_model = await AssetModel.create_instance(
             db_client=request.app.db_client
         )
@@ -156,69 +387,23 @@ async def process_endpoint(request: Request, project_id: int, process_request: P
             }
         )
     
-    process_controller = ProcessController(project_id=project_id)
-
-    no_records = 0
-    no_files = 0
-
-    chunk_model = await ChunkModel.create_instance(
-                        db_client=request.app.db_client
-                    )
-
-    if do_reset == 1:
-        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-        
-        # delete the associated vectors collection
-        _ = await request.app.vectordb_client.delete_collection(collection_name=collection_name)
-        
-        # delete the associated chunks
-        _ = await chunk_model.delete_chunks_by_project_id(
-            project_id=project.project_id
-        )
-
-
-    for asset_id, file_id in project_files_ids.items():
-
-        file_content = process_controller.get_file_content(file_id=file_id)
-
-        if file_content is None:
-            logger.error(f"Error while processing file: {file_id}")
-            continue
-
-        file_chunks = process_controller.process_file_content(
-            file_content=file_content,
-            file_id=file_id,
-            chunk_size=chunk_size,
-            overlap_size=overlap_size
-        )
-
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal": ResponseSignal.PROCESSING_FAILED.value
-                }
-            )
-
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order=i+1,
-                chunk_project_id=project.project_id,
-                chunk_asset_id=asset_id
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
-
-        no_records += await chunk_model.insert_many_chunks(chunks=file_chunks_records)
-        no_files += 1
+    job = await request.app.job_controller.submit(
+        project_id=project.project_id,
+        job_type=JobTypeEnum.PROCESS,
+        job_config={
+            "file_id": process_request.file_id,
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            "do_reset": do_reset,
+            "separators": process_request.separators,
+        }
+    )
 
     return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
         content={
-            "signal": ResponseSignal.PROCESSING_SUCCESS.value,
-            "inserted_chunks": no_records,
-            "processed_files": no_files
+            "signal": ResponseSignal.JOB_SUBMITTED.value,
+            "job_id": job.job_id
         }
     )
 
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, status, Request
+from fastapi.responses import JSONResponse
+from models.JobModel import JobModel
+from models.db_schemes import Job
+from models import ResponseSignal
+import logging
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+jobs_router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["api_v1", "jobs"],
+)
+
+
+def serialize_job(job: Job) -> dict:
+    return {
+        "job_id": job.job_id,
+        "job_type": job.job_type,
+        "job_status": job.job_status,
+        "project_id": job.job_project_id,
+        "config": job.job_config,
+        "error": job.job_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@jobs_router.get("/{job_id}")
+async def get_job_status(request: Request, job_id: int):
+
+    job_model = await JobModel.create_instance(request.app.db_client)
+    job = await job_model.get_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code = status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RETRIEVED.value,
+            "job": serialize_job(job)
+        }
+    )
+
+
+@jobs_router.get("/{job_id}/progress")
+async def get_job_progress(request: Request, job_id: int):
+
+    job_model = await JobModel.create_instance(request.app.db_client)
+    job = await job_model.get_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code = status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RETRIEVED.value,
+            "job_id": job.job_id,
+            "job_status": job.job_status,
+            "progress": job.job_progress
+        }
+    )
+
+
+@jobs_router.post("/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: int):
+
+    job = await request.app.job_controller.cancel(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code = status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.JOB_CANCEL_FAILED.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_CANCELLED.value,
+            "job": serialize_job(job)
+        }
+    )
@@ -1,12 +1,12 @@
 from fastapi import FastAPI, APIRouter, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from routes.schemes.nlp import PushRequest,SearchRequest
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
 from models import ResponseSignal
+from models.enums.JobEnums import JobTypeEnum
 from controllers import NLPController
+import json
 import logging
-from tqdm.auto import tqdm
 
 
 logger = logging.getLogger("uvicorn.error")
@@ -23,10 +23,6 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
 
     project_model = await ProjectModel.create_instance(request.app.db_client) # get the project model from the request app's db_client
 
-    chunk_model = await ChunkModel.create_instance(
-        db_client = request.app.db_client
-    )
-
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
@@ -39,80 +35,24 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
                 "signal": ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
             }
         )
-    
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client= request.app.generation_client,
-        embedding_client= request.app.embedding_client,
-        template_parser= request.app.template_parser
-    )
-
-    has_records = True
-    page_no = 1
-    inserted_items_count =0
-    idx= 0
-
-
-    # create collection if not exists
-    collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-
-    _ = await request.app.vectordb_client.create_collection(
-        collection_name = collection_name,
-        embedding_size= request.app.embedding_client.embedding_size,
-        do_reset = push_request.do_reset,
 
+    job = await request.app.job_controller.submit(
+        project_id=project.project_id,
+        job_type=JobTypeEnum.PUSH,
+        job_config={
+            "do_reset": push_request.do_reset,
+        }
     )
-    
-
-    # setup batching 
-
-    total_chunks_count = await chunk_model.get_total_chunks_count(project_id=project.project_id)
-    pbar = tqdm(total=total_chunks_count, desc="Vector Indexing", position=0)
-
-
-    while has_records:
-
-        page_chunks = await chunk_model.get_project_chunks(project_id= project.project_id,page_no=page_no)
 
-        if len(page_chunks):
-            page_no +=1
-
-        if not page_no or len(page_chunks) ==0 :
-            has_records = False
-            break
-
-        chunks_ids = [ c.chunk_id for c in page_chunks ]
-        idx += len(page_chunks)
-
-        is_inserted = await nlp_controller.index_into_vector_db(
-            chunks_ids= chunks_ids,
-            project= project,
-            chunks=page_chunks,
-        )
-
-        if not is_inserted:
-            return JSONResponse(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            content={
-                "signal": ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value
-            }
-        )
-
-        pbar.update(len(page_chunks))
-        inserted_items_count += len(page_chunks)
-
-    
     return JSONResponse(
+        status_code = status.HTTP_202_ACCEPTED,
         content={
-            "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCES.value,
-            "inserted_items_counts": inserted_items_count
+            "signal": ResponseSignal.JOB_SUBMITTED.value,
+            "job_id": job.job_id
         }
     )
 
 
-    # chunks = chunk_model.get_project_chunks(project_id= project.project_id)
-
-
 @nlp_router.get("/index/info/{project_id}")
 async def get_project_index_info(request: Request, project_id: int):
 
@@ -159,7 +99,8 @@ async def search_index(request: Request, project_id: int, search_request:SearchR
     results = await nlp_controller.search_vector_db_collection(
         project= project,
         text= search_request.text,
-        limit= search_request.limit
+        limit= search_request.limit,
+        search_params= search_request.get_search_params()
     )
 
     if not results :
@@ -194,10 +135,19 @@ async def answer_rag(request: Request, project_id: int, search_request:SearchReq
         template_parser = request.app.template_parser
     )
 
+    if search_request.stream:
+        return StreamingResponse(
+            stream_rag_answer(nlp_controller, project, search_request),
+            media_type="application/x-ndjson",
+            # proxies buffer responses by default, the events must reach the client as they come
+            headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"}
+        )
+
     answer, full_prompt, chat_history = await nlp_controller.answer_rag_question(
         project= project,
         query=search_request.text,
-        limit= search_request.limit
+        limit= search_request.limit,
+        search_params= search_request.get_search_params()
     )
 
     if not answer:
@@ -215,5 +165,23 @@ async def answer_rag(request: Request, project_id: int, search_request:SearchReq
                 "full_prompt": full_prompt,
                 "chat_history":chat_history
             }
-        )  
+        )
 
+
+async def stream_rag_answer(nlp_controller: NLPController, project, search_request: SearchRequest):
+    """
+    One json object per line, flushed as soon as it is produced.
+    """
+    try:
+        async for event in nlp_controller.stream_rag_answer(
+            project= project,
+            query= search_request.text,
+            limit= search_request.limit,
+            search_params= search_request.get_search_params()
+        ):
+            yield json.dumps(event) + "\n"
+
+    except Exception as e:
+        # the status line is already sent, the error can only be reported in the stream
+        logger.error(f"Error while streaming the answer: {e}")
+        yield json.dumps({"type": "error", "signal": ResponseSignal.RAG_ANSWER_ERROR.value}) + "\n"
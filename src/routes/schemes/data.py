@@ -1,9 +1,25 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import Optional, List
+from helpers.text_splitter import SEPARATORS
+
+class UploadSessionRequest(BaseModel):
+    file_name: str
+    file_size: int
+    content_type: str
+
 
 class ProcessRequest(BaseModel):
     file_id: str = None
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int] = 20
     do_reset: Optional[int] = 0
+    separators: Optional[List[str]] = None # e.g. ["paragraph", "line", "sentence", "word"]
 
+    @field_validator("separators")
+    @classmethod
+    def validate_separators(cls, separators):
+        if separators is not None:
+            unknown = [s for s in separators if s not in SEPARATORS]
+            if unknown:
+                raise ValueError(f"unknown separators {unknown}, expected any of {list(SEPARATORS)}")
+        return separators
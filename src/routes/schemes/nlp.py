@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -7,4 +7,14 @@ class PushRequest(BaseModel):
 
 class SearchRequest(BaseModel):
     text: str
-    limit: Optional[int] = 5
\ No newline at end of file
+    limit: Optional[int] = Field(default=5, ge=1, le=1000)
+    # answer as NDJSON events, the documents first then the tokens as they are generated
+    stream: Optional[bool] = False
+    # vector search overrides of the configured defaults, more recall for more latency
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000) # HNSW candidate list size
+    probes: Optional[int] = Field(default=None, ge=1) # IVFFlat lists to scan
+    rerank_factor: Optional[int] = Field(default=None, ge=1, le=100) # candidates re-ranked per result, quantized collections
+    exact: Optional[bool] = None # full scan instead of the index, the true nearest neighbors
+
+    def get_search_params(self) -> dict:
+        return self.model_dump(include={"ef_search", "probes", "rerank_factor", "exact"}, exclude_none=True)
\ No newline at end of file
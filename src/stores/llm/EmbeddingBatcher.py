@@ -0,0 +1,94 @@
+from .LLMInterface import LLMInterface
+from .LLMProviderWrapper import LLMProviderWrapper
+from .LLMEnums import DocumentTypeEnum
+from utils.metrics import EMBEDDING_BATCH_SIZE
+from typing import List, Union
+import asyncio
+import logging
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class EmbeddingBatcher(LLMProviderWrapper):
+    """
+    Groups the query embeddings of concurrent requests into one provider call.
+
+    A query text waits at most `max_wait_ms` for others to join its batch, and a batch is
+    sent as soon as it holds `max_batch_size` texts. Document embeddings are already sent
+    in pages by the index push, so they go straight to the provider.
+    """
+
+    def __init__(self, provider: LLMInterface, max_wait_ms: float, max_batch_size: int):
+        super().__init__(provider=provider)
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self.pending = []
+        self.flush_timer = None
+        # keep a reference to the running batches, the event loop only holds weak ones
+        self.batch_tasks = set()
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None,
+                         token_counts: List[int]= None) -> list:
+
+        if isinstance(text, str):
+            text = [text]
+
+        if document_type != DocumentTypeEnum.QUERY.value or len(text) >= self.max_batch_size:
+            return await self.embed_provider_text(text=text, document_type=document_type,
+                                                  token_counts=token_counts)
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for t in text:
+            future = loop.create_future()
+            self.pending.append((t, future))
+            futures.append(future)
+
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.flush_timer is None:
+            self.flush_timer = loop.call_later(self.max_wait_seconds, self.flush)
+
+        vectors = await asyncio.gather(*futures)
+        if any(v is None for v in vectors):
+            return None
+
+        return list(vectors)
+
+    def flush(self):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+
+        pending, self.pending = self.pending, []
+        for i in range(0, len(pending), self.max_batch_size):
+            task = asyncio.create_task(self.run_batch(pending[i:i + self.max_batch_size]))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def run_batch(self, batch: list):
+        # requests cancelled while waiting do not need their text embedded
+        batch = [(t, future) for t, future in batch if not future.done()]
+        if not batch:
+            return
+
+        EMBEDDING_BATCH_SIZE.observe(len(batch))
+
+        try:
+            vectors = await self.provider.embed_text(text=[t for t, _ in batch],
+                                                     document_type=DocumentTypeEnum.QUERY.value)
+        except Exception as e:
+            logger.error(f"Batched query embedding failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if not vectors or len(vectors) != len(batch):
+            vectors = [None] * len(batch)
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
@@ -0,0 +1,153 @@
+from .LLMInterface import LLMInterface
+from .LLMProviderWrapper import LLMProviderWrapper
+from .LLMEnums import DocumentTypeEnum
+from utils.metrics import EMBEDDING_CACHE_REQUESTS, EMBEDDING_CACHE_BYTES, EMBEDDING_CACHE_STORED_BYTES
+from collections import OrderedDict
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List, Union
+import hashlib
+import logging
+import struct
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def pack_vector(vector: list) -> bytes:
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_vector(data: bytes) -> list:
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+def get_embedding_text_hash(text: str) -> str:
+    # the exact text sent to the provider: texts that only differ in whitespace or unicode
+    # form may embed differently, unlike the normalized hash chunks are deduplicated by
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingMemoryCache:
+    """
+    In-process LRU of packed embeddings, bounded by the bytes it holds rather than the entry count
+    so the budget does not depend on the embedding size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.entries = OrderedDict()
+
+    def get(self, key: tuple) -> bytes:
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def set(self, key: tuple, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+
+        self.entries[key] = data
+        self.size_bytes += len(data)
+
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+        EMBEDDING_CACHE_BYTES.set(self.size_bytes)
+
+
+class CachedEmbeddingProvider(LLMProviderWrapper):
+    """
+    Wraps a provider so `embed_text` is served from two cache tiers before calling it:
+    the in-process LRU, then the `embeddings_cache` table shared by every worker.
+    Embeddings are keyed by (embedding model id, document type, SHA-256 of the exact text);
+    only the texts missing from both tiers go to the provider, in one call.
+    """
+
+    def __init__(self, provider: LLMInterface, memory_cache: EmbeddingMemoryCache, cache_model=None):
+        super().__init__(provider=provider)
+        self.memory_cache = memory_cache
+        # None keeps the cache in process only
+        self.cache_model = cache_model
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None,
+                         token_counts: List[int]= None) -> list:
+
+        if isinstance(text, str):
+            text = [text]
+        if token_counts is None:
+            token_counts = [None] * len(text)
+
+        model_id = self.provider.embedding_model_id
+        document_type = document_type or DocumentTypeEnum.DOCUMENT.value
+        text_hashes = [get_embedding_text_hash(t) for t in text]
+
+        # step1: in-process cache
+        found = {}
+        for text_hash in set(text_hashes):
+            data = self.memory_cache.get((model_id, document_type, text_hash))
+            if data is not None:
+                found[text_hash] = data
+        self.count_lookups(tier="memory", hits=len(found), lookups=len(set(text_hashes)))
+
+        # step2: database cache
+        missing_hashes = [h for h in dict.fromkeys(text_hashes) if h not in found]
+        if missing_hashes and self.cache_model:
+            stored = await self.get_stored_embeddings(model_id, document_type, missing_hashes)
+            self.count_lookups(tier="database", hits=len(stored), lookups=len(missing_hashes))
+
+            for text_hash, data in stored.items():
+                self.memory_cache.set((model_id, document_type, text_hash), data)
+            found.update(stored)
+
+        # step3: one provider call for the rest, each distinct text once
+        missing = {h: (t, n) for h, t, n in zip(text_hashes, text, token_counts) if h not in found}
+        if missing:
+            vectors = await self.embed_provider_text(text=[t for t, _ in missing.values()],
+                                                     document_type=document_type,
+                                                     token_counts=[n for _, n in missing.values()])
+            if not vectors or len(vectors) != len(missing):
+                return None
+
+            computed = {h: pack_vector(v) for h, v in zip(missing.keys(), vectors)}
+            for text_hash, data in computed.items():
+                self.memory_cache.set((model_id, document_type, text_hash), data)
+            if self.cache_model:
+                await self.store_embeddings(model_id, document_type, computed)
+            found.update(computed)
+
+        # vectors are always returned from their float32 form, so a text embeds the same whether it was cached or not
+        return [unpack_vector(found[h]) for h in text_hashes]
+
+    async def get_stored_embeddings(self, model_id: str, document_type: str, text_hashes: list) -> dict:
+        try:
+            return await self.cache_model.get_embeddings(embedding_model_id=model_id,
+                                                         document_type=document_type,
+                                                         text_hashes=text_hashes)
+        except SQLAlchemyError as e:
+            # the cache only saves provider calls, it must not fail them
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+
+    async def store_embeddings(self, model_id: str, document_type: str, embeddings: dict):
+        try:
+            await self.cache_model.insert_embeddings(embedding_model_id=model_id,
+                                                     document_type=document_type,
+                                                     embeddings=embeddings)
+        except SQLAlchemyError as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+            return
+
+        EMBEDDING_CACHE_STORED_BYTES.labels(tier="database").inc(sum(len(d) for d in embeddings.values()))
+
+    def count_lookups(self, tier: str, hits: int, lookups: int):
+        if hits:
+            EMBEDDING_CACHE_REQUESTS.labels(tier=tier, result="hit").inc(hits)
+        if lookups - hits:
+            EMBEDDING_CACHE_REQUESTS.labels(tier=tier, result="miss").inc(lookups - hits)
@@ -0,0 +1,205 @@
+from .LLMInterface import LLMInterface
+from .LLMProviderWrapper import LLMProviderWrapper
+from helpers.tokenizer import TokenCounter
+from utils.metrics import EMBEDDING_PROVIDER_CALLS, EMBEDDING_BATCH_LIMIT
+from typing import List, Tuple, Union
+import asyncio
+import httpx
+import logging
+import random
+import time
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class TokenBucket:
+    """
+    Client side view of a tokens-per-minute budget: it holds up to a minute of tokens
+    and refills continuously. Callers wait in arrival order until their tokens are available.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.tokens = tokens_per_minute
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: int):
+        if not self.capacity:
+            return
+
+        # a request larger than the whole budget can only wait for a full bucket
+        tokens = min(tokens, self.capacity)
+
+        async with self.lock:
+            self.refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= tokens
+
+    def drain(self):
+        """
+        The provider throttled us, so its budget is spent whatever this bucket thinks.
+        """
+        if self.capacity:
+            self.refill()
+            self.tokens = 0
+
+
+class EmbeddingScheduler(LLMProviderWrapper):
+    """
+    Sends the texts of an `embed_text` call in batches that fit the provider limits
+    (texts and tokens per request, tokens per minute) and retries throttled (429) and
+    failed (5xx, connection) calls with jittered exponential backoff.
+
+    The batch size adapts to the provider: it grows a little after every successful
+    call and is halved when the provider throttles, within `max_batch_items`.
+    """
+
+    def __init__(self, provider: LLMInterface, token_counter: TokenCounter = None,
+                 tokens_per_minute: int = 0, max_batch_items: int = None, max_batch_tokens: int = None,
+                 max_retries: int = 5, backoff_base_seconds: float = 0.5, backoff_max_seconds: float = 30.0):
+        super().__init__(provider=provider)
+        self.token_counter = token_counter
+        self.token_bucket = TokenBucket(tokens_per_minute=tokens_per_minute)
+
+        self.max_batch_items = max_batch_items or getattr(provider, "embedding_max_batch_items", None) or 96
+        self.max_batch_tokens = max_batch_tokens or getattr(provider, "embedding_max_batch_tokens", None)
+        self.batch_items = max(1, self.max_batch_items // 4)
+        EMBEDDING_BATCH_LIMIT.set(self.batch_items)
+
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None,
+                         token_counts: List[int]= None) -> list:
+
+        if isinstance(text, str):
+            text = [text]
+
+        tokens_counts = self.count_tokens(text, token_counts=token_counts)
+        vectors = []
+        attempt = 0
+
+        while len(vectors) < len(text):
+            start = len(vectors)
+            size = self.get_batch_size(tokens_counts[start:])
+            batch_tokens = sum(tokens_counts[start:start + size])
+
+            await self.token_bucket.acquire(batch_tokens)
+
+            try:
+                batch_vectors = await self.embed_provider_text(text=text[start:start + size],
+                                                               document_type=document_type,
+                                                               token_counts=tokens_counts[start:start + size])
+            except Exception as e:
+                throttled, retryable = self.classify_error(e)
+                EMBEDDING_PROVIDER_CALLS.labels(result="throttled" if throttled else "error").inc()
+
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                attempt += 1
+                if throttled:
+                    self.shrink_batch_size()
+                    self.token_bucket.drain()
+
+                delay = self.get_retry_delay(e, attempt)
+                logger.warning(f"Embedding call for {size} texts failed ({e.__class__.__name__}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            EMBEDDING_PROVIDER_CALLS.labels(result="ok").inc()
+
+            if not batch_vectors or len(batch_vectors) != size:
+                return None
+
+            vectors.extend(batch_vectors)
+            attempt = 0
+            self.grow_batch_size()
+
+        return vectors
+
+    def count_tokens(self, texts: List[str], token_counts: List[int] = None) -> List[int]:
+        """
+        Token count of each text. `token_counts` holds the counts already known, such as the
+        ones the splitter stored on the chunks, and None for the texts still to tokenize.
+        """
+        if token_counts is None:
+            token_counts = [None] * len(texts)
+
+        unknown = [i for i, count in enumerate(token_counts) if count is None]
+        if not unknown:
+            return list(token_counts)
+
+        unknown_texts = [texts[i] for i in unknown]
+        if self.token_counter:
+            counted = self.token_counter.count_many(unknown_texts)
+        else:
+            # without the model tokenizer, about four characters per token
+            counted = [len(t) // 4 + 1 for t in unknown_texts]
+
+        token_counts = list(token_counts)
+        for i, count in zip(unknown, counted):
+            token_counts[i] = count
+        return token_counts
+
+    def get_batch_size(self, tokens_counts: List[int]) -> int:
+        size = min(self.batch_items, len(tokens_counts))
+        if not self.max_batch_tokens:
+            return size
+
+        batch_tokens = 0
+        for i in range(size):
+            batch_tokens += tokens_counts[i]
+            if batch_tokens > self.max_batch_tokens:
+                return max(1, i)
+        return size
+
+    def grow_batch_size(self):
+        self.batch_items = min(self.max_batch_items, self.batch_items + max(1, self.max_batch_items // 16))
+        EMBEDDING_BATCH_LIMIT.set(self.batch_items)
+
+    def shrink_batch_size(self):
+        self.batch_items = max(1, self.batch_items // 2)
+        EMBEDDING_BATCH_LIMIT.set(self.batch_items)
+
+    def classify_error(self, e: Exception) -> Tuple[bool, bool]:
+        """
+        :return: `(throttled, retryable)`. Both SDKs expose the HTTP status as `status_code`
+        and wrap connection errors around the httpx ones.
+        """
+        status_code = getattr(e, "status_code", None)
+        if status_code == 429:
+            return True, True
+        if status_code is not None:
+            return False, status_code >= 500 or status_code == 408
+
+        return False, isinstance(e, httpx.TransportError) or isinstance(e.__cause__, httpx.TransportError)
+
+    def get_retry_delay(self, e: Exception, attempt: int) -> float:
+        # full jitter, so the workers throttled together do not retry together
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+        # the OpenAI errors carry the response, with the wait the API asks for
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            if "retry-after-ms" in headers:
+                return max(delay, float(headers["retry-after-ms"]) / 1000)
+            if "retry-after" in headers:
+                return max(delay, float(headers["retry-after"]))
+        except ValueError:
+            pass
+
+        return delay
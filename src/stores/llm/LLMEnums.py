@@ -6,6 +6,7 @@ class LLMEnum(Enum):
 
     OPENAI = "OPENAI"
     COHERE = "COHERE"
+    LOCAL = "LOCAL"
 
 
 class OpenAIEnum(Enum):
@@ -26,6 +27,14 @@ class CoHereEnums(Enum):
     QUERY = 'search_query'
 
 
+class LocalEnum(Enum):
+    """Enum for the local provider."""
+
+    SYSTEM= "system"
+    USER = "user"
+    ASSISTANT = "assistant"
+
+
 class DocumentTypeEnum(Enum):
     DOCUMENT = 'document'
     QUERY = 'query'
@@ -0,0 +1,34 @@
+import httpx
+import logging
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def create_llm_http_client(config) -> httpx.AsyncClient:
+    """
+    One pooled HTTP client shared by the LLM providers: connections are kept alive
+    between calls and HTTP/2 multiplexes concurrent requests when the API supports it.
+    Per-call timeouts are set by the providers on top of these defaults.
+    """
+    http2 = config.LLM_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 needs the `h2` package (httpx[http2]), falling back to HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            config.LLM_GENERATION_TIMEOUT_SECONDS,
+            connect=config.LLM_HTTP_CONNECT_TIMEOUT_SECONDS,
+        ),
+        follow_redirects=True,
+    )
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 class LLMInterface(ABC):
 
@@ -23,8 +24,8 @@ class LLMInterface(ABC):
 
 
     @abstractmethod
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                      temperature: float= None) -> str:
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float= None) -> str:
         """
         Generate text based on the provided prompt.
         
@@ -36,7 +37,19 @@ class LLMInterface(ABC):
 
 
     @abstractmethod
-    def embed_text(self, text: str, document_type: str= None) -> list:
+    def stream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                    temperature: float= None) -> AsyncIterator[str]:
+        """
+        Generate text like `generate_text`, yielding the pieces of the answer as the provider sends them.
+        
+        :param prompt: The input text to generate a response for.
+        :return: An async iterator of text deltas.
+        """
+        pass
+
+
+    @abstractmethod
+    async def embed_text(self, text: str, document_type: str= None) -> list:
         """
         Generate an embedding for the provided text.
         param text: The input text to generate an embedding for.
@@ -1,9 +1,12 @@
 from .LLMEnums import LLMEnum
-from .providers import OpenAIProvider, CohereProvider
+from .providers import OpenAIProvider, CohereProvider, LocalProvider
+from helpers.tokenizer import get_token_counter
+import httpx
 
 class LLMProviderFactory:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, http_client: httpx.AsyncClient = None):
         self.config = config
+        self.http_client = http_client
 
     
     def create(self, provider: str):
@@ -13,7 +16,14 @@ class LLMProviderFactory:
                 api_url=self.config.OPENAI_API_URL,
                 default_input_max_characters= self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens= self.config.GENERATION_DEFAULT_MAX_TOKENS,
-                default_generation_temperature= self.config.GENERATION_DEFAULT_TEMPERATURE
+                default_generation_temperature= self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_input_max_tokens= self.config.INPUT_DEFAULT_MAX_TOKENS,
+                token_counter= get_token_counter(self.config.EMBEDDING_TOKENIZER_PATH),
+                http_client= self.http_client,
+                embedding_timeout= self.config.LLM_EMBEDDING_TIMEOUT_SECONDS,
+                generation_timeout= self.config.LLM_GENERATION_TIMEOUT_SECONDS,
+                # the EmbeddingScheduler retries embedding calls
+                embedding_max_retries= 0
             )
 
         if provider == LLMEnum.COHERE.value:
@@ -21,7 +31,23 @@ class LLMProviderFactory:
                 api_key= self.config.COHERE_API_KEY,
                 default_input_max_characters= self.config.INPUT_DEFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens= self.config.GENERATION_DEFAULT_MAX_TOKENS,
-                default_generation_temperature= self.config.GENERATION_DEFAULT_TEMPERATURE
+                default_generation_temperature= self.config.GENERATION_DEFAULT_TEMPERATURE,
+                default_input_max_tokens= self.config.INPUT_DEFAULT_MAX_TOKENS,
+                token_counter= get_token_counter(self.config.EMBEDDING_TOKENIZER_PATH),
+                http_client= self.http_client,
+                embedding_timeout= self.config.LLM_EMBEDDING_TIMEOUT_SECONDS,
+                generation_timeout= self.config.LLM_GENERATION_TIMEOUT_SECONDS,
+                # the EmbeddingScheduler retries embedding calls
+                embedding_max_retries= 0
+            )
+
+        if provider == LLMEnum.LOCAL.value:
+            return LocalProvider(
+                default_input_max_characters= self.config.INPUT_DEFAULT_MAX_CHARACTERS,
+                default_generation_max_output_tokens= self.config.GENERATION_DEFAULT_MAX_TOKENS,
+                ngram_size= self.config.LOCAL_EMBEDDING_NGRAM_SIZE,
+                generation_latency_ms= self.config.LOCAL_GENERATION_LATENCY_MS,
+                generation_token_latency_ms= self.config.LOCAL_GENERATION_TOKEN_LATENCY_MS
             )
 
         return None
\ No newline at end of file
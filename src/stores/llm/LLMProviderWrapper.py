@@ -0,0 +1,48 @@
+from .LLMInterface import LLMInterface
+from typing import AsyncIterator, List
+
+
+class LLMProviderWrapper(LLMInterface):
+    """
+    Base for the layers stacked on a provider (cache, batching ...): every call is passed
+    to the wrapped provider unless the layer overrides it, and attributes such as
+    `embedding_model_id` or `enums` are read from the provider, so a wrapped client can
+    be used wherever the provider is.
+    """
+
+    def __init__(self, provider: LLMInterface):
+        self.provider = provider
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float= None) -> str:
+        return await self.provider.generate_text(prompt=prompt, chat_history=chat_history,
+                                                 max_output_tokens=max_output_tokens, temperature=temperature)
+
+    async def stream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                          temperature: float= None) -> AsyncIterator[str]:
+        async for text in self.provider.stream_text(prompt=prompt, chat_history=chat_history,
+                                                    max_output_tokens=max_output_tokens, temperature=temperature):
+            yield text
+
+    async def embed_text(self, text, document_type: str= None, token_counts: List[int]= None) -> list:
+        return await self.embed_provider_text(text=text, document_type=document_type, token_counts=token_counts)
+
+    async def embed_provider_text(self, text, document_type: str= None, token_counts: List[int]= None) -> list:
+        # the known token counts of the texts (None where unknown) only mean something to the
+        # layers, the providers tokenize on their side
+        if isinstance(self.provider, LLMProviderWrapper):
+            return await self.provider.embed_text(text=text, document_type=document_type,
+                                                  token_counts=token_counts)
+        return await self.provider.embed_text(text=text, document_type=document_type)
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
@@ -1,27 +1,46 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import CoHereEnums, DocumentTypeEnum
 import cohere 
+import httpx
 import logging
-from typing import List, Union
+from typing import AsyncIterator, List, Union
+from helpers.tokenizer import TokenCounter
 
 class CohereProvider(LLMInterface):
 
     def __init__(self, api_key: str,
                  default_input_max_characters: int=1000,
                  default_generation_max_output_tokens: int=1000,
-                 default_generation_temperature: float=0.1):
+                 default_generation_temperature: float=0.1,
+                 default_input_max_tokens: int=None,
+                 token_counter: TokenCounter=None,
+                 http_client: httpx.AsyncClient=None,
+                 embedding_timeout: float=None,
+                 generation_timeout: float=None,
+                 embedding_max_retries: int=None):
         
         self.api_key = api_key
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_input_max_tokens = default_input_max_tokens
+        self.token_counter = token_counter
+        self.embedding_timeout = embedding_timeout
+        self.generation_timeout = generation_timeout
+        # None keeps the SDK retries, 0 leaves them to the EmbeddingScheduler
+        self.embedding_max_retries = embedding_max_retries
+
+        # embed API limits per request
+        self.embedding_max_batch_items = 96
+        self.embedding_max_batch_tokens = None
         
         self.generation_model_id = None
         self.embedding_model_id = None
         self.embedding_size = None
 
-        self.client = cohere.ClientV2(
-            api_key=self.api_key
+        self.client = cohere.AsyncClientV2(
+            api_key=self.api_key,
+            httpx_client=http_client
         )
         self.enums = CoHereEnums
         self.logger = logging.getLogger(__name__)
@@ -50,18 +69,26 @@ class CohereProvider(LLMInterface):
     def process_text(self, text: str) -> str:
         """
         Process the input text to ensure it meets the requirements of the LLM.
+        The limit is counted in tokens when the embedding model tokenizer is configured.
         
         :param text: The input text to be processed.
         :return: The processed text.
         """
+        if self.token_counter and self.default_input_max_tokens:
+            if self.token_counter.count(text) > self.default_input_max_tokens:
+                self.logger.warning(f"Input text exceeds maximum length of {self.default_input_max_tokens} tokens.")
+                return self.token_counter.truncate(text, self.default_input_max_tokens).strip()
+
+            return text.strip()
+
         if len(text) > self.default_input_max_characters:
             self.logger.warning(f"Input text exceeds maximum length of {self.default_input_max_characters} characters.")
             return text[:self.default_input_max_characters]
         
         return text.strip()
     
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                      temperature: float= None) -> str:
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float= None) -> str:
         if not self.client:
             self.logger.error("CoHere client is not initialized.")
             return None
@@ -72,13 +99,15 @@ class CohereProvider(LLMInterface):
         
         max_output_tokens = max_output_tokens if max_output_tokens is not None else self.default_generation_max_output_tokens
         temperature = temperature if temperature is not None else self.default_generation_temperature
+        chat_history = chat_history if chat_history is not None else []
 
         chat_history.append(self.construct_prompt(prompt=prompt,role=CoHereEnums.USER))
-        response = self.client.chat(
+        response = await self.client.chat(
             model = self.generation_model_id,
             messages=chat_history,
             temperature= temperature,
-            max_tokens= max_output_tokens
+            max_tokens= max_output_tokens,
+            request_options=self.get_request_options(timeout=self.generation_timeout)
         )
 
         if not response or not response.message.content[0].text:
@@ -94,6 +123,48 @@ class CohereProvider(LLMInterface):
 
 
     
+    async def stream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                          temperature: float= None) -> AsyncIterator[str]:
+        if not self.client:
+            self.logger.error("CoHere client is not initialized.")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model is not set.")
+            return
+
+        max_output_tokens = max_output_tokens if max_output_tokens is not None else self.default_generation_max_output_tokens
+        temperature = temperature if temperature is not None else self.default_generation_temperature
+        chat_history = chat_history if chat_history is not None else []
+
+        chat_history.append(self.construct_prompt(prompt=prompt,role=CoHereEnums.USER))
+
+        generated_text = []
+        async for event in self.client.chat_stream(
+            model = self.generation_model_id,
+            messages=chat_history,
+            temperature= temperature,
+            max_tokens= max_output_tokens,
+            request_options=self.get_request_options(timeout=self.generation_timeout)
+        ):
+            if event.type != "content-delta" or not event.delta or not event.delta.message \
+                    or not event.delta.message.content or not event.delta.message.content.text:
+                continue
+            generated_text.append(event.delta.message.content.text)
+            yield event.delta.message.content.text
+
+        chat_history.append(self.construct_prompt(prompt="".join(generated_text),role=CoHereEnums.ASSISTANT))
+
+
+    def get_request_options(self, timeout: float = None, max_retries: int = None) -> dict:
+        request_options = {}
+        if timeout:
+            request_options["timeout_in_seconds"] = int(timeout)
+        if max_retries is not None:
+            request_options["max_retries"] = max_retries
+
+        return request_options or None
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             "role": role.value if hasattr(role, "value") else role,
@@ -101,7 +172,7 @@ class CohereProvider(LLMInterface):
         }
     
 
-    def embed_text(self, text: Union[str, List[str]], document_type: str= None) -> list:
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None) -> list:
         
         if not self.client:
             self.logger.error("CoHere client is not initialized.")
@@ -116,14 +187,16 @@ class CohereProvider(LLMInterface):
         
         input_type = CoHereEnums.DOCUMENT
 
-        if document_type == DocumentTypeEnum.QUERY:
+        if document_type == DocumentTypeEnum.QUERY.value:
             input_type = CoHereEnums.QUERY
 
-        response = self.client.embed(
+        response = await self.client.embed(
             model = self.embedding_model_id,
             texts = [ self.process_text(t) for t in text ],
-            input_type = input_type,
-            embedding_types = ['float']
+            input_type = input_type.value,
+            embedding_types = ['float'],
+            request_options=self.get_request_options(timeout=self.embedding_timeout,
+                                                     max_retries=self.embedding_max_retries)
         )
 
         if not response or not response.embeddings or not response.embeddings.float:
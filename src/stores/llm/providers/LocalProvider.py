@@ -0,0 +1,165 @@
+from ..LLMInterface import LLMInterface
+from ..LLMEnums import LocalEnum
+import asyncio
+import logging
+import re
+import zlib
+import numpy as np
+from typing import AsyncIterator, List, Union
+
+
+class LocalProvider(LLMInterface):
+    """
+    Provider that needs no network: embeddings are the feature hashing of the word n-grams
+    of each text, and generation echoes the prompt after a configurable latency.
+
+    The embeddings are deterministic (the same text gives the same vector in every process)
+    and texts sharing words end up close, which is enough to benchmark chunking, indexing and
+    vector search without an API. They carry no meaning beyond word overlap.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, default_input_max_characters: int=1000,
+                 default_generation_max_output_tokens: int=1000,
+                 ngram_size: int=2,
+                 generation_latency_ms: float=0,
+                 generation_token_latency_ms: float=0):
+        self.default_input_max_characters = default_input_max_characters
+        self.default_generation_max_output_tokens = default_generation_max_output_tokens
+        self.ngram_size = ngram_size
+        self.generation_latency_ms = generation_latency_ms
+        self.generation_token_latency_ms = generation_token_latency_ms
+
+        self.generation_model_id = None
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        # all the texts of a call are hashed together, there is no request limit
+        self.embedding_max_batch_items = 4096
+        self.embedding_max_batch_tokens = None
+
+        self.enums = LocalEnum
+        self.logger = logging.getLogger(__name__)
+
+
+    def set_generation_model(self, model_id: str):
+
+        self.generation_model_id = model_id
+        self.logger.info(f"Generation model set to {model_id}")
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+        self.logger.info(f"Embedding model set to {model_id} with size {embedding_size}")
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float= None) -> str:
+
+        chat_history = chat_history if chat_history is not None else []
+        chat_history.append(self.construct_prompt(prompt=prompt, role=LocalEnum.USER.value))
+
+        words = self.get_echo_words(prompt=prompt, max_output_tokens=max_output_tokens)
+        await asyncio.sleep((self.generation_latency_ms + self.generation_token_latency_ms * len(words)) / 1000)
+
+        generated_text = "".join(words)
+        chat_history.append(self.construct_prompt(prompt=generated_text, role=LocalEnum.ASSISTANT.value))
+        return generated_text
+
+    async def stream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                          temperature: float= None) -> AsyncIterator[str]:
+
+        chat_history = chat_history if chat_history is not None else []
+        chat_history.append(self.construct_prompt(prompt=prompt, role=LocalEnum.USER.value))
+
+        words = self.get_echo_words(prompt=prompt, max_output_tokens=max_output_tokens)
+        await asyncio.sleep(self.generation_latency_ms / 1000)
+
+        for word in words:
+            await asyncio.sleep(self.generation_token_latency_ms / 1000)
+            yield word
+
+        chat_history.append(self.construct_prompt(prompt="".join(words), role=LocalEnum.ASSISTANT.value))
+
+    def get_echo_words(self, prompt: str, max_output_tokens: int=None) -> List[str]:
+        max_output_tokens = max_output_tokens if max_output_tokens is not None else self.default_generation_max_output_tokens
+        # words with their trailing spaces, so the streamed pieces join back into the prompt
+        return re.findall(r"\S+\s*", prompt)[:max_output_tokens]
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None) -> list:
+        if not self.embedding_model_id or not self.embedding_size:
+            self.logger.error("Embedding model is not set.")
+            return None
+
+        if isinstance(text, str):
+            text = [text]
+
+        return self.hash_embeddings([self.process_text(t) for t in text]).tolist()
+
+    def hash_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Hash the word n-grams of all the texts at once into a `(len(texts), embedding_size)` matrix
+        of L2 normalized float32 rows.
+        """
+        tokens = [self.TOKEN_PATTERN.findall(t.lower()) for t in texts]
+
+        # one flat array of token hashes with the row of each token
+        token_hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for text_tokens in tokens for token in text_tokens),
+            dtype=np.uint64
+        )
+        token_rows = np.repeat(np.arange(len(texts)), [len(text_tokens) for text_tokens in tokens])
+
+        feature_hashes, feature_rows = [], []
+        ngram_hashes = token_hashes.copy()
+        for n in range(1, self.ngram_size + 1):
+            if n > 1:
+                # extend the (n-1)-grams by the next token, the array wraps around on overflow
+                ngram_hashes = ngram_hashes[:-1] * np.uint64(0x100000001B3) + token_hashes[n - 1:]
+            starts = token_rows[:len(ngram_hashes)]
+            # n-grams crossing the end of a text are dropped
+            in_text = starts == token_rows[n - 1:n - 1 + len(ngram_hashes)]
+            feature_hashes.append(ngram_hashes[in_text] + np.uint64(n))
+            feature_rows.append(starts[in_text])
+
+        features = self.mix_hashes(np.concatenate(feature_hashes))
+        rows = np.concatenate(feature_rows)
+
+        columns = (features % np.uint64(self.embedding_size)).astype(np.int64)
+        # the sign bit keeps collisions from only adding up
+        signs = np.where(features >> np.uint64(63), -1.0, 1.0)
+
+        embeddings = np.bincount(
+            rows * self.embedding_size + columns,
+            weights=signs,
+            minlength=len(texts) * self.embedding_size
+        ).reshape(len(texts), self.embedding_size)
+
+        # a text without tokens gets a fixed unit vector, the cosine distance of a zero vector is NaN
+        is_empty = ~embeddings.any(axis=1)
+        embeddings[is_empty, 0] = 1.0
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / norms).astype(np.float32)
+
+    def mix_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        # murmur3 finalizer, spreads the n-gram hashes over all 64 bits
+        hashes = hashes ^ (hashes >> np.uint64(33))
+        hashes = hashes * np.uint64(0xFF51AFD7ED558CCD)
+        hashes = hashes ^ (hashes >> np.uint64(33))
+        hashes = hashes * np.uint64(0xC4CEB9FE1A85EC53)
+        return hashes ^ (hashes >> np.uint64(33))
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {
+            "role": role,
+            "content": prompt
+        }
+
+    def process_text(self, text: str) -> str:
+        if len(text) > self.default_input_max_characters:
+            self.logger.warning(f"Input text exceeds maximum length of {self.default_input_max_characters} characters.")
+            return text[:self.default_input_max_characters]
+
+        return text.strip()
@@ -1,28 +1,47 @@
 from ..LLMInterface import LLMInterface
-from openai import OpenAI
+from openai import AsyncOpenAI
+import httpx
 import logging
 from ..LLMEnums import OpenAIEnum
-from typing import List, Union
+from typing import AsyncIterator, List, Union
+from helpers.tokenizer import TokenCounter
 
 class OpenAIProvider(LLMInterface):
 
     def __init__(self, api_key: str, api_url: str=None,
                  default_input_max_characters: int=1000,
                  default_generation_max_output_tokens: int=1000,
-                 default_generation_temperature: float=0.1):
+                 default_generation_temperature: float=0.1,
+                 default_input_max_tokens: int=None,
+                 token_counter: TokenCounter=None,
+                 http_client: httpx.AsyncClient=None,
+                 embedding_timeout: float=None,
+                 generation_timeout: float=None,
+                 embedding_max_retries: int=None):
         self.api_key = api_key
         self.api_url = api_url
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_input_max_tokens = default_input_max_tokens
+        self.token_counter = token_counter
+        self.embedding_timeout = embedding_timeout
+        self.generation_timeout = generation_timeout
+        # None keeps the SDK retries, 0 leaves them to the EmbeddingScheduler
+        self.embedding_max_retries = embedding_max_retries
+
+        # embeddings API limits per request
+        self.embedding_max_batch_items = 2048
+        self.embedding_max_batch_tokens = 300000
         
         self.generation_model_id = None
         self.embedding_model_id = None
         self.embedding_size = None
 
-        self.client = OpenAI(api_key=self.api_key,
-                             base_url=self.api_url if self.api_url and len(self.api_url) else None
-                             )
+        self.client = AsyncOpenAI(api_key=self.api_key,
+                                  base_url=self.api_url if self.api_url and len(self.api_url) else None,
+                                  http_client=http_client
+                                  )
         self.enums = OpenAIEnum
         self.logger = logging.getLogger(__name__)
 
@@ -38,8 +57,8 @@ class OpenAIProvider(LLMInterface):
         self.embedding_size = embedding_size
         self.logger.info(f"Embedding model set to {model_id} with size {embedding_size}")
 
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                      temperature: float= None) -> str:
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                            temperature: float= None) -> str:
         
         if not self.client:
             self.logger.error("OpenAI client is not initialized.")
@@ -51,13 +70,15 @@ class OpenAIProvider(LLMInterface):
         
         max_output_tokens = max_output_tokens if max_output_tokens is not None else self.default_generation_max_output_tokens
         temperature = temperature if temperature is not None else self.default_generation_temperature
+        chat_history = chat_history if chat_history is not None else []
         chat_history.append(self.construct_prompt(prompt=prompt, role= OpenAIEnum.USER.value))
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model = self.generation_model_id,
             messages=chat_history,
             max_tokens=max_output_tokens,
             temperature=temperature,
+            timeout=self.generation_timeout,
         )
         if (
             not response
@@ -77,7 +98,44 @@ class OpenAIProvider(LLMInterface):
 
 
 
-    def embed_text(self, text: Union[str, List[str]], document_type: str= None) -> list:
+    async def stream_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                          temperature: float= None) -> AsyncIterator[str]:
+
+        if not self.client:
+            self.logger.error("OpenAI client is not initialized.")
+            return
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model is not set.")
+            return
+
+        max_output_tokens = max_output_tokens if max_output_tokens is not None else self.default_generation_max_output_tokens
+        temperature = temperature if temperature is not None else self.default_generation_temperature
+        chat_history = chat_history if chat_history is not None else []
+        chat_history.append(self.construct_prompt(prompt=prompt, role= OpenAIEnum.USER.value))
+
+        stream = await self.client.chat.completions.create(
+            model = self.generation_model_id,
+            messages=chat_history,
+            max_tokens=max_output_tokens,
+            temperature=temperature,
+            timeout=self.generation_timeout,
+            stream=True,
+        )
+
+        generated_text = []
+        # closing the stream releases the connection when the client goes away mid answer
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                generated_text.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+
+        chat_history.append(self.construct_prompt(prompt="".join(generated_text), role=OpenAIEnum.ASSISTANT.value))
+
+
+    async def embed_text(self, text: Union[str, List[str]], document_type: str= None) -> list:
         if not self.embedding_model_id:
             raise ValueError("Embedding model is not set.")
         
@@ -88,10 +146,14 @@ class OpenAIProvider(LLMInterface):
         if isinstance(text, str):
             text = [text]
         
-        respose = self.client.embeddings.create(
+        client = self.client
+        if self.embedding_max_retries is not None:
+            client = self.client.with_options(max_retries=self.embedding_max_retries)
+
+        respose = await client.embeddings.create(
             model=self.embedding_model_id,
-            input=text,
-            
+            input=[self.process_text(t) for t in text],
+            timeout=self.embedding_timeout,
         )
         if not respose or not respose.data or len(respose.data) == 0 or not respose.data[0].embedding:
             self.logger.error("Failed to generate embedding.")
@@ -111,10 +173,18 @@ class OpenAIProvider(LLMInterface):
     def process_text(self, text: str) -> str:
         """
         Process the input text to ensure it meets the requirements of the LLM.
+        The limit is counted in tokens when the embedding model tokenizer is configured.
         
         :param text: The input text to be processed.
         :return: The processed text.
         """
+        if self.token_counter and self.default_input_max_tokens:
+            if self.token_counter.count(text) > self.default_input_max_tokens:
+                self.logger.warning(f"Input text exceeds maximum length of {self.default_input_max_tokens} tokens.")
+                return self.token_counter.truncate(text, self.default_input_max_tokens).strip()
+
+            return text.strip()
+
         if len(text) > self.default_input_max_characters:
             self.logger.warning(f"Input text exceeds maximum length of {self.default_input_max_characters} characters.")
             return text[:self.default_input_max_characters]
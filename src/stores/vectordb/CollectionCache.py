@@ -0,0 +1,34 @@
+from typing import Any
+import time
+
+
+class CollectionCache:
+    """
+    In-process view of the collections known to exist, so inserts and searches skip the
+    existence round trip. This process invalidates its own entries on create and delete;
+    entries expire after `ttl_seconds` so changes made by other workers are seen too.
+    A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.entries = {}
+
+    def get(self, collection_name: str) -> Any:
+        entry = self.entries.get(collection_name)
+        if entry is None:
+            return None
+
+        collection, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[collection_name]
+            return None
+
+        return collection
+
+    def set(self, collection_name: str, collection: Any):
+        if self.ttl_seconds > 0:
+            self.entries[collection_name] = (collection, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, collection_name: str):
+        self.entries.pop(collection_name, None)
@@ -0,0 +1,198 @@
+from .VectorDBEnums import PgVectorCollectionStateEnums, PgVectorIndexTypeEnums, PgVectorStorageModeEnums
+from utils.metrics import VECTOR_INDEX_BUILD_DURATION
+import asyncio
+import logging
+import math
+import time
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PGVectorIndexManager:
+    """
+    Builds the vector index of a pgvector collection out of the insert path.
+
+    Inserts only `schedule` the collection: the build starts once no insert came for
+    `build_delay_seconds`, so a bulk load finishes before its index is built. Indexes are
+    built with `CREATE INDEX CONCURRENTLY`, which does not block writes, with parameters
+    picked from the row count and dimension. An indexed collection is rebuilt the same way
+    once it grew by `rebuild_ratio` since its last build.
+    """
+
+    def __init__(self, provider, index_type: str = PgVectorIndexTypeEnums.HNSW.value,
+                 index_threshold: int = 100, build_delay_seconds: float = 5,
+                 rebuild_ratio: float = 1.0, maintenance_work_mem_mb: int = 1024,
+                 build_workers: int = 2):
+        self.provider = provider
+        self.index_type = index_type
+        self.index_threshold = index_threshold
+        self.build_delay_seconds = build_delay_seconds
+        self.rebuild_ratio = rebuild_ratio
+        self.maintenance_work_mem_mb = maintenance_work_mem_mb
+        self.build_workers = build_workers
+
+        self.timers = {}
+        self.build_tasks = set()
+
+    def schedule(self, collection_name: str):
+        # every insert pushes the build back
+        self.cancel(collection_name)
+        self.timers[collection_name] = asyncio.get_running_loop().call_later(
+            self.build_delay_seconds, self.start_build, collection_name
+        )
+
+    def cancel(self, collection_name: str):
+        timer = self.timers.pop(collection_name, None)
+        if timer is not None:
+            timer.cancel()
+
+    def start_build(self, collection_name: str):
+        self.timers.pop(collection_name, None)
+        task = asyncio.create_task(self.build_if_needed(collection_name=collection_name))
+        self.build_tasks.add(task)
+        task.add_done_callback(self.build_done)
+
+    def build_done(self, task: asyncio.Task):
+        self.build_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Vector index build failed: {task.exception()}")
+
+    async def close(self):
+        for collection_name in list(self.timers):
+            self.cancel(collection_name)
+        for task in list(self.build_tasks):
+            task.cancel()
+        await asyncio.gather(*self.build_tasks, return_exceptions=True)
+
+    async def build_if_needed(self, collection_name: str, index_type: str = None) -> bool:
+        """
+        Build the index when the collection has `index_threshold` rows and no index yet,
+        or rebuild it when it grew past `rebuild_ratio` since the last build.
+        """
+        collection = await self.provider.get_collection(collection_name=collection_name)
+        if collection is None:
+            return False
+
+        if (collection.collection_storage == PgVectorStorageModeEnums.BIT.value
+                and await self.provider.get_pgvector_version() < (0, 7, 0)):
+            # no bit opclass to index, searches scan the bit column
+            return False
+
+        rows = await self.provider.count_records(collection_name=collection_name)
+
+        if collection.collection_state == PgVectorCollectionStateEnums.INDEXED.value:
+            if not self.rebuild_ratio or not collection.collection_index_rows:
+                return False
+            if rows < collection.collection_index_rows * (1 + self.rebuild_ratio):
+                return False
+        elif rows < self.index_threshold:
+            return False
+
+        return await self.build(
+            collection_name=collection_name,
+            index_type=index_type or collection.collection_index_type or self.index_type,
+            rows=rows
+        )
+
+    async def build(self, collection_name: str, index_type: str, rows: int) -> bool:
+        index_name = self.provider.default_index_name(collection_name=collection_name)
+
+        # CONCURRENTLY can not run in a transaction, the asyncpg connection runs in autocommit
+        async with self.provider.get_driver_connection() as connection:
+            # one build per collection across workers, released if this process dies
+            if not await connection.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", collection_name):
+                return False
+
+            try:
+                collection = await self.provider.get_collection(collection_name=collection_name)
+                if collection is None:
+                    return False
+
+                index_column, operator_class = self.provider.get_index_target(collection=collection)
+                index_params = self.get_index_params(index_type=index_type, rows=rows,
+                                                     dimension=collection.collection_dimension)
+                maintenance_work_mem_mb = self.get_maintenance_work_mem_mb(
+                    index_type=index_type, index_params=index_params, rows=rows,
+                    vector_bytes=self.provider.get_vector_bytes(collection=collection)
+                )
+
+                previous_state = collection.collection_state
+                await self.provider.update_collection(collection_name=collection_name,
+                                                      collection_state=PgVectorCollectionStateEnums.INDEXING.value)
+
+                # the live index keeps serving searches until the new one replaces it
+                is_index_existed = await connection.fetchval("SELECT to_regclass($1)", index_name) is not None
+                build_index_name = f"{index_name}_new" if is_index_existed else index_name
+
+                logger.info(f"START: Building {index_type} index {index_params} for {collection_name} ({rows} rows)")
+                started_at = time.monotonic()
+
+                try:
+                    # left over by an interrupted build, invalid
+                    await connection.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {build_index_name}")
+                    await connection.execute(f"SET maintenance_work_mem = '{maintenance_work_mem_mb}MB'")
+                    await connection.execute(f"SET max_parallel_maintenance_workers = {self.build_workers}")
+                    await connection.execute(
+                        f'CREATE INDEX CONCURRENTLY {build_index_name} ON {collection_name} '
+                        f'USING {index_type} ({index_column} {operator_class}) '
+                        f'WITH ({", ".join(f"{k} = {v}" for k, v in index_params.items())})'
+                    )
+
+                    if is_index_existed:
+                        await connection.execute(f"DROP INDEX CONCURRENTLY {index_name}")
+                        await connection.execute(f"ALTER INDEX {build_index_name} RENAME TO {index_name}")
+
+                except BaseException:
+                    await self.provider.update_collection(collection_name=collection_name,
+                                                          collection_state=previous_state)
+                    raise
+
+                finally:
+                    # the connection goes back to the pool with the server defaults
+                    await connection.execute("RESET maintenance_work_mem")
+                    await connection.execute("RESET max_parallel_maintenance_workers")
+
+                build_seconds = time.monotonic() - started_at
+                VECTOR_INDEX_BUILD_DURATION.labels(index_type=index_type).observe(build_seconds)
+                logger.info(f"End: Building index for {collection_name} in {build_seconds:.1f}s")
+
+                # the collection keeps the distance it was created with, the operator class of the
+                # index is derived from it and the storage mode
+                await self.provider.update_collection(
+                    collection_name=collection_name,
+                    collection_index_type=index_type,
+                    collection_index_rows=rows,
+                    collection_index_params=index_params,
+                    collection_state=PgVectorCollectionStateEnums.INDEXED.value
+                )
+
+            finally:
+                await connection.fetchval("SELECT pg_advisory_unlock(hashtext($1))", collection_name)
+
+        return True
+
+    def get_index_params(self, index_type: str, rows: int, dimension: int) -> dict:
+        if index_type == PgVectorIndexTypeEnums.IVFFLAT.value:
+            # pgvector guidance: rows / 1000 lists up to 1M rows, sqrt(rows) above
+            lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+            return {"lists": max(lists, 1)}
+
+        # more links per node keep the recall of large and high dimensional collections up
+        m = 16 if rows < 1_000_000 else 24 if rows < 10_000_000 else 32
+        if dimension >= 1024:
+            m += 8
+        return {"m": m, "ef_construction": 4 * m}
+
+    def get_maintenance_work_mem_mb(self, index_type: str, index_params: dict, rows: int,
+                                    vector_bytes: float) -> int:
+        """
+        Enough memory for the build to stay in memory, within `maintenance_work_mem_mb`.
+        HNSW keeps every vector and its neighbor lists, IVFFlat the k-means sample.
+        """
+        if index_type == PgVectorIndexTypeEnums.IVFFLAT.value:
+            estimated_bytes = min(rows, 50 * index_params["lists"]) * vector_bytes
+        else:
+            estimated_bytes = rows * (vector_bytes + index_params["m"] * 2 * 8 + 64)
+
+        return int(min(self.maintenance_work_mem_mb, max(64, math.ceil(estimated_bytes * 1.2 / 2 ** 20))))
@@ -10,17 +10,47 @@ class DistanceMethodEnums(Enum):
     DOT= 'dot'
 
 
+class QdrantQuantizationEnums(Enum):
+    # compressed vectors searched first, the originals rescore the oversampled candidates
+    NONE = "none"
+    SCALAR = "scalar"
+    PRODUCT = "product"
+    BINARY = "binary"
+
+
 class PgVectorTableSchemaEnums(Enum):
     ID = 'id'
     TEXT = 'text'
     VECTOR= 'vector'
+    VECTOR_BITS = 'vector_bits'
     CHUNK_ID = 'chunk_id'
     METADATA = 'metadata'
     _PREFIX = 'pgvector'
 
 class PgVectorDistanceMethodEnums(Enum):
     COSINE = "vector_cosine_ops"
-    DOT = "vector_l2_ops"
+    DOT = "vector_ip_ops"
+
+class PgVectorDistanceOperatorEnums(Enum):
+    # the operator of each index opclass, an index is only used to ORDER BY its own operator
+    COSINE = "<=>"
+    DOT = "<#>"
+
+class PgVectorStorageModeEnums(Enum):
+    # float4 vectors, float2 vectors, or float4 vectors searched through their sign bits
+    VECTOR = "vector"
+    HALFVEC = "halfvec"
+    BIT = "bit"
+
+class PgVectorCollectionStateEnums(Enum):
+    CREATED = "created"
+    INDEXING = "indexing"
+    INDEXED = "indexed"
+
+class PgVectorInsertModeEnums(Enum):
+    # binary COPY, or INSERT with the vectors as text literals
+    COPY = "copy"
+    INSERT = "insert"
 
 class PgVectorIndexTypeEnums(Enum):
     HNSW = "hnsw"
@@ -48,6 +48,16 @@ class VectorDBInterface(ABC):
         pass
 
     @abstractmethod
-    def search_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
+    def delete_by_record_ids(self, collection_name: str, record_ids: list):
+        pass
+
+    @abstractmethod
+    def get_vectors(self, collection_name: str, record_ids: list) -> dict:
+        pass
+
+    @abstractmethod
+    def search_by_vector(self, collection_name: str, vector: list, limit: int,
+                         ef_search: int= None, probes: int= None,
+                         rerank_factor: int= None, exact: bool= None) -> List[RetrievedDocument]:
         pass
 
@@ -15,7 +15,27 @@ class VectorDBProviderFactory:
                 db_client=qdrant_db_client,
                 distance_method= self.config.VECTOR_DB_DISTANT_METHOD,
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
-                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOL
+                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                collection_cache_ttl_seconds=self.config.VECTOR_DB_COLLECTION_CACHE_TTL_SECONDS,
+                url=self.config.VECTOR_DB_QDRANT_URL,
+                api_key=self.config.VECTOR_DB_QDRANT_API_KEY,
+                prefer_grpc=self.config.VECTOR_DB_QDRANT_PREFER_GRPC,
+                grpc_port=self.config.VECTOR_DB_QDRANT_GRPC_PORT,
+                upload_batch_size=self.config.VECTOR_DB_QDRANT_UPLOAD_BATCH_SIZE,
+                upload_parallel=self.config.VECTOR_DB_QDRANT_UPLOAD_PARALLEL,
+                quantization=self.config.VECTOR_DB_QDRANT_QUANTIZATION,
+                quantization_always_ram=self.config.VECTOR_DB_QDRANT_QUANTIZATION_ALWAYS_RAM,
+                quantization_rescore=self.config.VECTOR_DB_QDRANT_QUANTIZATION_RESCORE,
+                quantization_oversampling=self.config.VECTOR_DB_QDRANT_QUANTIZATION_OVERSAMPLING,
+                product_compression=self.config.VECTOR_DB_QDRANT_PRODUCT_COMPRESSION,
+                on_disk_vectors=self.config.VECTOR_DB_QDRANT_ON_DISK_VECTORS,
+                on_disk_payload=self.config.VECTOR_DB_QDRANT_ON_DISK_PAYLOAD,
+                hnsw_m=self.config.VECTOR_DB_QDRANT_HNSW_M,
+                hnsw_ef_construct=self.config.VECTOR_DB_QDRANT_HNSW_EF_CONSTRUCT,
+                indexing_threshold_kb=self.config.VECTOR_DB_QDRANT_INDEXING_THRESHOLD_KB,
+                memmap_threshold_kb=self.config.VECTOR_DB_QDRANT_MEMMAP_THRESHOLD_KB,
+                hnsw_ef=self.config.VECTOR_DB_QDRANT_HNSW_EF,
+                exact=self.config.VECTOR_DB_QDRANT_EXACT
             )
         
         if provider == VectorDBEnums.PGVECTOR.value:
@@ -24,7 +44,19 @@ class VectorDBProviderFactory:
                 db_client=self.db_client,
                 distance_method=self.config.VECTOR_DB_DISTANT_METHOD,
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
-                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD
+                index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                hnsw_ef_search=self.config.VECTOR_DB_PGVEC_HNSW_EF_SEARCH,
+                ivfflat_probes=self.config.VECTOR_DB_PGVEC_IVFFLAT_PROBES,
+                insert_mode=self.config.VECTOR_DB_PGVEC_INSERT_MODE,
+                insert_batch_size=self.config.VECTOR_DB_PGVEC_INSERT_BATCH_SIZE,
+                index_type=self.config.VECTOR_DB_PGVEC_INDEX_TYPE,
+                index_build_delay_seconds=self.config.VECTOR_DB_PGVEC_INDEX_BUILD_DELAY_SECONDS,
+                index_rebuild_ratio=self.config.VECTOR_DB_PGVEC_INDEX_REBUILD_RATIO,
+                index_maintenance_work_mem_mb=self.config.VECTOR_DB_PGVEC_INDEX_MAINTENANCE_WORK_MEM_MB,
+                index_build_workers=self.config.VECTOR_DB_PGVEC_INDEX_BUILD_WORKERS,
+                storage_mode=self.config.VECTOR_DB_PGVEC_STORAGE_MODE,
+                rerank_factor=self.config.VECTOR_DB_PGVEC_RERANK_FACTOR,
+                collection_cache_ttl_seconds=self.config.VECTOR_DB_COLLECTION_CACHE_TTL_SECONDS
             )
 
         return None
@@ -3,29 +3,60 @@ from ..VectorDBEnums import (
     DistanceMethodEnums,
     PgVectorTableSchemaEnums,
     PgVectorDistanceMethodEnums,
-    PgVectorIndexTypeEnums
+    PgVectorDistanceOperatorEnums,
+    PgVectorCollectionStateEnums,
+    PgVectorInsertModeEnums,
+    PgVectorIndexTypeEnums,
+    PgVectorStorageModeEnums
 )
-from models.db_schemes import RetrievedDocument
+from ..CollectionCache import CollectionCache
+from ..PGVectorIndexManager import PGVectorIndexManager
+from models.db_schemes import RetrievedDocument, VectorCollection
 import logging
+import math
+import numpy as np
+from asyncpg import BitString
+from contextlib import asynccontextmanager
+from pgvector import HalfVector, Vector
 from typing import List, Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql import text as sql_text
 import json
 
 
+# the largest hnsw.ef_search pgvector accepts, an index scan returns at most that many rows
+HNSW_MAX_EF_SEARCH = 1000
+
+
 class PGVectorProvider(VectorDBInterface):
 
     def __init__(self, db_client: str, default_vector_size: int = 786,
-                  distance_method: str=None, index_threshold=100):
+                  distance_method: str=None, index_threshold=100,
+                  hnsw_ef_search: int=100, ivfflat_probes: int=0,
+                  collection_cache_ttl_seconds: float=60,
+                  insert_mode: str=PgVectorInsertModeEnums.COPY.value, insert_batch_size: int=1000,
+                  index_type: str=PgVectorIndexTypeEnums.HNSW.value, index_build_delay_seconds: float=5,
+                  index_rebuild_ratio: float=1.0, index_maintenance_work_mem_mb: int=1024,
+                  index_build_workers: int=2,
+                  storage_mode: str=PgVectorStorageModeEnums.VECTOR.value, rerank_factor: int=8):
         
         self.db_client = db_client
         self.default_vector_size = default_vector_size
-        self.index_threshold = index_threshold
+        self.hnsw_ef_search = hnsw_ef_search
+        self.ivfflat_probes = ivfflat_probes
+        self.insert_mode = insert_mode
+        self.insert_batch_size = insert_batch_size
+        self.storage_mode = storage_mode
+        self.rerank_factor = rerank_factor
+        self.pgvector_version = None
 
 
-        if distance_method == DistanceMethodEnums.COSINE.value:
-            distance_method = PgVectorDistanceMethodEnums.COSINE.value
-        elif distance_method == DistanceMethodEnums.DOT.value:
+        # new collections take this distance, the searches use the one stored for each collection
+        if distance_method == DistanceMethodEnums.DOT.value:
             distance_method = PgVectorDistanceMethodEnums.DOT.value
+        else:
+            distance_method = PgVectorDistanceMethodEnums.COSINE.value
 
 
         self.distance_method = distance_method
@@ -36,6 +67,18 @@ class PGVectorProvider(VectorDBInterface):
 
         self.default_index_name = lambda collection_name : f"{collection_name}_vector_idx"
 
+        self.collection_cache = CollectionCache(ttl_seconds=collection_cache_ttl_seconds)
+
+        self.index_manager = PGVectorIndexManager(
+            provider=self,
+            index_type=index_type,
+            index_threshold=index_threshold,
+            build_delay_seconds=index_build_delay_seconds,
+            rebuild_ratio=index_rebuild_ratio,
+            maintenance_work_mem_mb=index_maintenance_work_mem_mb,
+            build_workers=index_build_workers
+        )
+
 
     async def connect(self):
         async with self.db_client() as session:
@@ -56,40 +99,124 @@ class PGVectorProvider(VectorDBInterface):
                 await session.rollback()
     
 
+    async def get_pgvector_version(self) -> tuple:
+        if self.pgvector_version is None:
+            async with self.db_client() as session:
+                result = await session.execute(sql_text(
+                    "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+                ))
+                version = result.scalar_one_or_none() or "0"
+            self.pgvector_version = tuple(int(part) for part in version.split("."))
+        return self.pgvector_version
+
+    def is_quantization_supported(self) -> bool:
+        # halfvec, the bit opclasses and the <~> hamming operator came with pgvector 0.7
+        return self.pgvector_version is not None and self.pgvector_version >= (0, 7, 0)
+
     async def disconnect(self):
         # Disconnect logic for PostgreSQL with PGVector
-        pass
+        await self.index_manager.close()
+
+    @asynccontextmanager
+    async def get_driver_connection(self):
+        """
+        The asyncpg connection under a session, for COPY and the statements that can not
+        run in a transaction. Nothing runs through the session, so no transaction is open.
+        """
+        async with self.db_client() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            yield raw_connection.driver_connection
 
     async def is_collection_existed(self, collection_name: str) -> bool:
         # Logic to check if a collection exists in PostgreSQL
         # collection_name --> table name
-        record = None 
+        return await self.get_collection(collection_name=collection_name) is not None
+
+    async def get_collection(self, collection_name: str) -> Optional[VectorCollection]:
+        """
+        Catalog entry of the collection, from the in-process cache while it is fresh.
+        """
+        collection = self.collection_cache.get(collection_name)
+        if collection is not None:
+            return collection
+
+        async with self.db_client() as session:
+            async with session.begin():
+                collection = await session.get(VectorCollection, collection_name)
+                if collection is None:
+                    collection = await self.register_collection(session, collection_name=collection_name)
+
+        if collection is not None:
+            self.collection_cache.set(collection_name, collection)
+        return collection
+
+    async def register_collection(self, session, collection_name: str) -> Optional[VectorCollection]:
+        """
+        Add a collection table created before the catalog existed, read from the table
+        and its index. Returns None when there is no such table.
+        """
+        table_sql = sql_text(f"""
+                            SELECT a.atttypmod as dimension, am.amname as index_type, opc.opcname as distance
+                            FROM pg_attribute a
+                            LEFT JOIN pg_class i ON i.relname = :index_name
+                            LEFT JOIN pg_am am ON am.oid = i.relam
+                            LEFT JOIN pg_index ix ON ix.indexrelid = i.oid
+                            LEFT JOIN pg_opclass opc ON opc.oid = ix.indclass[0]
+                            WHERE a.attrelid = to_regclass(:collection_name)
+                            AND a.attname = :vector_column
+                            """)
+        result = await session.execute(table_sql, {
+            "collection_name": collection_name,
+            "index_name": self.default_index_name(collection_name=collection_name),
+            "vector_column": PgVectorTableSchemaEnums.VECTOR.value
+        })
+        table = result.fetchone()
+        if table is None:
+            return None
+
+        await session.execute(insert(VectorCollection).values(
+            collection_name=collection_name,
+            collection_dimension=table.dimension,
+            collection_distance=self.get_distance_method(table.distance),
+            collection_index_type=table.index_type,
+            collection_state=(PgVectorCollectionStateEnums.INDEXED.value if table.index_type
+                              else PgVectorCollectionStateEnums.CREATED.value)
+        ).on_conflict_do_nothing())
+
+        return await session.get(VectorCollection, collection_name)
+
+    async def update_collection(self, collection_name: str, **values):
         async with self.db_client() as session:
             async with session.begin():
-                list_tbl =  sql_text(
-                    f'SELECT * FROM pg_tables WHERE tablename = :collection_name'
+                await session.execute(
+                    update(VectorCollection)
+                    .where(VectorCollection.collection_name == collection_name)
+                    .values(**values)
                 )
-                result = await session.execute(list_tbl,{"collection_name":collection_name})
-                record = result.scalar_one_or_none()
+        self.collection_cache.invalidate(collection_name)
 
-                return record 
-                
-        
+    async def count_records(self, collection_name: str) -> int:
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(sql_text(f"SELECT COUNT(*) FROM {collection_name}"))
+                return result.scalar_one()
 
     async def list_all_collections(self) -> List:
         # Logic to list all collections in PostgreSQL
         records = []
         async with self.db_client() as session:
             async with session.begin():
-                list_tbl = sql_text(
-                    f'SELECT tablename FROM pg_tables LIKE {self.pgvector_table_prefix}'
-                )
-                result = await session.execute(list_tbl)
+                result = await session.execute(select(VectorCollection.collection_name))
                 records = result.scalars().all()
         return records
     
     async def get_collection_info(self, collection_name: str) -> dict:
         # Logic to get collection info from PostgreSQL
+        collection = await self.get_collection(collection_name=collection_name)
+        if collection is None:
+            return None
+
         async with self.db_client() as session:
             async with session.begin():
                 table_info_sql = sql_text(f'''
@@ -111,6 +238,13 @@ class PGVectorProvider(VectorDBInterface):
                         "tablespace": table_data[3],
                         "hasindexes": table_data[4]
                     },
+                    "collection": {
+                        "dimension": collection.collection_dimension,
+                        "distance": collection.collection_distance,
+                        "storage": collection.collection_storage,
+                        "index_type": collection.collection_index_type,
+                        "state": collection.collection_state
+                    },
                     "record_count": record_count.scalar_one(),
                 }
 
@@ -121,36 +255,110 @@ class PGVectorProvider(VectorDBInterface):
                 self.logger.info(f"Deleting collection: {collection_name}")
                 delete_sql = sql_text(f'DROP TABLE IF EXISTS {collection_name}')
                 await session.execute(delete_sql)
-                await session.commit()
+                await session.execute(
+                    delete(VectorCollection).where(VectorCollection.collection_name == collection_name)
+                )
+        self.collection_cache.invalidate(collection_name)
+        self.index_manager.cancel(collection_name)
         return True
 
     async def create_collection(self, collection_name: str,
                           embedding_size: int,
-                          do_reset: bool = False) -> bool:
+                          do_reset: bool = False,
+                          storage_mode: str = None) -> bool:
         # Logic to create a collection in PostgreSQL
         if do_reset:
             _= await self.delete_collection(collection_name)
 
         is_collection_existed = await self.is_collection_existed(collection_name)
         if not is_collection_existed:
-            self.logger.info(f"Creating collection: {collection_name}")
+            storage_mode = await self.get_storage_mode(storage_mode=storage_mode or self.storage_mode)
+
+            self.logger.info(f"Creating collection: {collection_name} ({storage_mode})")
+            collection = VectorCollection(
+                collection_name=collection_name,
+                collection_dimension=embedding_size,
+                collection_distance=self.distance_method,
+                collection_storage=storage_mode,
+                collection_state=PgVectorCollectionStateEnums.CREATED.value
+            )
+
+            vector_type = "halfvec" if storage_mode == PgVectorStorageModeEnums.HALFVEC.value else "vector"
+            # the sign bits of the vector, the candidates of a search come from their index
+            vector_bits_column = (
+                f'{PgVectorTableSchemaEnums.VECTOR_BITS.value} bit({embedding_size}), '
+                if storage_mode == PgVectorStorageModeEnums.BIT.value else ''
+            )
+
             async with self.db_client() as session:
                 async with session.begin():
                     create_sql = sql_text(
                         f'CREATE TABLE {collection_name} ('
                             f'{PgVectorTableSchemaEnums.ID.value} bigserial PRIMARY KEY, '
                             f'{PgVectorTableSchemaEnums.TEXT.value} text, '
-                            f'{PgVectorTableSchemaEnums.VECTOR.value} vector({embedding_size}), '
+                            f'{PgVectorTableSchemaEnums.VECTOR.value} {vector_type}({embedding_size}), '
+                            f'{vector_bits_column}'
                             f'{PgVectorTableSchemaEnums.METADATA.value} jsonb DEFAULT \'{{}}\', '
                             f'{PgVectorTableSchemaEnums.CHUNK_ID.value} integer, '
                             f'FOREIGN KEY ({PgVectorTableSchemaEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id)'
                         ')'
                         )
                     await session.execute(create_sql)
-                    await session.commit()
+                    # the catalog row commits with the table
+                    session.add(collection)
+
+            self.collection_cache.set(collection_name, collection)
             return True
 
         return False
+
+    async def get_storage_mode(self, storage_mode: str) -> str:
+        if storage_mode == PgVectorStorageModeEnums.HALFVEC.value and await self.get_pgvector_version() < (0, 7, 0):
+            self.logger.warning("halfvec storage needs pgvector 0.7, the collection stores vector")
+            return PgVectorStorageModeEnums.VECTOR.value
+        return storage_mode
+
+    def get_distance_method(self, distance: str=None) -> str:
+        """
+        Operator class of a stored collection distance. A legacy index may have another one
+        (the l2 one of old dot collections), those collections get the provider distance.
+        """
+        distance = (distance or "").replace("halfvec_", "vector_", 1)
+        if distance in [method.value for method in PgVectorDistanceMethodEnums]:
+            return distance
+        return self.distance_method
+
+    def get_distance_operator(self, collection: VectorCollection) -> str:
+        if self.get_distance_method(collection.collection_distance) == PgVectorDistanceMethodEnums.DOT.value:
+            return PgVectorDistanceOperatorEnums.DOT.value
+        return PgVectorDistanceOperatorEnums.COSINE.value
+
+    def get_index_target(self, collection: VectorCollection) -> tuple:
+        """
+        Column and operator class of the vector index of the collection. A bit collection
+        indexes the sign bits by hamming distance, the exact distance only re-ranks.
+        """
+        if collection.collection_storage == PgVectorStorageModeEnums.BIT.value:
+            return PgVectorTableSchemaEnums.VECTOR_BITS.value, "bit_hamming_ops"
+
+        distance_method = self.get_distance_method(collection.collection_distance)
+        if collection.collection_storage == PgVectorStorageModeEnums.HALFVEC.value:
+            return PgVectorTableSchemaEnums.VECTOR.value, distance_method.replace("vector_", "halfvec_", 1)
+
+        return PgVectorTableSchemaEnums.VECTOR.value, distance_method
+
+    def get_vector_bytes(self, collection: VectorCollection) -> float:
+        # size of an indexed vector, for the build memory
+        if collection.collection_storage == PgVectorStorageModeEnums.BIT.value:
+            return collection.collection_dimension / 8
+        if collection.collection_storage == PgVectorStorageModeEnums.HALFVEC.value:
+            return collection.collection_dimension * 2
+        return collection.collection_dimension * 4
+
+    def get_vector_bits(self, vector) -> BitString:
+        # binary quantization: 1 for the positive dimensions, like pgvector's binary_quantize
+        vector = np.asarray(vector, dtype=np.float32)
+        return BitString.frombytes(np.packbits(vector > 0).tobytes(), bitlength=len(vector))
     
 
     async def is_index_existed(self, collection_name: str)-> bool:
@@ -173,40 +381,16 @@ class PGVectorProvider(VectorDBInterface):
     
 
     async def create_vector_index(self, collection_name: str,
-                                        index_type: str = PgVectorIndexTypeEnums.HNSW.value):
-
-        is_index_existed = await self.is_index_existed(collection_name=collection_name)
-
-        if is_index_existed :
-            return False
-        
-
-        async with self.db_client() as session:
-            async with session.begin():
-                count_sql = sql_text(f"SELECT COUNT(*) FROM {collection_name}")
-
-                result = await session.execute(count_sql)
-
-                records_count = result.scalar_one()
-
-                if records_count < self.index_threshold:
-                    return False 
-                
-                self.logger.info(f"START: Creating vector index for collection: {collection_name}")
-                index_name = self.default_index_name(collection_name=collection_name)
-                create_idx_sql = sql_text(
-                        f'CREATE INDEX {index_name} ON {collection_name} '
-                        f'USING {index_type} ({PgVectorTableSchemaEnums.VECTOR.value} {self.distance_method})'
-                    )
-                
-                await session.execute(create_idx_sql)
-                await session.commit()
-
-                self.logger.info(f"End: Creating vector index for collection: {collection_name}")
-        return True
+                                        index_type: str = None) -> bool:
+        """
+        Build the index now when the collection is due one, see `PGVectorIndexManager`.
+        Inserts leave it to the manager, once the load is over.
+        """
+        return await self.index_manager.build_if_needed(collection_name=collection_name,
+                                                        index_type=index_type)
         
     async def reset_vector_index(self, collection_name: str,
-                                    index_type: str =  PgVectorIndexTypeEnums.HNSW.value) -> bool:
+                                    index_type: str = None) -> bool:
                 
             
         index_name = self.default_index_name(collection_name=collection_name)
@@ -216,6 +400,17 @@ class PGVectorProvider(VectorDBInterface):
                     f'DROP INDEX IF EXISTS {index_name}'
                 )
                 await session.execute(drop_sql)
+                await session.execute(
+                    update(VectorCollection)
+                    .where(VectorCollection.collection_name == collection_name)
+                    # the new index, and so the searches, take the current distance of the provider
+                    .values(collection_distance=self.distance_method,
+                            collection_index_type=index_type,
+                            collection_index_rows=None,
+                            collection_index_params=None,
+                            collection_state=PgVectorCollectionStateEnums.CREATED.value)
+                )
+        self.collection_cache.invalidate(collection_name)
         
 
         return await self.create_vector_index(
@@ -231,8 +426,8 @@ class PGVectorProvider(VectorDBInterface):
                           metadata: dict=None,
                           record_id: str= None): 
         
-        is_collection_existed = await self.is_collection_existed(collection_name)
-        if not is_collection_existed:
+        collection = await self.get_collection(collection_name=collection_name)
+        if collection is None:
             self.logger.error(f"Can not insert new record to non-existed collection: {collection_name}")
             return False
         
@@ -240,31 +435,35 @@ class PGVectorProvider(VectorDBInterface):
             self.logger.error(f"Can not insert new record without record_id: {collection_name}")
             return False
         
+        columns = self.get_insert_columns(collection=collection)
         async with self.db_client() as session:
             async with session.begin():
                 insert_sql = sql_text(
                     f'INSERT INTO {collection_name}'
-                    f'({PgVectorTableSchemaEnums.TEXT.value}, {PgVectorTableSchemaEnums.VECTOR.value}, {PgVectorTableSchemaEnums.METADATA.value}, {PgVectorTableSchemaEnums.CHUNK_ID.value}) '
-                    f'VALUES( :text, :vector, :metadata, :chunk_id)'
+                    f'({", ".join(columns)}) '
+                    f'VALUES({", ".join(f":{column}" for column in columns)})'
                 )
                 metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata is not None else "{}"
-                await session.execute(insert_sql,{
+                values = {
                     "text":text,
                     "vector": "[" + ",".join([ str(v) for v in vector]) + "]",
                     "metadata": metadata_json,
                     "chunk_id" : record_id
-                })
-                await self.create_vector_index(collection_name=collection_name)
+                }
+                if PgVectorTableSchemaEnums.VECTOR_BITS.value in columns:
+                    values[PgVectorTableSchemaEnums.VECTOR_BITS.value] = self.get_vector_bits(vector)
+                await session.execute(insert_sql, values)
 
                 await session.commit()
+        self.index_manager.schedule(collection_name)
         return True
     
     async def insert_many(self, collection_name: str, texts: list,
                           vectors: list, metadata: dict=None,
-                          record_ids: list= None, batch_size: int= 50):
+                          record_ids: list= None, batch_size: int= None):
         
-        is_collection_existed = await self.is_collection_existed(collection_name)
-        if not is_collection_existed:
+        collection = await self.get_collection(collection_name=collection_name)
+        if collection is None:
             self.logger.error(f"Can not insert new record to non-existed collection: {collection_name}")
             return False
         
@@ -275,63 +474,239 @@ class PGVectorProvider(VectorDBInterface):
         if not metadata or  len(metadata) == 0 :
             metadata = [None]*len(texts)
 
-        async with self.db_client() as session:
-            async with session.begin():
+        batch_size = batch_size or self.insert_batch_size
 
-                for i in range(0, len(texts), batch_size):
-                    batch_texts = texts[i: i+batch_size]
-                    batch_vecotrs = vectors[i: i+batch_size]
-                    batch_metadata = metadata[i: i+batch_size]
-                    batch_record_ids = record_ids[i: i+batch_size]
-
-                    values = []
-
-                    for _text, _vector, _metadata, _record_id in zip(batch_texts,batch_vecotrs,batch_metadata,batch_record_ids):
-                        
-                        metadata_json = json.dumps(_metadata, ensure_ascii=False) if _metadata is not None else "{}" 
-                        values.append({
-                            'text': _text,
-                            'vector':"[" + ",".join([ str(v) for v in _vector]) + "]",
-                            'metadata': metadata_json,
-                            'chunk_id': _record_id
-                        })
-
-                    batch_insert_sql = sql_text(
-                        f'INSERT INTO {collection_name} '
-                        f'({PgVectorTableSchemaEnums.TEXT.value}, ' 
-                        f'{PgVectorTableSchemaEnums.VECTOR.value}, ' 
-                        f'{PgVectorTableSchemaEnums.METADATA.value}, ' 
-                        f'{PgVectorTableSchemaEnums.CHUNK_ID.value}) '
-                        f'VALUES (:text, :vector, :metadata, :chunk_id)')
-                    await session.execute(batch_insert_sql, values)
+        # every batch commits on its own
+        for i in range(0, len(texts), batch_size):
+            batch_texts = texts[i: i+batch_size]
+            batch_vecotrs = vectors[i: i+batch_size]
+            batch_metadata = [
+                json.dumps(_metadata, ensure_ascii=False) if _metadata is not None else "{}"
+                for _metadata in metadata[i: i+batch_size]
+            ]
+            batch_record_ids = record_ids[i: i+batch_size]
 
-                    await session.commit()
-        await self.create_vector_index(collection_name=collection_name)
+            if self.insert_mode == PgVectorInsertModeEnums.COPY.value:
+                await self.copy_batch(collection, batch_texts, batch_vecotrs,
+                                      batch_metadata, batch_record_ids)
+            else:
+                await self.insert_batch(collection, batch_texts, batch_vecotrs,
+                                        batch_metadata, batch_record_ids)
+
+        self.index_manager.schedule(collection_name)
 
 
         return True
+
+    def get_insert_columns(self, collection: VectorCollection) -> list:
+        columns = [
+            PgVectorTableSchemaEnums.TEXT.value,
+            PgVectorTableSchemaEnums.VECTOR.value,
+            PgVectorTableSchemaEnums.METADATA.value,
+            PgVectorTableSchemaEnums.CHUNK_ID.value,
+        ]
+        if collection.collection_storage == PgVectorStorageModeEnums.BIT.value:
+            columns.append(PgVectorTableSchemaEnums.VECTOR_BITS.value)
+        return columns
+
+    async def insert_batch(self, collection: VectorCollection, texts: list, vectors: list,
+                           metadata: list, record_ids: list):
+        # vectors sent as text literals, parsed by the server
+        columns = self.get_insert_columns(collection=collection)
+        values = [
+            {
+                'text': _text,
+                'vector':"[" + ",".join([ str(v) for v in _vector]) + "]",
+                'metadata': _metadata,
+                'chunk_id': _record_id
+            }
+            for _text, _vector, _metadata, _record_id in zip(texts, vectors, metadata, record_ids)
+        ]
+        if PgVectorTableSchemaEnums.VECTOR_BITS.value in columns:
+            for value, _vector in zip(values, vectors):
+                value[PgVectorTableSchemaEnums.VECTOR_BITS.value] = self.get_vector_bits(_vector)
+
+        async with self.db_client() as session:
+            async with session.begin():
+                batch_insert_sql = sql_text(
+                    f'INSERT INTO {collection.collection_name} '
+                    f'({", ".join(columns)}) '
+                    f'VALUES ({", ".join(f":{column}" for column in columns)})')
+                await session.execute(batch_insert_sql, values)
+
+    async def copy_batch(self, collection: VectorCollection, texts: list, vectors: list,
+                         metadata: list, record_ids: list):
+        """
+        Binary COPY on the asyncpg connection under the session: the vectors go as float4
+        (or float2) arrays in pgvector's binary format, with no text formatting on either side.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        records = zip(texts, vectors, metadata, record_ids)
+        if collection.collection_storage == PgVectorStorageModeEnums.BIT.value:
+            records = (record + (self.get_vector_bits(vector),) for record, vector in zip(records, vectors))
+
+        if collection.collection_storage == PgVectorStorageModeEnums.HALFVEC.value:
+            vector_type, vector_class = "halfvec", HalfVector
+        else:
+            vector_type, vector_class = "vector", Vector
+
+        async with self.get_driver_connection() as asyncpg_connection:
+            async with asyncpg_connection.transaction():
+                await asyncpg_connection.set_type_codec(vector_type, schema="public", format="binary",
+                                                        encoder=vector_class._to_db_binary,
+                                                        decoder=vector_class._from_db_binary)
+                try:
+                    await asyncpg_connection.copy_records_to_table(
+                        collection.collection_name,
+                        records=records,
+                        columns=self.get_insert_columns(collection=collection)
+                    )
+                finally:
+                    # the pooled connection goes back with the text codec the other queries use
+                    await asyncpg_connection.reset_type_codec(vector_type, schema="public")
     
+    async def delete_by_record_ids(self, collection_name: str, record_ids: list):
+        if not record_ids or not await self.is_collection_existed(collection_name):
+            return 0
+
+        async with self.db_client() as session:
+            async with session.begin():
+                delete_sql = sql_text(
+                    f'DELETE FROM {collection_name} '
+                    f'WHERE {PgVectorTableSchemaEnums.CHUNK_ID.value} = ANY(:record_ids)'
+                )
+                result = await session.execute(delete_sql, {"record_ids": list(record_ids)})
+
+        return result.rowcount
+
+    async def get_vectors(self, collection_name: str, record_ids: list) -> dict:
+        # vectors already stored for these chunk ids, as {chunk_id: vector}
+        if not record_ids or not await self.is_collection_existed(collection_name):
+            return {}
+
+        async with self.db_client() as session:
+            async with session.begin():
+                select_sql = sql_text(
+                    f'SELECT {PgVectorTableSchemaEnums.CHUNK_ID.value} as chunk_id, '
+                    f'{PgVectorTableSchemaEnums.VECTOR.value}::text as vector '
+                    f'FROM {collection_name} '
+                    f'WHERE {PgVectorTableSchemaEnums.CHUNK_ID.value} = ANY(:record_ids)'
+                )
+                result = await session.execute(select_sql, {"record_ids": list(record_ids)})
+                records = result.fetchall()
+
+        return {
+            record.chunk_id: json.loads(record.vector)
+            for record in records
+        }
+
+    def get_search_sql(self, collection: VectorCollection, exact: bool=False):
+        """
+        Order by the raw distance operator of the index opclass, ascending, with a limit:
+        the only form Postgres can answer with an HNSW/IVFFlat index scan. The score is
+        derived from the distance in the select list only.
+
+        A bit collection takes `:candidates` rows by hamming distance of the sign bits,
+        through their index, and re-ranks them by the exact distance of the full vectors.
+        An exact search orders every row by the full distance.
+
+        The operator is the one of the collection distance, the one its index is built with.
+        """
+        distance_operator = self.get_distance_operator(collection)
+        distance = f'{PgVectorTableSchemaEnums.VECTOR.value} {distance_operator} :vector'
+
+        if distance_operator == PgVectorDistanceOperatorEnums.DOT.value:
+            # <#> is the negative inner product
+            score = f'-({distance})'
+        else:
+            score = f'1 - ({distance})'
+
+        if exact or collection.collection_storage != PgVectorStorageModeEnums.BIT.value:
+            return sql_text(
+                f'SELECT {PgVectorTableSchemaEnums.TEXT.value} as text, {score} as score '
+                f'FROM {collection.collection_name} '
+                f'ORDER BY {distance} '
+                'LIMIT :limit'
+            )
+
+        if self.is_quantization_supported():
+            candidate_distance = f'{PgVectorTableSchemaEnums.VECTOR_BITS.value} <~> :vector_bits'
+        else:
+            # no bit opclass before pgvector 0.7: a scan of the bit column, the vectors stay in TOAST
+            candidate_distance = f'bit_count({PgVectorTableSchemaEnums.VECTOR_BITS.value} # :vector_bits)'
+
+        return sql_text(
+            f'SELECT {PgVectorTableSchemaEnums.TEXT.value} as text, {score} as score '
+            'FROM ('
+                f'SELECT {PgVectorTableSchemaEnums.TEXT.value}, {PgVectorTableSchemaEnums.VECTOR.value} '
+                f'FROM {collection.collection_name} '
+                f'ORDER BY {candidate_distance} '
+                'LIMIT :candidates'
+            ') candidates '
+            f'ORDER BY {distance} '
+            'LIMIT :limit'
+        )
+
+    def get_search_values(self, collection: VectorCollection, vector: list, limit: int,
+                          rerank_factor: int=None, exact: bool=False) -> dict:
+        values = {
+            'vector': "[" + ",".join([ str(v) for v in vector]) + "]",
+            'limit': limit
+        }
+        if not exact and collection.collection_storage == PgVectorStorageModeEnums.BIT.value:
+            values['vector_bits'] = self.get_vector_bits(vector)
+            values['candidates'] = max(limit, min(limit * (rerank_factor or self.rerank_factor),
+                                                  HNSW_MAX_EF_SEARCH))
+        return values
+
+    async def set_search_params(self, session, limit: int, ef_search: int=None, probes: int=None,
+                                collection: VectorCollection=None, exact: bool=False):
+        # transaction local, like SET LOCAL, but set_config takes bound values
+        # hnsw returns at most ef_search rows, so it can not be lower than the limit
+        ef_search = min(max(ef_search or self.hnsw_ef_search, limit), HNSW_MAX_EF_SEARCH)
+        probes = probes or self.ivfflat_probes or self.get_default_probes(collection)
+
+        await session.execute(sql_text(
+            "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+            "set_config('ivfflat.probes', :probes, true)"
+        ), {"ef_search": str(ef_search), "probes": str(probes)})
+
+        if exact:
+            # the planner falls back to a scan and a sort on the exact distance
+            await session.execute(sql_text("SELECT set_config('enable_indexscan', 'off', true)"))
+
+    def get_default_probes(self, collection: VectorCollection=None) -> int:
+        # pgvector guidance: sqrt(lists) of the index
+        index_params = collection.collection_index_params if collection is not None else None
+        if not index_params or "lists" not in index_params:
+            return 1
+        return max(1, round(math.sqrt(index_params["lists"])))
+
     async def search_by_vector(self, collection_name: str, 
                                vector: list, 
-                               limit: int) -> List[RetrievedDocument]:
-
-        is_collection_existed = await self.is_collection_existed(collection_name)
-        if not is_collection_existed:
+                               limit: int,
+                               ef_search: int=None,
+                               probes: int=None,
+                               rerank_factor: int=None,
+                               exact: bool=None) -> List[RetrievedDocument]:
+
+        collection = await self.get_collection(collection_name=collection_name)
+        if collection is None:
             self.logger.error(f"Can not search for record to non-existed collection: {collection_name}")
             return False
-        
-        vector = "[" + ",".join([ str(v) for v in vector]) + "]"
+
+        await self.get_pgvector_version()
+        values = self.get_search_values(collection=collection, vector=vector, limit=limit,
+                                        rerank_factor=rerank_factor, exact=exact)
 
         async with self.db_client() as session:
             async with session.begin():
-                search_sql = sql_text(
-                    f'SELECT {PgVectorTableSchemaEnums.TEXT.value} as text, 1 - ({PgVectorTableSchemaEnums.VECTOR.value} <=> :vector) as score'
-                    f' FROM {collection_name} '
-                    'ORDER BY score DESC '
-                    f'LIMIT {limit}'
-                )
+                # the index returns the candidates, at least as many as re-ranked
+                await self.set_search_params(session, limit=values.get('candidates', limit),
+                                             ef_search=ef_search, probes=probes, collection=collection,
+                                             exact=exact)
 
-                result = await session.execute(search_sql, {'vector':vector})
+                result = await session.execute(self.get_search_sql(collection, exact=exact), values)
 
                 records = result.fetchall()
 
@@ -345,10 +720,3 @@ class PGVectorProvider(VectorDBInterface):
                     )
                     for record in records
                 ]
-
-    
-
-
-
-
-
@@ -1,7 +1,9 @@
-from qdrant_client import models, QdrantClient
+from qdrant_client import models, AsyncQdrantClient
 from ..VectorDBInterface import VectorDBInterface
+import asyncio
 import logging
-from ..VectorDBEnums import DistanceMethodEnums
+from ..VectorDBEnums import DistanceMethodEnums, QdrantQuantizationEnums
+from ..CollectionCache import CollectionCache
 from typing import List
 from models.db_schemes import RetrievedDocument
 
@@ -9,79 +11,177 @@ from models.db_schemes import RetrievedDocument
 class QdrantDBProvider(VectorDBInterface):
 
     def __init__(self, db_client: str, default_vector_size: int = 786,
-                  distance_method: str=None, index_threshold=100):
-        
+                  distance_method: str=None, index_threshold=100,
+                  collection_cache_ttl_seconds: float=60,
+                  url: str=None, api_key: str=None,
+                  prefer_grpc: bool=True, grpc_port: int=6334,
+                  upload_batch_size: int=256, upload_parallel: int=1,
+                  quantization: str=QdrantQuantizationEnums.NONE.value,
+                  quantization_always_ram: bool=True, quantization_rescore: bool=True,
+                  quantization_oversampling: float=2.0, product_compression: str="x16",
+                  on_disk_vectors: bool=False, on_disk_payload: bool=False,
+                  hnsw_m: int=16, hnsw_ef_construct: int=100,
+                  indexing_threshold_kb: int=0, memmap_threshold_kb: int=0,
+                  hnsw_ef: int=0, exact: bool=False):
+
         self.db_client = db_client
         self.client = None
         self.distance_method = None
         self.default_vector_size = default_vector_size
         self.index_threshold = index_threshold
 
+        # a server url replaces the local storage at `db_client`
+        self.url = url
+        self.api_key = api_key
+        self.prefer_grpc = prefer_grpc
+        self.grpc_port = grpc_port
+        self.upload_batch_size = upload_batch_size
+        self.upload_parallel = upload_parallel
+
+        # storage and index of new collections, existing ones keep the config they were created with
+        self.quantization = quantization or QdrantQuantizationEnums.NONE.value
+        self.quantization_always_ram = quantization_always_ram
+        self.quantization_rescore = quantization_rescore
+        self.quantization_oversampling = quantization_oversampling
+        self.product_compression = product_compression
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        # 0 keeps the Qdrant defaults
+        self.indexing_threshold_kb = indexing_threshold_kb
+        self.memmap_threshold_kb = memmap_threshold_kb
+
+        # search defaults, a search request can override them
+        self.hnsw_ef = hnsw_ef
+        self.exact = exact
+
         if distance_method == DistanceMethodEnums.COSINE.value:
             self.distance_method = models.Distance.COSINE
         elif distance_method == DistanceMethodEnums.DOT.value:
             self.distance_method = models.Distance.DOT
 
 
+        self.collection_cache = CollectionCache(ttl_seconds=collection_cache_ttl_seconds)
+
         self.logger = logging.getLogger("uvicorn")
 
 
     async def connect(self):
-        self.client = QdrantClient(path= self.db_client)
+        if self.url:
+            self.client = AsyncQdrantClient(url=self.url, api_key=self.api_key or None,
+                                            prefer_grpc=self.prefer_grpc, grpc_port=self.grpc_port)
+        else:
+            # the local storage is locked by the process that opens it, one uvicorn worker only
+            self.client = AsyncQdrantClient(path=self.db_client)
 
     async def disconnect(self):
+        if self.client is not None:
+            await self.client.close()
         self.client = None
 
     async def is_collection_existed(self, collection_name: str)-> bool :
-        return self.client.collection_exists(collection_name=collection_name)
+        if self.collection_cache.get(collection_name):
+            return True
+
+        is_collection_existed = await self.client.collection_exists(collection_name=collection_name)
+        if is_collection_existed:
+            self.collection_cache.set(collection_name, True)
+        return is_collection_existed
 
     async def list_all_collections(self)-> List:
-        return self.client.get_collections()
-    
+        return await self.client.get_collections()
+
     async def get_collection_info(self, collection_name: str)-> dict:
-        return self.client.get_collection(collection_name=collection_name)
+        return await self.client.get_collection(collection_name=collection_name)
 
     async def delete_collection(self, collection_name: str):
-        if self.is_collection_existed(collection_name):
+        if await self.is_collection_existed(collection_name):
             self.logger.info(f"Deleting collection: {collection_name}")
-            return self.client.delete_collection(collection_name=collection_name)
+            self.collection_cache.invalidate(collection_name)
+            return await self.client.delete_collection(collection_name=collection_name)
 
 
     async def create_collection(self, collection_name: str,
                                 embedding_size: int,
                                 do_reset: bool= False)-> bool:
-        
+
         if do_reset:
-            _= self.delete_collection(collection_name=collection_name)
+            _= await self.delete_collection(collection_name=collection_name)
 
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             self.logger.info(f"creating new Qdrant collection: {collection_name}")
-            
-            _= self.client.create_collection(
+
+            _= await self.client.create_collection(
                 collection_name= collection_name,
                 vectors_config= models.VectorParams(
-                    size=embedding_size, 
-                    distance=self.distance_method
-                    )
+                    size=embedding_size,
+                    distance=self.distance_method,
+                    on_disk=self.on_disk_vectors
+                    ),
+                hnsw_config= models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct),
+                optimizers_config= models.OptimizersConfigDiff(
+                    indexing_threshold=self.indexing_threshold_kb or None,
+                    memmap_threshold=self.memmap_threshold_kb or None
+                ),
+                quantization_config= self.get_quantization_config(),
+                on_disk_payload= self.on_disk_payload
             )
+            self.collection_cache.set(collection_name, True)
             return True
-        
+
         return False
-    
+
+    def get_quantization_config(self):
+        if self.quantization == QdrantQuantizationEnums.SCALAR.value:
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, always_ram=self.quantization_always_ram
+            ))
+
+        if self.quantization == QdrantQuantizationEnums.PRODUCT.value:
+            return models.ProductQuantization(product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio(self.product_compression),
+                always_ram=self.quantization_always_ram
+            ))
+
+        if self.quantization == QdrantQuantizationEnums.BINARY.value:
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+                always_ram=self.quantization_always_ram
+            ))
+
+        return None
+
+    def get_search_params(self, ef_search: int=None, exact: bool=None,
+                          rerank_factor: int=None) -> models.SearchParams:
+        # quantized collections search the compressed vectors for limit x oversampling
+        # candidates, rescored with the original vectors
+        quantization = None
+        if self.quantization != QdrantQuantizationEnums.NONE.value:
+            quantization = models.QuantizationSearchParams(
+                rescore=self.quantization_rescore,
+                oversampling=rerank_factor or self.quantization_oversampling
+            )
+
+        return models.SearchParams(
+            hnsw_ef=ef_search or self.hnsw_ef or None,
+            exact=self.exact if exact is None else exact,
+            quantization=quantization
+        )
+
     async def insert_one(self, collection_name: str, text: str, vector: list,
                           metadata: dict=None,
                           record_id: str= None)-> bool:
-        
-        if not self.is_collection_existed(collection_name=collection_name):
+
+        if not await self.is_collection_existed(collection_name=collection_name):
             self.logger.error(f"Can not insert a new  record to non-ecisted collection: {collection_name}")
             return False
-        
+
         try:
-            _ = self.client.upload_records(
+            _ = await self.client.upsert(
                 collection_name = collection_name,
-                records=[
-                    models.Record(
-                        id = [record_id],
+                points=[
+                    models.PointStruct(
+                        id = record_id,
                         vector=vector,
                         payload={
                             "text": text, "metadata":metadata
@@ -94,59 +194,94 @@ class QdrantDBProvider(VectorDBInterface):
             return False
 
         return True
-    
+
     async def insert_many(self, collection_name: str, texts: list,
                           vectors: list, metadata: dict=None,
-                          record_ids: list= None, batch_size: int= 50):
-        
+                          record_ids: list= None, batch_size: int= None):
+
         if metadata is None:
             metadata=[None] * len(texts)
 
         if record_ids is None:
             record_ids=list(range(0,len(texts)))
 
-        for i in range(0, len(texts), batch_size):
-            batch_end = i + batch_size
-
-            batch_texts= texts[i:batch_end]
-            batch_vectors = vectors[i:batch_end]
-            batch_metadata = metadata[i:batch_end]
-            batch_record_ids = record_ids[i:batch_end]
-
-            batch_records = [
-                models.Record(
-                    id = batch_record_ids[x],
-                    vector = batch_vectors[x],
-                    payload={
-                        "text": batch_texts[x],
-                        "metadata": batch_metadata[x]
-                    }
-                )
-                for x in range(len(batch_texts))
-                ]
+        batch_size = batch_size or self.upload_batch_size
 
-            try:
-                _ = self.client.upload_records(
-                collection_name = collection_name,
-                records=batch_records
-            ) 
-                
-            except Exception as e:
-                self.logger.error(f"Error while inserting batch:{e}")
-                return False
+        points = [
+            models.PointStruct(
+                id = record_ids[x],
+                vector = vectors[x],
+                payload={
+                    "text": texts[x],
+                    "metadata": metadata[x]
+                }
+            )
+            for x in range(len(texts))
+        ]
+
+        # batches go through the connected client, `upload_parallel` requests in flight at most
+        semaphore = asyncio.Semaphore(max(1, self.upload_parallel))
+
+        async def upsert_batch(batch_points: list):
+            async with semaphore:
+                return await self.client.upsert(collection_name=collection_name,
+                                                points=batch_points, wait=True)
+
+        try:
+            _ = await asyncio.gather(*[
+                upsert_batch(points[i:i + batch_size])
+                for i in range(0, len(points), batch_size)
+            ])
+
+        except Exception as e:
+            self.logger.error(f"Error while inserting batch:{e}")
+            return False
         return True
-    
 
-    async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5) ->List[RetrievedDocument] :
-        results =  self.client.search(
+
+    async def delete_by_record_ids(self, collection_name: str, record_ids: list):
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return 0
+
+        _ = await self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(record_ids))
+        )
+        return len(record_ids)
+
+    async def get_vectors(self, collection_name: str, record_ids: list) -> dict:
+        if not record_ids or not await self.is_collection_existed(collection_name=collection_name):
+            return {}
+
+        records = await self.client.retrieve(
+            collection_name=collection_name,
+            ids=list(record_ids),
+            with_payload=False,
+            with_vectors=True
+        )
+
+        return {
+            record.id: record.vector
+            for record in records
+        }
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5,
+                               ef_search: int= None, probes: int= None,
+                               rerank_factor: int= None, exact: bool= None) ->List[RetrievedDocument] :
+        # probes only applies to IVFFlat indexes, Qdrant indexes are HNSW
+        response = await self.client.query_points(
             collection_name= collection_name,
-            query_vector= vector,
-            limit = limit
+            query= vector,
+            limit = limit,
+            search_params= self.get_search_params(ef_search=ef_search, exact=exact,
+                                                  rerank_factor=rerank_factor),
+            with_payload=True
         )
+        results = response.points
 
         if not results or len(results) == 0 :
             return None
-        
+
         return [
             RetrievedDocument(
                 score=result.score,
@@ -154,7 +289,3 @@ class QdrantDBProvider(VectorDBInterface):
             )
             for result in results
         ]
-
-
-    
-  
\ No newline at end of file
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi import FastAPI, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 import time
@@ -7,6 +7,21 @@ import time
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP Requests', ['method','endpoint','status'])
 REQUEST_LATENCY= Histogram('http_request_duration_seconds', 'HTTP Request Latency', ['method','endpoint'])
 
+# Embedding cache metrics, the hit rate is hits / (hits + misses) per tier
+EMBEDDING_CACHE_REQUESTS = Counter('embedding_cache_requests_total', 'Embedding cache lookups', ['tier', 'result'])
+EMBEDDING_CACHE_BYTES = Gauge('embedding_cache_bytes', 'Bytes held by the in-process embedding cache')
+EMBEDDING_CACHE_STORED_BYTES = Counter('embedding_cache_stored_bytes_total', 'Embedding bytes written to the cache', ['tier'])
+EMBEDDING_BATCH_SIZE = Histogram('embedding_batch_size', 'Query texts sent per batched embedding call', buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+EMBEDDING_PROVIDER_CALLS = Counter('embedding_provider_calls_total', 'Embedding calls sent to the provider', ['result'])
+EMBEDDING_BATCH_LIMIT = Gauge('embedding_batch_limit', 'Texts per embedding call allowed by the adaptive scheduler')
+
+# Streamed answers, from the request to the first generated token (retrieval included)
+RAG_ANSWER_TIME_TO_FIRST_TOKEN = Histogram('rag_answer_time_to_first_token_seconds', 'Time to the first token of a streamed answer',
+                                           buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 20))
+# Vector index builds, run in the background once a load is over
+VECTOR_INDEX_BUILD_DURATION = Histogram('vector_index_build_duration_seconds', 'Duration of vector index builds', ['index_type'],
+                                        buckets=(0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+
 class PrometheusMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
 
@@ -37,3 +52,4 @@ def setup_metrics(app: FastAPI):
     def metrics():
         return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
     
+